@@ -1,60 +1,119 @@
-import logging
-from typing import List, Dict, Optional
-from data_ingestion.api import fetch_stock_data, fetch_historical_data
-
-# Configure logging to match orchestrator/main.py, language_agent.py, scraping_agent.py, and analysis_agent.py
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
-class APIAgent:
-    def __init__(self, tickers: Optional[List[str]] = None):
-        """
-        Initialize API Agent with optional tickers for Asia tech stocks.
-        Args:
-            tickers (List[str], optional): List of ticker symbols (e.g., ['TSM', '005930.KS']). Defaults to ["TSM", "005930.KS"] if None.
-        """
-        self.tickers = tickers if tickers is not None else ["TSM", "005930.KS"]
-        logger.info("APIAgent initialized with tickers: %s", self.tickers)
-
-    def get_market_data(self, tickers: Optional[List[str]] = None) -> Dict:
-        """
-        Fetch real-time and historical market data for the specified or default tickers.
-        Args:
-            tickers (List[str], optional): List of ticker symbols to fetch data for. If None, uses self.tickers.
-        Returns:
-            Dict: Combined real-time and historical data, or error message.
-        """
-        try:
-            target_tickers = tickers if tickers is not None else self.tickers
-            if not target_tickers:
-                logger.error("No tickers provided for market data fetch")
-                raise ValueError("No tickers provided")
-
-            logger.info("Fetching market data for tickers: %s", target_tickers)
-            realtime_data = fetch_stock_data(target_tickers)  # Fixed typo: fetch_realtime_data -> fetch_stock_data
-            historical_data = fetch_historical_data(target_tickers, days=30)
-            
-            result = {
-                "realtime": realtime_data or {},
-                "historical": historical_data or {}
-            }
-            logger.info("Successfully fetched market data: %s", result)
-            return result
-        except Exception as e:
-            logger.error("APIAgent error: %s", str(e), exc_info=True)
-            return {
-                "realtime": {},
-                "historical": {},
-                "error": f"Failed to fetch market data: {str(e)}"
-            }
-
-if __name__ == "__main__":
-    try:
-        agent = APIAgent()
-        data = agent.get_market_data()
-        logger.info("API Agent Output: %s", data)
-    except Exception as e:
+import logging
+from typing import List, Dict, Optional
+from data_ingestion.api import (
+    fetch_stock_data_bulk,
+    fetch_historical_data,
+    fetch_historical_data_incremental,
+    fetch_market_data_async
+)
+from data_ingestion.price_store import PriceStore
+from data_ingestion.quote_cache import QuoteCache
+
+# Configure logging to match orchestrator/main.py, language_agent.py, scraping_agent.py, and analysis_agent.py
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class APIAgent:
+    def __init__(
+        self,
+        tickers: Optional[List[str]] = None,
+        cache: Optional[QuoteCache] = None,
+        price_store: Optional[PriceStore] = None
+    ):
+        """
+        Initialize API Agent with optional tickers for Asia tech stocks.
+        Args:
+            tickers (List[str], optional): List of ticker symbols (e.g., ['TSM', '005930.KS']). Defaults to ["TSM", "005930.KS"] if None.
+            cache (QuoteCache, optional): Quote cache shared across requests. A private cache is created if None.
+            price_store (PriceStore, optional): Local daily-bar store. When set, history is fetched incrementally.
+        """
+        self.tickers = tickers if tickers is not None else ["TSM", "005930.KS"]
+        self.cache = cache if cache is not None else QuoteCache()
+        self.price_store = price_store
+        logger.info("APIAgent initialized with tickers: %s", self.tickers)
+
+    def get_market_data(self, tickers: Optional[List[str]] = None) -> Dict:
+        """
+        Fetch real-time and historical market data for the specified or default tickers.
+        Args:
+            tickers (List[str], optional): List of ticker symbols to fetch data for. If None, uses self.tickers.
+        Returns:
+            Dict: Combined real-time and historical data, or error message.
+        """
+        try:
+            target_tickers = tickers if tickers is not None else self.tickers
+            if not target_tickers:
+                logger.error("No tickers provided for market data fetch")
+                raise ValueError("No tickers provided")
+
+            logger.info("Fetching market data for tickers: %s", target_tickers)
+            realtime_data = self.cache.get_many("realtime", target_tickers, fetch_stock_data_bulk)
+            historical_data = self.cache.get_many("historical", target_tickers, self._load_historical)
+            
+            result = {
+                "realtime": realtime_data or {},
+                "historical": historical_data or {}
+            }
+            logger.info("Successfully fetched market data: %s", result)
+            return result
+        except Exception as e:
+            logger.error("APIAgent error: %s", str(e), exc_info=True)
+            return {
+                "realtime": {},
+                "historical": {},
+                "error": f"Failed to fetch market data: {str(e)}"
+            }
+
+    def _load_historical(self, tickers: List[str]) -> Dict:
+        if self.price_store is not None:
+            return {
+                ticker: fetch_historical_data_incremental(ticker, self.price_store, lookback_days=30)
+                for ticker in tickers
+            }
+        return {ticker: fetch_historical_data(ticker, period="1mo") for ticker in tickers}
+
+    def cache_stats(self) -> Dict:
+        """
+        Return quote cache counters (hits, stale hits, misses, refreshes).
+        Returns:
+            Dict: Cache statistics.
+        """
+        return self.cache.stats()
+
+    async def get_market_data_async(self, tickers: Optional[List[str]] = None, concurrency: int = 8) -> Dict:
+        """
+        Async counterpart of get_market_data for use inside the orchestrator's event loop.
+        Args:
+            tickers (List[str], optional): List of ticker symbols to fetch data for. If None, uses self.tickers.
+            concurrency (int): Maximum number of provider calls in flight.
+        Returns:
+            Dict: Combined real-time and historical data, or error message.
+        """
+        try:
+            target_tickers = tickers if tickers is not None else self.tickers
+            if not target_tickers:
+                logger.error("No tickers provided for market data fetch")
+                raise ValueError("No tickers provided")
+
+            logger.info("Fetching market data asynchronously for tickers: %s", target_tickers)
+            result = await fetch_market_data_async(target_tickers, period="1mo", concurrency=concurrency)
+            logger.info("Successfully fetched market data: %s", result)
+            return result
+        except Exception as e:
+            logger.error("APIAgent error: %s", str(e), exc_info=True)
+            return {
+                "realtime": {},
+                "historical": {},
+                "error": f"Failed to fetch market data: {str(e)}"
+            }
+
+if __name__ == "__main__":
+    try:
+        agent = APIAgent()
+        data = agent.get_market_data()
+        logger.info("API Agent Output: %s", data)
+    except Exception as e:
         logger.error("Test failed: %s", str(e), exc_info=True)
\ No newline at end of file
@@ -1,70 +1,377 @@
-import logging
-from typing import List, Tuple, Optional
-from langchain_core.documents import Document  # Use langchain.docstore.document.Document if < 0.1.x
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from data_ingestion.document_loader import load_documents, process_documents
-
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-# retriever_agent.py
-
-class RetrieverAgent:
-    def __init__(self):
-        # Initialize vector store or document store here
-        self.vector_store = None
-
-    def index_documents(self, documents):
-        # Example: logic to convert documents into embeddings and store them
-        from sentence_transformers import SentenceTransformer
-        import faiss
-        import numpy as np
-
-        model = SentenceTransformer("all-MiniLM-L6-v2")
-        texts = [doc.page_content for doc in documents]  # Assuming your documents have a 'text' key
-        embeddings = model.encode(texts)
-
-        dimension = embeddings.shape[1]
-        index = faiss.IndexFlatL2(dimension)
-        index.add(np.array(embeddings))
-        self.vector_store = index
-
-
-    def retrieve(self, query: str, k: int = 3, confidence_threshold: float = 0.7) -> Optional[List[Tuple[Document, float]]]:
-        """
-        Retrieve top-k relevant documents for the query.
-        
-        Args:
-            query (str): User query.
-            k (int): Number of documents to retrieve.
-            confidence_threshold (float): Minimum similarity score to consider.
-        
-        Returns:
-            Optional[List[Tuple[Document, float]]]: Filtered documents with score or None.
-        """
-        if not query.strip():
-            logger.warning("Empty query provided.")
-            return None
-        if not self.vector_store:
-            logger.error("Vector store is not initialized.")
-            return None
-        try:
-            results = self.vector_store.similarity_search_with_score(query, k=k)
-            filtered_results = [(doc, score) for doc, score in results if score >= confidence_threshold]
-            logger.info("Retrieved %d documents above confidence threshold.", len(filtered_results))
-            return filtered_results if filtered_results else None
-        except Exception as e:
-            logger.error("Error during retrieval: %s", str(e), exc_info=True)
-            return None
-
-if __name__ == "__main__":
-    agent = RetrieverAgent()
-    query = "What's our risk exposure in Asia tech stocks today, and highlight any earnings surprises?"
-    results = agent.retrieve(query)
-    if results:
-        for doc, score in results:
-            print(f"Retrieved: {doc.page_content}\nScore: {score:.4f}\n")
-    else:
-        print("No relevant documents found.")
+import logging
+import threading
+from typing import Dict, Iterable, List, Tuple, Optional
+from langchain_core.documents import Document  # Use langchain.docstore.document.Document if < 0.1.x
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from data_ingestion.chunking import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_TOKENS, batched, chunk_documents
+from data_ingestion.dedupe import DEFAULT_NEAR_DUPLICATE_THRESHOLD, NearDuplicateFilter, content_hash, split_new
+from data_ingestion.document_loader import iter_documents, process_documents
+from data_ingestion.index_store import VectorIndexStore, ensure_writable
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Scraper placeholders that carry no content worth embedding
+_PLACEHOLDER_PREFIXES = ("no recent earnings news", "failed to scrape", "no earnings data")
+
+class _LazyEmbeddings(Embeddings):
+    """Loads the sentence-transformer model on first use instead of at agent construction."""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        self.model_name = model_name
+        self._model = None
+
+    def _load(self) -> Embeddings:
+        if self._model is None:
+            # Unit vectors so inner product is cosine similarity
+            self._model = HuggingFaceEmbeddings(model_name=self.model_name, encode_kwargs={"normalize_embeddings": True})
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._load().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._load().embed_query(text)
+
+class RetrieverAgent:
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        documents: Optional[Iterable[Document]] = None,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+        batch_size: int = 64,
+        near_duplicate_threshold: Optional[float] = DEFAULT_NEAR_DUPLICATE_THRESHOLD,
+        index_dir: Optional[str] = None
+    ):
+        """
+        Initialize Retriever Agent. Given documents, the saved index is loaded and they are indexed
+        right away; otherwise nothing is loaded or embedded until the first retrieve (or until the
+        owner calls load_index / index_documents itself, e.g. in an app startup hook).
+        Args:
+            embeddings (Embeddings, optional): Embedding model. Defaults to a lazily loaded all-MiniLM-L6-v2
+                producing normalized vectors.
+            documents (Iterable[Document], optional): Documents to index. Defaults to iter_documents(),
+                indexed on the first retrieve unless index_documents has been called by then.
+            chunk_tokens (int): Maximum tokens per indexed chunk.
+            chunk_overlap (int): Tokens shared by consecutive chunks of a document.
+            batch_size (int): Chunks embedded per call to the embedding model.
+            near_duplicate_threshold (float, optional): Estimated Jaccard similarity at which a document
+                counts as a near-copy of one already indexed and is not embedded. None disables the check.
+            index_dir (str, optional): Directory of a saved index (see save_index). It is memory-mapped
+                before the starting documents are indexed, so only content not already saved is embedded.
+        """
+        self.embeddings = embeddings or _LazyEmbeddings()
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        self.batch_size = batch_size
+        self.vector_store = None
+        # Content hashes of everything in the index; also the docstore ids
+        self.indexed_hashes = set()
+        # Source file path -> ids of the chunks indexed from it, so a changed file can be replaced
+        self.sources: Dict[str, List[str]] = {}
+        self.near_duplicates = (
+            NearDuplicateFilter(near_duplicate_threshold) if near_duplicate_threshold is not None else None
+        )
+        self.dedupe_stats = {"added": 0, "skipped": 0, "near_duplicates": 0}
+        # Writers take _ingest_lock for the whole add; _lock only guards the live index,
+        # so queries wait for a merge but never for embedding
+        self._ingest_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.index_store = VectorIndexStore(index_dir) if index_dir else None
+        self.index_loaded = False
+        # Set until the default documents are indexed or the owner indexes documents itself
+        self._default_documents_pending = documents is None
+        self._start_lock = threading.Lock()
+        if documents is not None:
+            if self.index_store is not None:
+                self.load_index()
+            self._index_initial_documents(documents)
+
+    def _index_initial_documents(self, documents: Iterable[Document]) -> None:
+        try:
+            self.index_documents(documents)
+        except Exception as e:
+            logger.error("Error indexing initial documents: %s", str(e), exc_info=True)
+
+    def _index_default_documents(self) -> None:
+        # First retrieve of an agent built without documents: load the saved index and index iter_documents()
+        with self._start_lock:
+            if not self._default_documents_pending:
+                return
+            self._default_documents_pending = False
+            if self.index_store is not None and self.vector_store is None:
+                self.load_index()
+            self._index_initial_documents(iter_documents())
+
+    def add_documents(self, documents: List[Document], replacing: Optional[Dict[str, set]] = None) -> int:
+        """
+        Embed and index documents whose content is not already in the index, exactly or
+        (with the near-duplicate filter on) nearly. Safe to call from a background
+        thread while queries are served: new documents are embedded outside the index
+        lock and merged in one step.
+        Args:
+            documents (List[Document]): Documents to index.
+            replacing (Dict[str, set], optional): Source path -> ids of the chunks of its previous
+                version, still indexed until the new version is in. New chunks are not compared
+                against them; an unchanged chunk is carried over and its id taken out of the set.
+        Returns:
+            int: Number of documents actually embedded and added.
+        """
+        with self._ingest_lock:
+            documents = list(documents)
+            carried = 0
+            if replacing:
+                fresh = []
+                for doc in documents:
+                    path = doc.metadata.get("path")
+                    previous = replacing.get(path)
+                    digest = content_hash(doc.page_content) if previous else None
+                    if digest is not None and digest in previous:
+                        previous.discard(digest)
+                        self.sources.setdefault(path, []).append(digest)
+                        carried += 1
+                    else:
+                        fresh.append(doc)
+                documents = fresh
+            # Every file a chunk came from references it, including ones skipped as exact duplicates
+            produced = [(doc.metadata["path"], content_hash(doc.page_content)) for doc in documents if "path" in doc.metadata]
+            new_docs, new_hashes, skipped = split_new(documents, self.indexed_hashes)
+            skipped += carried
+            self.dedupe_stats["skipped"] += skipped
+            if self.near_duplicates is not None and new_docs:
+                # Exact duplicates are already gone; MinHash only runs on new content
+                ignore = set().union(*replacing.values()) if replacing else ()
+                kept = [
+                    (doc, digest) for doc, digest in zip(new_docs, new_hashes)
+                    if not self.near_duplicates.is_duplicate(doc.page_content, doc_id=digest, ignore=ignore)
+                ]
+                near = len(new_docs) - len(kept)
+                self.dedupe_stats["near_duplicates"] += near
+                if near:
+                    logger.info("Dropped %d near-duplicate documents.", near)
+                new_docs = [doc for doc, _ in kept]
+                new_hashes = [digest for _, digest in kept]
+            if not new_docs:
+                self._record_sources(produced)
+                logger.info("No new documents to index (%d duplicates skipped).", skipped)
+                return 0
+            # Embed into a separate store first; in-flight queries keep using the live index
+            delta = FAISS.from_documents(
+                new_docs,
+                self.embeddings,
+                ids=new_hashes,
+                distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+            )
+            with self._lock:
+                if self.vector_store is None:
+                    self.vector_store = delta
+                else:
+                    ensure_writable(self.vector_store)
+                    self.vector_store.merge_from(delta)
+            self.indexed_hashes.update(new_hashes)
+            self._record_sources(produced)
+            self.dedupe_stats["added"] += len(new_docs)
+            logger.info("Indexed %d new documents, skipped %d duplicates.", len(new_docs), skipped)
+            return len(new_docs)
+
+    def _record_sources(self, produced: List[Tuple[str, str]]) -> None:
+        # Caller holds _ingest_lock; near-duplicates dropped from the batch are not indexed and not recorded
+        for path, digest in produced:
+            if digest in self.indexed_hashes:
+                ids = self.sources.setdefault(path, [])
+                if digest not in ids:
+                    ids.append(digest)
+
+    def remove_sources(self, paths: Iterable[str]) -> int:
+        """
+        Delete the chunks indexed from the given source files, e.g. ones deleted from a watched directory.
+        A chunk another source file still contains is kept. Deleted chunks also stop counting for the
+        duplicate and near-duplicate checks.
+        Args:
+            paths (Iterable[str]): Source file paths (the "path" metadata of their documents).
+        Returns:
+            int: Number of chunks deleted.
+        """
+        with self._ingest_lock:
+            removed = self._delete_chunks([digest for path in paths for digest in self.sources.pop(path, [])])
+        if removed:
+            logger.info("Removed %d chunks of deleted files.", removed)
+        return removed
+
+    def _delete_chunks(self, ids: Iterable[str]) -> int:
+        # Caller holds _ingest_lock and has already taken the ids out of self.sources
+        ids = [digest for digest in dict.fromkeys(ids) if digest in self.indexed_hashes]
+        if ids:
+            referenced = {digest for source_ids in self.sources.values() for digest in source_ids}
+            ids = [digest for digest in ids if digest not in referenced]
+        if not ids:
+            return 0
+        with self._lock:
+            ensure_writable(self.vector_store)
+            self.vector_store.delete(ids)
+        self.indexed_hashes.difference_update(ids)
+        if self.near_duplicates is not None:
+            self.near_duplicates.discard(ids)
+        return len(ids)
+
+    def _superseding(self, documents: Iterable[Document], replacing: Dict[str, set]) -> Iterable[Document]:
+        # A file arriving again has changed: set its previous chunks aside, to be deleted once
+        # the new version is indexed, so the file stays searchable while it is re-embedded
+        for doc in documents:
+            path = doc.metadata.get("path")
+            if path is not None and path not in replacing:
+                with self._ingest_lock:
+                    replacing[path] = set(self.sources.pop(path, []))
+            yield doc
+
+    def _embeddings_model(self) -> Optional[str]:
+        return getattr(self.embeddings, "model_name", None)
+
+    def load_index(self) -> bool:
+        """
+        Replace the in-memory index with the one saved in index_dir, memory-mapped read-only.
+        Vectors and documents are paged in on demand and shared with other processes mapping the
+        same files; the first merge or deletion copies the vectors into process memory.
+        Returns:
+            bool: True if a saved index was loaded.
+        """
+        if self.index_store is None:
+            return False
+        loaded = self.index_store.load(self.embeddings, self._embeddings_model())
+        if loaded is None:
+            return False
+        store, meta, signatures, signature_ids, sources = loaded
+        near_duplicates = None
+        if self.near_duplicates is not None:
+            near_duplicates = NearDuplicateFilter(
+                self.near_duplicates.threshold, self.near_duplicates.num_perm,
+                self.near_duplicates.shingle_size, self.near_duplicates.seed
+            )
+            saved = meta.get("near_duplicates") or {}
+            settings = {key: getattr(near_duplicates, key) for key in ("threshold", "num_perm", "shingle_size", "seed")}
+            if signatures is not None and all(saved.get(key) == value for key, value in settings.items()):
+                near_duplicates.restore(signatures, signature_ids)
+            else:
+                logger.warning("No matching near-duplicate signatures saved; only new documents are compared.")
+        with self._ingest_lock, self._lock:
+            self.vector_store = store
+            self.indexed_hashes = set(store.index_to_docstore_id.values())
+            self.sources = sources
+            self.near_duplicates = near_duplicates
+            self.index_loaded = True
+        logger.info("Loaded %d indexed chunks from %s.", meta["ntotal"], self.index_store.root)
+        return True
+
+    def save_index(self) -> int:
+        """
+        Write the index, its docstore and the near-duplicate signatures to index_dir.
+        Writers wait while the files are written; queries keep running.
+        Returns:
+            int: Number of chunks saved (0 if there is no index_dir or nothing is indexed).
+        """
+        if self.index_store is None or self.vector_store is None:
+            return 0
+        with self._ingest_lock:
+            saved = self.index_store.save(
+                self.vector_store, self.near_duplicates, self._embeddings_model(), self.sources
+            )
+        logger.info("Saved %d indexed chunks to %s.", saved, self.index_store.root)
+        return saved
+
+    def index_documents(self, documents: Iterable[Document]) -> int:
+        """
+        Index loaded documents (e.g., from iter_documents) as overlapping token-bounded chunks.
+        Documents are consumed lazily and chunks stream into the embedder batch_size at a
+        time, so only one batch is in memory; unchanged content is not re-embedded. A source
+        file indexed again replaces the chunks of its previous version, which are deleted
+        only after the new version is in.
+        Args:
+            documents (Iterable[Document]): Documents to index.
+        Returns:
+            int: Number of chunks actually embedded and added.
+        """
+        self._default_documents_pending = False
+        replacing: Dict[str, set] = {}
+        documents = self._superseding(process_documents(documents), replacing)
+        chunks = chunk_documents(documents, self.chunk_tokens, self.chunk_overlap)
+        try:
+            added = sum(self.add_documents(batch, replacing) for batch in batched(chunks, self.batch_size))
+        except Exception:
+            # The old chunks are still indexed; keep them tracked so the next attempt replaces them
+            with self._ingest_lock:
+                for path, previous in replacing.items():
+                    self.sources.setdefault(path, []).extend(previous)
+            raise
+        with self._ingest_lock:
+            retired = self._delete_chunks(digest for previous in replacing.values() for digest in previous)
+        if retired:
+            logger.info("Removed %d chunks of superseded file versions.", retired)
+        return added
+
+    def index(self, scraped_data: Dict) -> int:
+        """
+        Index scraped headlines, skipping ones already embedded.
+        Args:
+            scraped_data (Dict): Ticker -> headline string (scrape_earnings_data) or list of
+                Headline records (scrape_headlines).
+        Returns:
+            int: Number of headlines actually embedded and added.
+        """
+        documents = []
+        for ticker, items in scraped_data.items():
+            for item in ([items] if isinstance(items, str) else items):
+                title = item if isinstance(item, str) else item.title
+                if not title.strip() or title.lower().startswith(_PLACEHOLDER_PREFIXES):
+                    continue
+                metadata = {"source": "scraped", "ticker": ticker}
+                if not isinstance(item, str) and item.published:
+                    metadata["date"] = item.published
+                documents.append(Document(page_content=title, metadata=metadata))
+        return self.add_documents(documents)
+
+    def retrieve(self, query: str, k: int = 3, confidence_threshold: float = 0.7) -> Optional[List[Tuple[Document, float]]]:
+        """
+        Retrieve top-k relevant documents for the query.
+
+        Args:
+            query (str): User query.
+            k (int): Number of documents to retrieve.
+            confidence_threshold (float): Minimum cosine similarity to consider.
+
+        Returns:
+            Optional[List[Tuple[Document, float]]]: Documents with score above the threshold
+            (empty if nothing is indexed), or None for an empty query or a retrieval error.
+        """
+        if not query.strip():
+            logger.warning("Empty query provided.")
+            return None
+        if self._default_documents_pending:
+            self._index_default_documents()
+        if not self.vector_store:
+            logger.warning("Vector store is empty; nothing to retrieve.")
+            return []
+        try:
+            with self._lock:
+                results = self.vector_store.similarity_search_with_score(query, k=k)
+            filtered_results = [(doc, score) for doc, score in results if score >= confidence_threshold]
+            logger.info("Retrieved %d documents above confidence threshold.", len(filtered_results))
+            return filtered_results
+        except Exception as e:
+            logger.error("Error during retrieval: %s", str(e), exc_info=True)
+            return None
+
+if __name__ == "__main__":
+    agent = RetrieverAgent()
+    agent.index({"TSM": "tsmc earnings beat estimates by 4%"})
+    query = "What's our risk exposure in Asia tech stocks today, and highlight any earnings surprises?"
+    results = agent.retrieve(query)
+    if results:
+        for doc, score in results:
+            print(f"Retrieved: {doc.page_content}\nScore: {score:.4f}\n")
+    else:
+        print("No relevant documents found.")
@@ -1,29 +1,82 @@
-from data_ingestion.scraper import scrape_earnings_data, clean_earnings_data
-
-class ScrapingAgent:
-    def __init__(self, tickers=["TSM", "005930.KS"]):
-        """
-        Initialize Scraping Agent with default tickers.
-        Args:
-            tickers (list): List of ticker symbols.
-        """
-        self.tickers = tickers
-
-    def get_earnings_data(self):
-        """
-        Scrape and clean earnings data for tickers.
-        Returns:
-            dict: Cleaned earnings data.
-        """
-        try:
-            raw_data = scrape_earnings_data(self.tickers)
-            cleaned_data = clean_earnings_data(raw_data)
-            return cleaned_data
-        except Exception as e:
-            print(f"Scraping Agent error: {e}")
-            return {ticker: "No earnings data available" for ticker in self.tickers}
-
-if __name__ == "__main__":
-    agent = ScrapingAgent()
-    data = agent.get_earnings_data()
+from data_ingestion import scraper
+from data_ingestion.feeds import FeedReader
+
+class ScrapingAgent:
+    def __init__(self, tickers=["TSM", "005930.KS"], max_workers=32, per_host=16):
+        """
+        Initialize Scraping Agent with default tickers.
+        Args:
+            tickers (list): List of ticker symbols.
+            max_workers (int): Pages fetched concurrently.
+            per_host (int): Maximum open connections to one host.
+        """
+        self.tickers = tickers
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.feed_reader = None
+
+    def get_earnings_data(self, tickers=None, priority=scraper.INTERACTIVE):
+        """
+        Scrape and clean earnings data for tickers.
+        Args:
+            tickers (list): Tickers to scrape. Defaults to self.tickers.
+            priority (int): scraper.INTERACTIVE for user requests, scraper.BACKGROUND for refreshes.
+        Returns:
+            dict: Cleaned earnings data.
+        """
+        tickers = tickers if tickers is not None else self.tickers
+        try:
+            raw_data = scraper.scrape_earnings_data(
+                tickers, max_workers=self.max_workers, per_host=self.per_host, priority=priority
+            )
+            cleaned_data = scraper.clean_earnings_data(raw_data)
+            return cleaned_data
+        except Exception as e:
+            print(f"Scraping Agent error: {e}")
+            return {ticker: "No earnings data available" for ticker in tickers}
+
+    def get_headlines(self, tickers=None, top_n=scraper.DEFAULT_TOP_N, priority=scraper.INTERACTIVE):
+        """
+        Scrape the top-ranked news headlines for tickers.
+        Args:
+            tickers (list): Tickers to scrape. Defaults to self.tickers.
+            top_n (int): Maximum headlines kept per ticker.
+            priority (int): scraper.INTERACTIVE for user requests, scraper.BACKGROUND for refreshes.
+        Returns:
+            dict: Ticker -> list of Headline records (title, published, relevance), best first.
+        """
+        tickers = tickers if tickers is not None else self.tickers
+        try:
+            return scraper.scrape_headlines(
+                tickers, max_workers=self.max_workers, per_host=self.per_host, top_n=top_n, priority=priority
+            )
+        except Exception as e:
+            print(f"Scraping Agent error: {e}")
+            return {ticker: [] for ticker in tickers}
+
+    def get_feed_items(self, tickers=None, priority=scraper.INTERACTIVE):
+        """
+        Poll ticker headline feeds, returning only items published since the last poll.
+        Args:
+            tickers (list): Tickers to poll. Defaults to self.tickers.
+            priority (int): scraper.INTERACTIVE for user requests, scraper.BACKGROUND for refreshes.
+        Returns:
+            dict: Ticker -> list of new FeedItem records (title, link, guid, published).
+        """
+        tickers = tickers if tickers is not None else self.tickers
+        if self.feed_reader is None:
+            self.feed_reader = FeedReader()
+        return self.feed_reader.poll_tickers(tickers, priority=priority)
+
+    def scheduler_stats(self):
+        """
+        Queue depth and wait-time metrics of the shared scraping scheduler.
+        Returns:
+            dict: Per-domain metrics from PolitenessScheduler.stats().
+        """
+        return scraper.get_scheduler().stats()
+
+if __name__ == "__main__":
+    agent = ScrapingAgent()
+    data = agent.get_earnings_data()
     print("Scraping Agent Output:", data)
\ No newline at end of file
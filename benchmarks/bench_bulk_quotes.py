@@ -0,0 +1,106 @@
+"""
+Compare the per-ticker fetch_stock_data loop against fetch_stock_data_bulk.
+
+A local stub provider stands in for yfinance so the numbers only reflect the
+number of provider round trips, not Yahoo's mood. Every stub call sleeps for a
+fixed latency, whether it is a single quote or a multi-symbol batch.
+
+The last row runs the real YFinanceProvider.get_quotes against a stubbed
+yfinance module and counts batched downloads and per-symbol lookups
+(yf.Ticker(...).info, .fast_info, .history) separately, so a per-symbol
+request sneaking into the bulk path shows up here.
+
+Usage:
+    python -m benchmarks.bench_bulk_quotes --tickers 300 --latency 0.02
+"""
+import argparse
+import time
+from unittest.mock import patch
+import pandas as pd
+import data_ingestion.api as api
+from data_ingestion.providers import MarketDataProvider, YFinanceProvider
+
+class StubProvider(MarketDataProvider):
+    name = "stub"
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def get_quote(self, ticker):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {"price": 100.0, "volume": 1000, "market_cap": 10 ** 9}
+
+    def get_quotes(self, tickers):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {ticker: {"price": 100.0, "volume": 1000, "market_cap": 10 ** 9} for ticker in tickers}
+
+class StubYFinance:
+    """Counts the calls YFinanceProvider makes into yfinance."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.downloads = 0
+        self.per_symbol = 0
+
+    def download(self, tickers, **kwargs):
+        self.downloads += 1
+        time.sleep(self.latency)
+        columns = pd.MultiIndex.from_product([tickers, ["Close", "Volume"]])
+        return pd.DataFrame([[100.0, 1000] * len(tickers)], index=pd.to_datetime(["2025-05-30"]), columns=columns)
+
+    def Ticker(self, ticker):
+        stub = self
+
+        class _Ticker:
+            def __getattr__(self, name):
+                # Every attribute yfinance resolves per symbol is a request to Yahoo
+                stub.per_symbol += 1
+                time.sleep(stub.latency)
+                raise AttributeError(name)
+
+        return _Ticker()
+
+def run(n_tickers, latency, chunk_size):
+    tickers = [f"SYM{i:04d}" for i in range(n_tickers)]
+    try:
+        provider = StubProvider(latency)
+        api.set_provider(provider)
+        start = time.perf_counter()
+        loop_result = {ticker: api.fetch_stock_data(ticker) for ticker in tickers}
+        loop_time, loop_calls = time.perf_counter() - start, provider.calls
+
+        provider = StubProvider(latency)
+        api.set_provider(provider)
+        start = time.perf_counter()
+        bulk_result = api.fetch_stock_data_bulk(tickers, chunk_size=chunk_size)
+        bulk_time, bulk_calls = time.perf_counter() - start, provider.calls
+
+        stub = StubYFinance(latency)
+        api.set_provider(YFinanceProvider())
+        with patch("data_ingestion.providers.yf", stub):
+            start = time.perf_counter()
+            yf_result = api.fetch_stock_data_bulk(tickers, chunk_size=chunk_size)
+            yf_time = time.perf_counter() - start
+    finally:
+        api.set_provider(None)
+
+    assert loop_result.keys() == bulk_result.keys() == yf_result.keys()
+    print(f"tickers={n_tickers} latency={latency * 1000:.0f}ms chunk_size={chunk_size}")
+    print(f"per-ticker loop: {loop_calls:5d} calls  {loop_time:8.3f}s")
+    print(f"bulk fetch:      {bulk_calls:5d} calls  {bulk_time:8.3f}s")
+    print(f"speedup:         {loop_time / bulk_time:8.1f}x")
+    print(
+        f"yfinance bulk:   {stub.downloads + stub.per_symbol:5d} calls  {yf_time:8.3f}s"
+        f"  ({stub.downloads} downloads, {stub.per_symbol} per-symbol)"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    args = parser.parse_args()
+    run(args.tickers, args.latency, args.chunk_size)
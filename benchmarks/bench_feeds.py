@@ -0,0 +1,88 @@
+"""
+Compare a refresh from the HTML news page against the RSS feed of the same headlines.
+
+The feed is built from the headlines in benchmarks/fixtures/yahoo_news_TSM.html,
+so both sources carry identical items. Rows show bytes transferred and parse time
+for a full HTML scrape, a first feed poll, a feed poll after two new items
+(parsing stops at the cursor), and an unchanged feed answered with a 304. The
+304 row polls a FeedReader through a stub session that answers the conditional
+GET, so it measures the reader's own overhead without network time.
+
+Usage:
+    python -m benchmarks.bench_feeds --repeat 50
+"""
+import argparse
+import os
+import time
+from email.utils import format_datetime
+from datetime import datetime
+from xml.sax.saxutils import escape
+from data_ingestion.feeds import FeedReader, new_feed_items
+from data_ingestion.politeness import PolitenessScheduler
+from data_ingestion.scraper import iter_headline_items, parse_headlines
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "yahoo_news_TSM.html")
+
+def build_feed(items):
+    entries = "".join(
+        f"<item><title>{escape(title)}</title><link>https://finance.yahoo.com/news/tsm-{i}.html</link>"
+        f"<guid isPermaLink=\"false\">tsm-{i}</guid>"
+        f"<pubDate>{format_datetime(datetime.fromisoformat(published.replace('Z', '+00:00')))}</pubDate></item>\n"
+        for i, (title, published) in items
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel><title>TSM</title>\n{entries}</channel></rss>'
+
+class StubSession:
+    """Serves one feed body with an ETag, then 304 to requests that send it back."""
+
+    def __init__(self, body):
+        self.body = body
+        self.bytes_sent = 0
+
+    def get(self, url, headers=None, timeout=None):
+        response = type("Response", (), {})()
+        response.raise_for_status = lambda: None
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            response.status_code, response.headers, response.text = 304, {}, ""
+        else:
+            response.status_code, response.headers, response.text = 200, {"ETag": '"v1"'}, self.body
+        self.bytes_sent += len(response.text.encode("utf-8"))
+        return response
+
+def _time(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+def run(repeat):
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        html = f.read()
+    # Newest first, as feeds are published
+    items = sorted(enumerate(iter_headline_items(html)), key=lambda item: item[1][1], reverse=True)
+    feed = build_feed(items)
+    _, cursor = new_feed_items(build_feed(items[2:]))
+
+    session = StubSession(feed)
+    reader = FeedReader(cache=None, scheduler=PolitenessScheduler(rate=10 ** 9, burst=10 ** 9, concurrency=1))
+    url = reader.feed_url.format(ticker="TSM")
+    reader.poll(url, session=session)
+    session.bytes_sent = 0
+    not_modified = _time(lambda: reader.poll(url, session=session), repeat)
+    assert reader.bytes_parsed == len(feed.encode("utf-8")), "an unchanged feed was parsed again"
+
+    rows = [
+        ("html page", len(html.encode("utf-8")), *_time(lambda: parse_headlines(html, "TSM"), repeat)),
+        ("feed, first poll", len(feed.encode("utf-8")), *_time(lambda: new_feed_items(feed)[0], repeat)),
+        ("feed, 2 new items", len(feed.encode("utf-8")), *_time(lambda: new_feed_items(feed, cursor)[0], repeat)),
+        ("feed, 304", session.bytes_sent / repeat, *not_modified),
+    ]
+    print(f"{len(items)} headlines, repeat={repeat}")
+    for name, size, seconds, result in rows:
+        print(f"{name:<18} {size / 1024:8.1f} KiB {seconds * 1000:8.2f} ms  {len(result):3d} items")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    run(args.repeat)
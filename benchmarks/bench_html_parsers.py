@@ -0,0 +1,51 @@
+"""
+Micro-benchmark the scraper's headline extraction backends on saved pages.
+
+Each backend extracts every headline from the fixture pages in
+benchmarks/fixtures (extract), then ranks the top headlines over the whole
+page, the work scrape_earnings_data does per ticker (ranked).
+
+Usage:
+    python -m benchmarks.bench_html_parsers --repeat 20
+"""
+import argparse
+import glob
+import os
+import time
+from data_ingestion.scraper import PARSERS, extract_headlines, parse_headlines
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "yahoo_news_*.html")
+
+def _time(fn, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = {ticker: fn(html, ticker) for ticker, html in pages}
+    return (time.perf_counter() - start) / (repeat * len(pages)), result
+
+def run(repeat):
+    pages = []
+    for path in sorted(glob.glob(FIXTURES)):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((os.path.basename(path)[len("yahoo_news_"):-len(".html")], f.read()))
+    print(f"{len(pages)} pages, {sum(len(html) for _, html in pages) / 1024:.0f} KiB, repeat={repeat}")
+
+    expected_extracted = {ticker: extract_headlines(html, "html.parser") for ticker, html in pages}
+    expected_ranked = {ticker: parse_headlines(html, ticker, "html.parser") for ticker, html in pages}
+    print(f"{'':<12} {'extract':>18} {'ranked':>18}")
+    baseline = None
+    for parser in reversed(PARSERS):
+        extracted, result = _time(lambda html, ticker: extract_headlines(html, parser), pages, repeat)
+        assert result == expected_extracted, (parser, result)
+        ranked, result = _time(lambda html, ticker: parse_headlines(html, ticker, parser), pages, repeat)
+        assert result == expected_ranked, (parser, result)
+        baseline = baseline or (extracted, ranked)
+        print(
+            f"{parser:<12} {extracted * 1000:6.2f} ms {baseline[0] / extracted:6.1f}x "
+            f"{ranked * 1000:6.2f} ms {baseline[1] / ranked:6.1f}x"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.repeat)
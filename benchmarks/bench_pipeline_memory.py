@@ -0,0 +1,72 @@
+"""
+Peak RSS of the document ingestion pipeline as the corpus grows, eager vs streaming.
+
+For each corpus size a directory of synthetic research notes is written, and a
+fresh interpreter loads, cleans, chunks and "embeds" it (a stub that only looks
+at each batch), reporting its peak resident set size:
+
+- eager:  load_documents() list, then a copied list of cleaned Documents, then
+          every chunk, as the pipeline did before it streamed
+- stream: iter_documents() -> process_documents() -> chunk_documents() -> batched()
+
+Usage:
+    python -m benchmarks.bench_pipeline_memory --files 250 1000 4000 --kib 16
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+def write_corpus(directory, files, kib):
+    line = "TSMC reported quarterly revenue ahead of guidance as AI server demand lifted wafer shipments.\n"
+    body = line * (kib * 1024 // len(line))
+    for i in range(files):
+        with open(os.path.join(directory, f"note_{i:05d}.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Research note {i}\n{body}")
+
+def embed(batch):
+    # Stand-in for the embedder: touch every chunk, keep nothing
+    return sum(len(doc.page_content) for doc in batch)
+
+def child(mode, directory):
+    from langchain.docstore.document import Document
+    from data_ingestion.chunking import batched, chunk_documents
+    from data_ingestion.document_loader import iter_documents, load_documents, process_documents
+
+    if mode == "eager":
+        documents = load_documents(directory)
+        cleaned = [Document(page_content=' '.join(doc.page_content.split()), metadata=doc.metadata) for doc in documents]
+        chunks = list(chunk_documents(cleaned))
+        for start in range(0, len(chunks), 64):
+            embed(chunks[start:start + 64])
+    else:
+        for batch in batched(chunk_documents(process_documents(iter_documents(directory))), 64):
+            embed(batch)
+    # ru_maxrss is KiB on Linux
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+def run(file_counts, kib):
+    print(f"{'files':>6} {'corpus':>9} {'eager':>10} {'stream':>10}")
+    for files in file_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            write_corpus(directory, files, kib)
+            peaks = {
+                mode: int(subprocess.check_output(
+                    [sys.executable, "-m", "benchmarks.bench_pipeline_memory", "--child", mode, directory]
+                ))
+                for mode in ("eager", "stream")
+            }
+        print(f"{files:>6} {files * kib / 1024:>6.1f} MiB {peaks['eager'] / 1024:>6.1f} MiB {peaks['stream'] / 1024:>6.1f} MiB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, nargs="+", default=[250, 1000, 4000])
+    parser.add_argument("--kib", type=int, default=16, help="Size of each note in KiB")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+    else:
+        run(args.files, args.kib)
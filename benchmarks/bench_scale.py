@@ -0,0 +1,70 @@
+"""
+Run the data and analysis stages of the pipeline against a synthetic universe.
+
+Market data flows through APIAgent with a SyntheticProvider and, as in the
+orchestrator, a PriceStore (in a temporary directory), earnings come from
+the universe's fabricated headlines, and AnalysisAgent runs once per synthetic
+portfolio. The LLM and TTS stages are skipped; the prompt size is reported
+instead, since that is what they would be fed.
+
+Usage:
+    python -m benchmarks.bench_scale --tickers 10000 --years 5 --holdings 100000
+"""
+import argparse
+import logging
+import tempfile
+import time
+import tracemalloc
+import data_ingestion.api as api
+from agents.analysis_agent import AnalysisAgent
+from agents.api_agent import APIAgent
+from data_ingestion.price_store import PriceStore
+from data_ingestion.synthetic import SyntheticProvider, SyntheticUniverse
+
+def stage(name, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:<28} {elapsed:9.3f}s  peak {peak / 2 ** 20:9.1f} MiB")
+    return result
+
+def run(n_tickers, years, n_holdings, per_portfolio, seed):
+    # Per-call INFO logs of whole payloads would dominate at this size
+    logging.getLogger("agents").setLevel(logging.WARNING)
+
+    print(f"tickers={n_tickers} years={years} holdings={n_holdings} per_portfolio={per_portfolio}")
+    universe = stage("build universe", lambda: SyntheticUniverse(n_tickers=n_tickers, years=years, seed=seed))
+    api.set_provider(SyntheticProvider(universe))
+    try:
+        with tempfile.TemporaryDirectory() as store_dir:
+            agent = APIAgent(tickers=universe.tickers, price_store=PriceStore(store_dir))
+            market_data = stage("fetch market data (cold)", agent.get_market_data)
+            stage("fetch market data (cached)", agent.get_market_data)
+    finally:
+        api.set_provider(None)
+
+    earnings = stage("earnings headlines", universe.earnings_headlines)
+    portfolios = stage("build portfolios", lambda: universe.portfolios(n_holdings, per_portfolio))
+
+    def analyze():
+        return [
+            AnalysisAgent(portfolio=today, yesterday_portfolio=yesterday).analyze_risk_exposure(market_data, earnings)
+            for today, yesterday in portfolios
+        ]
+
+    analyses = stage(f"analysis x{len(portfolios)}", analyze)
+    prompt_chars = stage("prompt payload size", lambda: len(str(market_data)) + len(str(analyses[0])))
+    print(f"bars held: {n_tickers * len(universe.dates):,}  prompt chars for one brief: {prompt_chars:,}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=10000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--holdings", type=int, default=100000)
+    parser.add_argument("--per-portfolio", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.tickers, args.years, args.holdings, args.per_portfolio, args.seed)
@@ -0,0 +1,69 @@
+"""
+Load test for single-flight coalescing in data_ingestion.api.
+
+Fires a burst of concurrent get_market_data() calls at one shared APIAgent, the
+way the orchestrator sees the morning rush, and counts how many calls reach
+a counting stub provider with coalescing switched off and on.
+
+Usage:
+    python -m benchmarks.load_singleflight --requests 50 --latency 0.2
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import data_ingestion.api as api
+from agents.api_agent import APIAgent
+from data_ingestion.providers import MarketDataProvider
+from data_ingestion.series import HistoricalSeries
+
+class CountingProvider(MarketDataProvider):
+    name = "counting"
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _hit(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+    def get_quotes(self, tickers):
+        self._hit()
+        return {ticker: {"price": 100.0, "volume": 1000, "market_cap": 10 ** 9} for ticker in tickers}
+
+    def get_history(self, ticker, period=None, start=None, end=None):
+        self._hit()
+        return HistoricalSeries(["2025-05-01", "2025-05-28"], [95.0, 100.0], [900, 1000])
+
+def burst(n_requests, latency, coalesce):
+    provider = CountingProvider(latency)
+    api.set_provider(provider)
+    api.market_data_flight.enabled = coalesce
+    try:
+        agent = APIAgent()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_requests) as pool:
+            results = list(pool.map(lambda _: agent.get_market_data(), range(n_requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        api.set_provider(None)
+        api.market_data_flight.enabled = True
+    assert all("error" not in r for r in results)
+    return provider.calls, elapsed
+
+def run(n_requests, latency):
+    print(f"concurrent requests={n_requests} provider latency={latency * 1000:.0f}ms")
+    for coalesce in (False, True):
+        calls, elapsed = burst(n_requests, latency, coalesce)
+        label = "single-flight on " if coalesce else "single-flight off"
+        print(f"{label}: {calls:4d} upstream calls  {elapsed:6.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    run(args.requests, args.latency)
@@ -1,78 +1,309 @@
-import yfinance as yf
-import time
-from requests.exceptions import HTTPError
-
-def fetch_stock_data(ticker, retries=3, delay=5):
-    # Mock data for real-time data
-    mock_data = {
-        "TSM": {"price": 150.25, "volume": 12000000, "market_cap": 780000000000},
-        "005930.KS": {"price": 58000, "volume": 15000000, "market_cap": 390000000000000}
-    }
-    
-    for attempt in range(retries):
-        try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            price = info.get("regularMarketPrice", 0)
-            volume = info.get("regularMarketVolume", 0)
-            market_cap = info.get("marketCap", 0)
-            return {
-                "price": price,
-                "volume": volume,
-                "market_cap": market_cap
-            }
-        except HTTPError as e:
-            if "429" in str(e):
-                print(f"Rate limit hit for {ticker}. Retrying in {delay} seconds...")
-                time.sleep(delay)
-                continue
-            else:
-                print(f"Error fetching data for {ticker}: {e}")
-                return mock_data.get(ticker, {"price": 0, "volume": 0, "market_cap": 0})
-        except Exception as e:
-            print(f"Error fetching data for {ticker}: {e}")
-            return mock_data.get(ticker, {"price": 0, "volume": 0, "market_cap": 0})
-    print(f"Failed to fetch data for {ticker} after {retries} attempts. Using mock data.")
-    return mock_data.get(ticker, {"price": 0, "volume": 0, "market_cap": 0})
-
-def fetch_historical_data(ticker, period="1mo", retries=3, delay=5):
-    # Mock historical data
-    mock_historical = {
-        "TSM": {
-            "Close": {"2025-05-01": 145.0, "2025-05-28": 150.25},
-            "Volume": {"2025-05-01": 11000000, "2025-05-28": 12000000}
-        },
-        "005930.KS": {
-            "Close": {"2025-05-01": 57000, "2025-05-28": 58000},
-            "Volume": {"2025-05-01": 14000000, "2025-05-28": 15000000}
-        }
-    }
-    
-    for attempt in range(retries):
-        try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
-            return {
-                "Close": hist["Close"].to_dict(),
-                "Volume": hist["Volume"].to_dict()
-            }
-        except HTTPError as e:
-            if "429" in str(e):
-                print(f"Rate limit hit for historical data of {ticker}. Retrying in {delay} seconds...")
-                time.sleep(delay)
-                continue
-            else:
-                print(f"Failed to get historical data for {ticker}: {e}")
-                return mock_historical.get(ticker, {"Close": {}, "Volume": {}})
-        except Exception as e:
-            print(f"Failed to get historical data for {ticker}: {e}")
-            return mock_historical.get(ticker, {"Close": {}, "Volume": {}})
-    print(f"Failed to fetch historical data for {ticker} after {retries} attempts. Using mock data.")
-    return mock_historical.get(ticker, {"Close": {}, "Volume": {}})
-
-if __name__ == "__main__":
-    tickers = ["TSM", "005930.KS"]
-    real_time_data = {ticker: fetch_stock_data(ticker) for ticker in tickers}
-    historical_data = {ticker: fetch_historical_data(ticker) for ticker in tickers}
-    print("Real-time Data:", real_time_data)
-    print("Historical Data:", historical_data)
\ No newline at end of file
+import asyncio
+import time
+import numpy as np
+from requests.exceptions import HTTPError
+from data_ingestion.rate_limit import backoff_delay, get_limiter
+from data_ingestion.series import HistoricalSeries, as_series
+from data_ingestion.singleflight import SingleFlight
+from data_ingestion.providers import provider_from_env
+
+# Longest run of weekday exchange holidays (e.g. KRX around Lunar New Year or Chuseok)
+MAX_HOLIDAY_RUN = 5
+
+# Mock data for real-time data
+MOCK_REALTIME_DATA = {
+    "TSM": {"price": 150.25, "volume": 12000000, "market_cap": 780000000000},
+    "005930.KS": {"price": 58000, "volume": 15000000, "market_cap": 390000000000000}
+}
+
+# Mock historical data
+MOCK_HISTORICAL_DATA = {
+    "TSM": {
+        "Close": {"2025-05-01": 145.0, "2025-05-28": 150.25},
+        "Volume": {"2025-05-01": 11000000, "2025-05-28": 12000000}
+    },
+    "005930.KS": {
+        "Close": {"2025-05-01": 57000, "2025-05-28": 58000},
+        "Volume": {"2025-05-01": 14000000, "2025-05-28": 15000000}
+    }
+}
+
+# Concurrent identical fetches (same function, ticker and window) share one upstream call
+market_data_flight = SingleFlight()
+
+_provider = None
+
+def get_provider():
+    """
+    Return the market-data provider used by the fetchers in this module.
+    Defaults to the one selected by MARKET_DATA_PROVIDER (see providers.provider_from_env).
+    """
+    global _provider
+    if _provider is None:
+        _provider = provider_from_env()
+    return _provider
+
+def set_provider(provider):
+    """
+    Replace the market-data provider, e.g. with a ReplayProvider for offline runs.
+    Args:
+        provider (MarketDataProvider): Provider to use. None restores the environment default.
+    """
+    global _provider
+    _provider = provider
+
+def _mock_history(ticker):
+    return as_series(MOCK_HISTORICAL_DATA.get(ticker))
+
+@market_data_flight.coalesce
+def fetch_stock_data(ticker, retries=3, delay=5):
+    mock_data = MOCK_REALTIME_DATA
+
+    for attempt in range(retries):
+        try:
+            return get_provider().get_quote(ticker)
+        except HTTPError as e:
+            if "429" in str(e):
+                print(f"Rate limit hit for {ticker}. Retrying in {delay} seconds...")
+                time.sleep(delay)
+                continue
+            else:
+                print(f"Error fetching data for {ticker}: {e}")
+                return mock_data.get(ticker, {"price": 0, "volume": 0, "market_cap": 0})
+        except Exception as e:
+            print(f"Error fetching data for {ticker}: {e}")
+            return mock_data.get(ticker, {"price": 0, "volume": 0, "market_cap": 0})
+    print(f"Failed to fetch data for {ticker} after {retries} attempts. Using mock data.")
+    return mock_data.get(ticker, {"price": 0, "volume": 0, "market_cap": 0})
+
+@market_data_flight.coalesce
+def fetch_stock_data_bulk(tickers, chunk_size=200, retries=3, delay=5):
+    """
+    Fetch real-time data for many tickers with one provider call per chunk
+    instead of one round trip per ticker.
+    Args:
+        tickers (list): List of ticker symbols (e.g., ['TSM', '005930.KS']).
+        chunk_size (int): Maximum number of symbols per provider call.
+        retries (int): Attempts per chunk when rate limited.
+        delay (int): Seconds to wait after a 429 before retrying.
+    Returns:
+        dict: Quote per ticker, same shape as fetch_stock_data. The yfinance provider reports
+        market_cap as None here: its bulk download has no market cap, and looking it up would
+        cost a request per ticker.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    results = {}
+
+    for start in range(0, len(tickers), chunk_size):
+        chunk = tickers[start:start + chunk_size]
+        quotes = {}
+        for attempt in range(retries):
+            try:
+                quotes = get_provider().get_quotes(chunk)
+                break
+            except HTTPError as e:
+                if "429" in str(e):
+                    print(f"Rate limit hit for {len(chunk)} tickers. Retrying in {delay} seconds...")
+                    time.sleep(delay)
+                    continue
+                print(f"Error fetching bulk data for {chunk}: {e}")
+                break
+            except Exception as e:
+                print(f"Error fetching bulk data for {chunk}: {e}")
+                break
+
+        for ticker in chunk:
+            quote = quotes.get(ticker)
+            if quote is None:
+                print(f"No bulk quote for {ticker}. Using mock data.")
+                quote = MOCK_REALTIME_DATA.get(ticker, {"price": 0, "volume": 0, "market_cap": 0})
+            results[ticker] = quote
+
+    return results
+
+@market_data_flight.coalesce
+def fetch_historical_data(ticker, period="1mo", retries=3, delay=5):
+    for attempt in range(retries):
+        try:
+            return get_provider().get_history(ticker, period=period)
+        except HTTPError as e:
+            if "429" in str(e):
+                print(f"Rate limit hit for historical data of {ticker}. Retrying in {delay} seconds...")
+                time.sleep(delay)
+                continue
+            else:
+                print(f"Failed to get historical data for {ticker}: {e}")
+                return _mock_history(ticker)
+        except Exception as e:
+            print(f"Failed to get historical data for {ticker}: {e}")
+            return _mock_history(ticker)
+    print(f"Failed to fetch historical data for {ticker} after {retries} attempts. Using mock data.")
+    return _mock_history(ticker)
+
+@market_data_flight.coalesce
+def fetch_historical_data_incremental(ticker, store, lookback_days=30, retries=3, delay=5):
+    """
+    Serve daily history from the local price store, fetching only the bars it is missing.
+    Args:
+        ticker (str): Ticker symbol.
+        store (PriceStore): Local columnar store of daily bars.
+        lookback_days (int): Calendar days of history to return.
+        retries (int): Attempts per missing range when rate limited.
+        delay (int): Seconds to wait after a 429 before retrying.
+    Returns:
+        HistoricalSeries: Daily bars inside the lookback window.
+    """
+    # Only completed sessions are stored; today's bar comes from the realtime quote
+    today = np.datetime64("today", "D")
+    start = today - np.timedelta64(lookback_days, "D")
+    coverage = store.coverage(ticker)
+    if coverage is None:
+        gaps = [(start, today)]
+    else:
+        covered_from, covered_to = coverage
+        gaps = []
+        if start < covered_from:
+            gaps.append((start, covered_from))
+        if np.busday_count(covered_to + np.timedelta64(1, "D"), today) > 0:
+            gaps.append((covered_to + np.timedelta64(1, "D"), today))
+
+    for gap_start, gap_end in gaps:
+        for attempt in range(retries):
+            try:
+                series = get_provider().get_history(ticker, start=str(gap_start), end=str(gap_end))
+                sessions = np.busday_count(gap_start, gap_end)
+                # gap_end is exclusive: before today means the gap's last day is older than yesterday
+                settled = gap_end < today
+                if len(series.dates) == 0 and sessions > 0 and not (settled and sessions <= MAX_HOLIDAY_RUN):
+                    # yfinance answers errors with an empty frame: leave the gap open to retry next time.
+                    # A short gap that ended before yesterday is taken to be exchange holidays and closed.
+                    print(f"No bars returned for {ticker} between {gap_start} and {gap_end}; will retry.")
+                    break
+                store.append(
+                    ticker,
+                    series.dates,
+                    {"Close": series.close, "Volume": series.volume},
+                    covered_from=gap_start,
+                    covered_to=gap_end - np.timedelta64(1, "D")
+                )
+                break
+            except HTTPError as e:
+                if "429" in str(e):
+                    print(f"Rate limit hit for historical data of {ticker}. Retrying in {delay} seconds...")
+                    time.sleep(delay)
+                    continue
+                print(f"Failed to get historical data for {ticker}: {e}")
+                break
+            except Exception as e:
+                print(f"Failed to get historical data for {ticker}: {e}")
+                break
+
+    bars = store.window(ticker, lookback_days)
+    if bars is None or len(bars["dates"]) == 0:
+        print(f"No stored history for {ticker}. Using mock data.")
+        return _mock_history(ticker)
+    return HistoricalSeries(bars["dates"], bars["Close"], bars["Volume"])
+
+@market_data_flight.coalesce
+async def fetch_stock_data_async(ticker, limiter=None, retries=3, base_delay=1.0, max_delay=30.0):
+    """
+    Async variant of fetch_stock_data that never blocks the event loop.
+    Args:
+        ticker (str): Ticker symbol.
+        limiter (TokenBucket): Shared provider limiter. Defaults to the 'yahoo' limiter.
+        retries (int): Attempts before falling back to mock data.
+        base_delay (float): Backoff ceiling for the first retry in seconds.
+        max_delay (float): Upper bound for the backoff ceiling in seconds.
+    Returns:
+        dict: Quote with price, volume and market_cap.
+    """
+    limiter = limiter or get_limiter("yahoo")
+    fallback = MOCK_REALTIME_DATA.get(ticker, {"price": 0, "volume": 0, "market_cap": 0})
+
+    for attempt in range(retries):
+        await limiter.acquire()
+        try:
+            return await asyncio.to_thread(get_provider().get_quote, ticker)
+        except HTTPError as e:
+            if "429" in str(e):
+                wait = backoff_delay(attempt, base_delay, max_delay)
+                print(f"Rate limit hit for {ticker}. Backing off {wait:.1f} seconds...")
+                limiter.pause(wait)
+                continue
+            print(f"Error fetching data for {ticker}: {e}")
+            return fallback
+        except Exception as e:
+            print(f"Error fetching data for {ticker}: {e}")
+            return fallback
+    print(f"Failed to fetch data for {ticker} after {retries} attempts. Using mock data.")
+    return fallback
+
+@market_data_flight.coalesce
+async def fetch_historical_data_async(ticker, period="1mo", limiter=None, retries=3, base_delay=1.0, max_delay=30.0):
+    """
+    Async variant of fetch_historical_data that never blocks the event loop.
+    Args:
+        ticker (str): Ticker symbol.
+        period (str): yfinance history period (e.g., '1mo').
+        limiter (TokenBucket): Shared provider limiter. Defaults to the 'yahoo' limiter.
+        retries (int): Attempts before falling back to mock data.
+        base_delay (float): Backoff ceiling for the first retry in seconds.
+        max_delay (float): Upper bound for the backoff ceiling in seconds.
+    Returns:
+        HistoricalSeries: Daily bars for the period.
+    """
+    limiter = limiter or get_limiter("yahoo")
+    fallback = _mock_history(ticker)
+
+    for attempt in range(retries):
+        await limiter.acquire()
+        try:
+            return await asyncio.to_thread(get_provider().get_history, ticker, period=period)
+        except HTTPError as e:
+            if "429" in str(e):
+                wait = backoff_delay(attempt, base_delay, max_delay)
+                print(f"Rate limit hit for historical data of {ticker}. Backing off {wait:.1f} seconds...")
+                limiter.pause(wait)
+                continue
+            print(f"Failed to get historical data for {ticker}: {e}")
+            return fallback
+        except Exception as e:
+            print(f"Failed to get historical data for {ticker}: {e}")
+            return fallback
+    print(f"Failed to fetch historical data for {ticker} after {retries} attempts. Using mock data.")
+    return fallback
+
+async def fetch_market_data_async(tickers, period="1mo", concurrency=8, limiter=None):
+    """
+    Fetch real-time and historical data for many tickers concurrently.
+    Args:
+        tickers (list): List of ticker symbols.
+        period (str): yfinance history period for the historical leg.
+        concurrency (int): Maximum number of provider calls in flight.
+        limiter (TokenBucket): Shared provider limiter. Defaults to the 'yahoo' limiter.
+    Returns:
+        dict: {"realtime": {ticker: quote}, "historical": {ticker: HistoricalSeries}}.
+    """
+    limiter = limiter or get_limiter("yahoo")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+
+    tickers = list(dict.fromkeys(tickers))
+    results = await asyncio.gather(
+        *(bounded(fetch_stock_data_async(t, limiter)) for t in tickers),
+        *(bounded(fetch_historical_data_async(t, period, limiter)) for t in tickers)
+    )
+    return {
+        "realtime": dict(zip(tickers, results[:len(tickers)])),
+        "historical": dict(zip(tickers, results[len(tickers):]))
+    }
+
+if __name__ == "__main__":
+    tickers = ["TSM", "005930.KS"]
+    real_time_data = fetch_stock_data_bulk(tickers)
+    historical_data = {ticker: fetch_historical_data(ticker) for ticker in tickers}
+    print("Real-time Data:", real_time_data)
+    print("Historical Data:", {ticker: series.to_dict() for ticker, series in historical_data.items()})
\ No newline at end of file
@@ -0,0 +1,86 @@
+import re
+from collections import deque
+from itertools import islice
+from langchain.docstore.document import Document
+from data_ingestion.dedupe import content_hash
+
+# Word pieces and punctuation, a close (slightly low) proxy for the embedder's
+# WordPiece count; all-MiniLM-L6-v2 truncates at 256 word pieces.
+_TOKEN = re.compile(r'\w+|[^\w\s]')
+
+DEFAULT_CHUNK_TOKENS = 200
+DEFAULT_CHUNK_OVERLAP = 40
+
+def chunk_document(doc, max_tokens=DEFAULT_CHUNK_TOKENS, overlap=DEFAULT_CHUNK_OVERLAP):
+    """
+    Split one document into overlapping chunks of at most max_tokens tokens.
+    Tokens are scanned lazily and only the current window is held, so a very long
+    filing never has its full token list in memory.
+    Args:
+        doc (Document): Document to split.
+        max_tokens (int): Tokens per chunk.
+        overlap (int): Tokens shared by consecutive chunks.
+    Yields:
+        Document: Chunks carrying the parent's metadata plus parent_id (content hash of
+        the parent text), chunk_index and the chunk's char_start/char_end in the parent.
+    """
+    if not 0 <= overlap < max_tokens:
+        raise ValueError("overlap must be at least 0 and smaller than max_tokens")
+    text = doc.page_content
+    parent_id = content_hash(text)
+    window = deque()
+    index = 0
+
+    def emit():
+        start, end = window[0][0], window[-1][1]
+        metadata = {**doc.metadata, "parent_id": parent_id, "chunk_index": index, "char_start": start, "char_end": end}
+        return Document(page_content=text[start:end], metadata=metadata)
+
+    # Tokens added since the last chunk; a trailing chunk is only needed if this is non-zero
+    fresh = 0
+    for match in _TOKEN.finditer(text):
+        window.append(match.span())
+        fresh += 1
+        if len(window) == max_tokens:
+            yield emit()
+            index += 1
+            for _ in range(max_tokens - overlap):
+                window.popleft()
+            fresh = 0
+    if window and (fresh or index == 0):
+        yield emit()
+
+def chunk_documents(documents, max_tokens=DEFAULT_CHUNK_TOKENS, overlap=DEFAULT_CHUNK_OVERLAP):
+    """
+    Lazily chunk a stream of documents.
+    Args:
+        documents (iterable): Document objects, consumed one at a time.
+        max_tokens (int): Tokens per chunk.
+        overlap (int): Tokens shared by consecutive chunks.
+    Yields:
+        Document: Chunks in document order.
+    """
+    for doc in documents:
+        yield from chunk_document(doc, max_tokens, overlap)
+
+def batched(iterable, size):
+    """
+    Group a stream into lists of up to size items without reading ahead further.
+    Args:
+        iterable (iterable): Items to group.
+        size (int): Maximum batch size.
+    Yields:
+        list: Consecutive batches.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+if __name__ == "__main__":
+    # Example usage
+    filing = Document(page_content=" ".join(f"word{i}" for i in range(450)), metadata={"source": "10-K.pdf", "page": 3})
+    for chunk in chunk_documents([filing]):
+        print(chunk.metadata["chunk_index"], chunk.metadata["char_start"], chunk.metadata["char_end"], len(chunk.page_content))
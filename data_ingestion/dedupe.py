@@ -0,0 +1,222 @@
+import hashlib
+import re
+import zlib
+import numpy as np
+
+_WHITESPACE = re.compile(r'\s+')
+
+DEFAULT_NEAR_DUPLICATE_THRESHOLD = 0.8
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+def normalize_text(text):
+    """
+    Normalize text for content addressing: case-folded with whitespace collapsed.
+    Args:
+        text (str): Raw document or headline text.
+    Returns:
+        str: Normalized text.
+    """
+    return _WHITESPACE.sub(' ', text).strip().casefold()
+
+def content_hash(text):
+    """
+    Content address of a text, stable across whitespace and case differences.
+    Args:
+        text (str): Raw document or headline text.
+    Returns:
+        str: Hex SHA-256 of the normalized text.
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+def split_new(documents, seen):
+    """
+    Split documents into those whose content is not yet in seen and the rest.
+    Duplicates within documents are also dropped, keeping the first occurrence.
+    Args:
+        documents (list): LangChain Document objects.
+        seen (set): Content hashes already indexed. Not modified.
+    Returns:
+        tuple: (new documents, their content hashes, number of skipped duplicates).
+    """
+    new_docs, new_hashes = [], []
+    batch = set()
+    for doc in documents:
+        digest = content_hash(doc.page_content)
+        if digest in seen or digest in batch:
+            continue
+        batch.add(digest)
+        new_docs.append(doc)
+        new_hashes.append(digest)
+    return new_docs, new_hashes, len(documents) - len(new_docs)
+
+def _bands_for(threshold, num_perm):
+    # LSH bands x rows = num_perm; candidates appear around similarity (1/bands)^(1/rows),
+    # so pick the split whose curve crosses closest to the threshold, erring low
+    # (more candidates to verify, fewer missed duplicates)
+    splits = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    return min(splits, key=lambda split: abs((1 / split[0]) ** (1 / split[1]) - threshold * 0.95))
+
+class NearDuplicateFilter:
+    """
+    MinHash/LSH filter that drops documents nearly identical to one already kept.
+
+    Each document becomes a MinHash signature over character 5-gram shingles of its
+    normalized text. Banded LSH finds earlier documents that may be similar, and
+    a document is dropped if its estimated Jaccard similarity to any of them reaches
+    the threshold. Only signatures are kept (num_perm x 8 bytes per document).
+    """
+
+    def __init__(self, threshold=DEFAULT_NEAR_DUPLICATE_THRESHOLD, num_perm=128, shingle_size=5, seed=1):
+        """
+        Args:
+            threshold (float): Estimated Jaccard similarity at or above which a document is a near-duplicate.
+            num_perm (int): Hash permutations per signature; more is more accurate and slower.
+            shingle_size (int): Characters per shingle.
+            seed (int): Seed for the permutation parameters.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        # crc32 shingle hashes are < 2**32, so a * x + b stays within uint64
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.bands, self.rows = _bands_for(threshold, num_perm)
+        self._buckets = [{} for _ in range(self.bands)]
+        # Positions in _signatures are never reused; a discarded document leaves None behind
+        self._signatures = []
+        self._ids = []
+        self._position_of = {}
+        # Restored (signatures, ids) not yet placed in buckets (see restore)
+        self._pending = []
+        self.kept = 0
+        self.dropped = 0
+
+    def signature(self, text):
+        """
+        MinHash signature of a text.
+        Args:
+            text (str): Document text.
+        Returns:
+            np.ndarray: uint64 array of num_perm minimum hashes.
+        """
+        text = normalize_text(text)
+        k = self.shingle_size
+        shingles = {text[i:i + k] for i in range(max(len(text) - k + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME).min(axis=0)
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _keep(self, signature, keys, doc_id):
+        position = len(self._signatures)
+        self._signatures.append(signature)
+        self._ids.append(doc_id)
+        if doc_id is not None:
+            self._position_of[doc_id] = position
+        for bucket, key in zip(self._buckets, keys):
+            bucket.setdefault(key, []).append(position)
+        self.kept += 1
+
+    def _bucket_pending(self):
+        for signatures, ids in self._pending:
+            for signature, doc_id in zip(signatures, ids):
+                self._keep(signature, self._band_keys(signature), doc_id)
+        self._pending = []
+
+    def discard(self, ids):
+        """
+        Forget kept documents, so later documents are no longer compared against them.
+        Args:
+            ids (iterable): Ids the documents were kept under (see is_duplicate).
+        Returns:
+            int: Number of documents forgotten.
+        """
+        self._bucket_pending()
+        discarded = 0
+        for doc_id in ids:
+            position = self._position_of.pop(doc_id, None)
+            if position is not None:
+                self._signatures[position] = None
+                self._ids[position] = None
+                discarded += 1
+        self.kept -= discarded
+        return discarded
+
+    def signatures(self):
+        """
+        Signatures of every kept document, for persisting alongside the index.
+        Returns:
+            tuple: (uint64 array of shape (kept, num_perm), list of the matching ids, None where unset).
+        """
+        self._bucket_pending()
+        live = [position for position, signature in enumerate(self._signatures) if signature is not None]
+        signatures = np.array([self._signatures[position] for position in live], dtype=np.uint64)
+        return signatures.reshape(-1, self.num_perm), [self._ids[position] for position in live]
+
+    def restore(self, signatures, ids=None):
+        """
+        Treat documents with these signatures (from signatures()) as already kept.
+        Bucketing is deferred to the next check, so restoring a large index is instant.
+        Args:
+            signatures (np.ndarray): uint64 array of shape (n, num_perm), made with the same settings.
+            ids (list): Id of each signature, so the documents can be discarded later.
+        """
+        if signatures.shape[1:] != (self.num_perm,):
+            raise ValueError("signatures were made with a different num_perm")
+        self._pending.append((signatures, ids if ids is not None else [None] * len(signatures)))
+
+    def is_duplicate(self, text, add=True, doc_id=None, ignore=()):
+        """
+        Check a text against everything kept so far.
+        Args:
+            text (str): Document text.
+            add (bool): Remember the text as kept if it is not a duplicate.
+            doc_id (str): Id to keep the text under, so it can be discarded later.
+            ignore (set): Ids of kept documents not to compare against, e.g. ones being replaced.
+        Returns:
+            bool: True if a kept document reaches the similarity threshold.
+        """
+        self._bucket_pending()
+        signature = self.signature(text)
+        keys = self._band_keys(signature)
+        candidates = set()
+        for bucket, key in zip(self._buckets, keys):
+            candidates.update(bucket.get(key, ()))
+        for candidate in candidates:
+            kept = self._signatures[candidate]
+            if kept is None or (ignore and self._ids[candidate] in ignore):
+                continue
+            if np.mean(kept == signature) >= self.threshold:
+                self.dropped += 1
+                return True
+        if add:
+            self._keep(signature, keys, doc_id)
+        return False
+
+    def filter(self, documents):
+        """
+        Lazily drop near-duplicates from a document stream.
+        Args:
+            documents (iterable): Document objects.
+        Yields:
+            Document: Documents not nearly identical to one kept earlier (in this or a previous call).
+        """
+        for doc in documents:
+            if not self.is_duplicate(doc.page_content):
+                yield doc
+
+if __name__ == "__main__":
+    # Example usage
+    print(content_hash("TSMC  beat estimates by 4%") == content_hash("tsmc beat estimates by 4%"))
+    near = NearDuplicateFilter()
+    headlines = [
+        "TSMC beats Q2 earnings estimates by 4% on strong AI chip demand",
+        "TSMC beats Q2 earnings estimates by 4% on strong AI chip demand - Reuters",
+        "Samsung misses estimates by 2% as memory prices slide",
+    ]
+    print([near.is_duplicate(headline) for headline in headlines], "dropped:", near.dropped)
@@ -1,67 +1,280 @@
-from langchain.docstore.document import Document
-from datetime import datetime
-import os
-
-def load_documents(source_dir="data_ingestion/mock_data"):
-    """
-    Load documents from a directory or mock data for RAG.
-    Args:
-        source_dir (str): Directory containing text files or mock data.
-    Returns:
-        list: List of LangChain Document objects.
-    """
-    documents = []
-    
-    # Mock data for demo (replace with file loading in production)
-    mock_data = [
-        {
-            "content": "TSMC reported a 4% earnings beat for Q2 2025.",
-            "metadata": {"source": "earnings", "ticker": "TSM", "date": str(datetime.now())},
-        },
-        {
-            "content": "Samsung missed earnings estimates by 2% due to supply chain issues.",
-            "metadata": {"source": "earnings", "ticker": "005930.KS", "date": str(datetime.now())},
-        },
-        {
-            "content": "Asia tech sentiment is neutral with a cautionary tilt due to rising yields.",
-            "metadata": {"source": "market", "ticker": "general", "date": str(datetime.now())},
-        },
-    ]
-    
-    # Convert mock data to LangChain Documents
-    for item in mock_data:
-        doc = Document(page_content=item["content"], metadata=item["metadata"])
-        documents.append(doc)
-    
-    # In production, load from files
-    if os.path.exists(source_dir):
-        for filename in os.listdir(source_dir):
-            if filename.endswith(".txt"):
-                with open(os.path.join(source_dir, filename), 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    metadata = {"source": filename, "date": str(datetime.now())}
-                    documents.append(Document(page_content=content, metadata=metadata))
-    
-    return documents
-
-def process_documents(documents):
-    """
-    Process documents for RAG (e.g., clean text, add metadata).
-    Args:
-        documents (list): List of LangChain Document objects.
-    Returns:
-        list: Processed Document objects.
-    """
-    processed_docs = []
-    for doc in documents:
-        # Clean text (remove extra whitespace)
-        cleaned_content = ' '.join(doc.page_content.split())
-        processed_docs.append(Document(page_content=cleaned_content, metadata=doc.metadata))
-    return processed_docs
-
-if __name__ == "__main__":
-    # Example usage
-    docs = load_documents()
-    processed_docs = process_documents(docs)
-    for doc in processed_docs:
+from langchain.docstore.document import Document
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+import hashlib
+import json
+import os
+import threading
+
+DOCUMENT_EXTENSIONS = (".txt", ".pdf")
+
+# PDF pages handed to each worker process at a time; one task opens the file once
+PDF_PAGES_PER_TASK = 8
+
+class DocumentManifest:
+    """
+    Record of the source files already loaded: path -> size, mtime and content hash.
+
+    load_documents consults it to read only files that are new or changed since the
+    last load. Files whose size and mtime are unchanged are not opened at all; files
+    that were touched but hash the same are not returned again. Files read, and files
+    found missing, are only staged; call save() once their documents have been indexed
+    (or removed), so a failed index run reads them again and still sees the deletions.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): JSON file to persist the manifest in. None keeps it in memory only.
+        """
+        self.path = path
+        self.entries = {}
+        self._staged = {}
+        self._missing = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def is_unchanged(self, path, stat):
+        entry = self.entries.get(path)
+        return entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+
+    def same_content(self, path, content_hash):
+        entry = self.entries.get(path)
+        return entry is not None and entry["sha256"] == content_hash
+
+    def record(self, path, stat, content_hash):
+        with self._lock:
+            self._staged[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": content_hash}
+
+    def forget_missing(self, paths):
+        """
+        Stage the removal of entries for files no longer present; save() applies it.
+        Args:
+            paths (set): Paths currently on disk.
+        Returns:
+            list: Paths staged for removal.
+        """
+        with self._lock:
+            self._missing = {path for path in self.entries if path not in paths}
+            return sorted(self._missing)
+
+    def missing(self):
+        """
+        Returns:
+            list: Paths found missing by the last scan and not yet removed by save().
+        """
+        with self._lock:
+            return sorted(self._missing)
+
+    def save(self):
+        """Commit the files staged and removed since the last save and write the manifest atomically."""
+        with self._lock:
+            for path in self._missing:
+                self.entries.pop(path, None)
+            self._missing = set()
+            self.entries.update(self._staged)
+            self._staged.clear()
+        if not self.path:
+            return
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self._lock, open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+def _file_metadata(path, stat):
+    return {
+        "source": os.path.basename(path),
+        "path": path,
+        "date": str(datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc))
+    }
+
+def _read_text_file(path, stat, manifest):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    content_hash = hashlib.sha256(raw).hexdigest()
+    if manifest is not None:
+        unchanged = manifest.same_content(path, content_hash)
+        manifest.record(path, stat, content_hash)
+        if unchanged:
+            return None
+    return Document(page_content=raw.decode('utf-8'), metadata=_file_metadata(path, stat))
+
+def _extract_pdf_pages(path, start, stop):
+    # Runs in a worker process: open the file once and extract a run of pages
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    return [reader.pages[number].extract_text() or "" for number in range(start, stop)]
+
+def iter_pdf_documents(path, max_workers=None, pages_per_task=PDF_PAGES_PER_TASK):
+    """
+    Extract a PDF page by page across a process pool, yielding one Document per page in order.
+    Args:
+        path (str): PDF file.
+        max_workers (int): Worker processes. Defaults to the CPU count; small files stay in-process.
+        pages_per_task (int): Consecutive pages extracted per task.
+    Yields:
+        Document: Page text with source, page (1-based), total_pages and date metadata.
+        Pages without extractable text are skipped.
+    """
+    from pypdf import PdfReader
+    stat = os.stat(path)
+    total = len(PdfReader(path).pages)
+    ranges = [(start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task)]
+    workers = min(max_workers or os.cpu_count() or 1, len(ranges))
+
+    def emit(start, texts):
+        for offset, text in enumerate(texts):
+            if not text.strip():
+                continue  # Scanned or blank page: nothing to index
+            metadata = {**_file_metadata(path, stat), "page": start + offset + 1, "total_pages": total}
+            yield Document(page_content=text, metadata=metadata)
+
+    if workers <= 1:
+        for start, stop in ranges:
+            yield from emit(start, _extract_pdf_pages(path, start, stop))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() keeps page order while later ranges are still being extracted
+        batches = pool.map(_extract_pdf_pages, [path] * len(ranges), *zip(*ranges))
+        for (start, _), texts in zip(ranges, batches):
+            yield from emit(start, texts)
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _scan(source):
+    # A single file, or the supported files directly inside a directory
+    if os.path.isfile(source):
+        if source.lower().endswith(DOCUMENT_EXTENSIONS):
+            yield source, os.stat(source)
+        return
+    if os.path.isdir(source):
+        with os.scandir(source) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.name.lower().endswith(DOCUMENT_EXTENSIONS) and entry.is_file():
+                    yield entry.path, entry.stat()
+
+def _bounded_map(pool, fn, items, window):
+    # Like pool.map, but only `window` results are ever pending, so a slow consumer
+    # doesn't end up with the whole directory read into memory
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def iter_documents(source_dir="data_ingestion/mock_data", manifest=None, max_workers=8, pdf_workers=None, include_mock=True):
+    """
+    Lazily load documents from a directory or mock data for RAG, one at a time.
+    Args:
+        source_dir (str): Directory containing .txt/.pdf files, or a single such file.
+        manifest (DocumentManifest): If given, only files new or changed since the manifest
+            was last updated are read and yielded, and the manifest is updated as they are.
+        max_workers (int): Text files read concurrently (at most 2x this many held ahead).
+        pdf_workers (int): Processes extracting PDF pages. Defaults to the CPU count.
+        include_mock (bool): Yield the built-in demo documents first.
+    Yields:
+        Document: Mock documents, then text files, then PDF pages.
+    """
+    # Mock data for demo (replace with file loading in production)
+    mock_data = [
+        {
+            "content": "TSMC reported a 4% earnings beat for Q2 2025.",
+            "metadata": {"source": "earnings", "ticker": "TSM", "date": str(datetime.now())},
+        },
+        {
+            "content": "Samsung missed earnings estimates by 2% due to supply chain issues.",
+            "metadata": {"source": "earnings", "ticker": "005930.KS", "date": str(datetime.now())},
+        },
+        {
+            "content": "Asia tech sentiment is neutral with a cautionary tilt due to rising yields.",
+            "metadata": {"source": "market", "ticker": "general", "date": str(datetime.now())},
+        },
+    ]
+
+    # Convert mock data to LangChain Documents
+    for item in (mock_data if include_mock else []):
+        yield Document(page_content=item["content"], metadata=item["metadata"])
+
+    # In production, load from files
+    texts, pdfs = [], []
+    present = set()
+    for path, stat in _scan(source_dir):
+        present.add(path)
+        # Size and mtime unchanged: skip without opening the file
+        if manifest is not None and manifest.is_unchanged(path, stat):
+            continue
+        (pdfs if path.lower().endswith(".pdf") else texts).append((path, stat))
+    if manifest is not None:
+        manifest.forget_missing(present)
+
+    def read(item):
+        return _read_text_file(*item, manifest)
+
+    if len(texts) > 1 and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(texts)), thread_name_prefix="loader") as pool:
+            for doc in _bounded_map(pool, read, texts, 2 * max_workers):
+                if doc is not None:
+                    yield doc
+    else:
+        for item in texts:
+            doc = read(item)
+            if doc is not None:
+                yield doc
+
+    for path, stat in pdfs:
+        content_hash = _file_hash(path) if manifest is not None else None
+        if manifest is not None and manifest.same_content(path, content_hash):
+            manifest.record(path, stat, content_hash)
+            continue
+        try:
+            yield from iter_pdf_documents(path, pdf_workers)
+        except Exception as e:
+            print(f"Error extracting {path}: {e}")
+            continue
+        if manifest is not None:
+            manifest.record(path, stat, content_hash)
+
+def load_documents(source_dir="data_ingestion/mock_data", manifest=None, max_workers=8, pdf_workers=None):
+    """
+    Load documents from a directory or mock data for RAG.
+    Args:
+        source_dir (str): Directory containing .txt/.pdf files, or a single such file.
+        manifest (DocumentManifest): If given, only files new or changed since the manifest
+            was last updated are read and returned, and the manifest is updated in place.
+        max_workers (int): Text files read concurrently.
+        pdf_workers (int): Processes extracting PDF pages. Defaults to the CPU count.
+    Returns:
+        list: List of LangChain Document objects. Prefer iter_documents when indexing.
+    """
+    return list(iter_documents(source_dir, manifest, max_workers, pdf_workers))
+
+def process_documents(documents):
+    """
+    Process documents for RAG (e.g., clean text, add metadata), one at a time.
+    Text is normalized in place on the given Document objects; nothing is copied.
+    Args:
+        documents (iterable): LangChain Document objects.
+    Yields:
+        Document: The same objects, with whitespace collapsed.
+    """
+    for doc in documents:
+        # Clean text (remove extra whitespace)
+        doc.page_content = ' '.join(doc.page_content.split())
+        yield doc
+
+if __name__ == "__main__":
+    # Example usage
+    for doc in process_documents(iter_documents()):
         print(f"Content: {doc.page_content}, Metadata: {doc.metadata}")
\ No newline at end of file
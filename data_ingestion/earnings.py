@@ -0,0 +1,94 @@
+import re
+from typing import Dict, NamedTuple, Optional
+
+_BEAT = re.compile(r'\b(beat|beats|tops|topped|exceed(?:s|ed)?|surpass(?:es|ed)?|above)\b')
+_MISS = re.compile(r'\b(miss|missed|misses|falls? short|fell short|below|trails?|trailed)\b')
+_INLINE = re.compile(r'\b(in line|inline|meets|met|matches|matched)\b')
+_PERCENT = re.compile(r'(\d+(?:\.\d+)?)\s*(?:%|percent\b|pct\b)')
+_QUARTER = re.compile(r"\b(?:q([1-4])|([1-4])q|(first|second|third|fourth)[- ]quarter)(?:\s*(?:fy|of)?\s*'?(\d{4}|\d{2}))?\b")
+_FISCAL_YEAR = re.compile(r"\b(?:fy\s*'?(\d{4}|\d{2})|(full[- ]year|annual))\b")
+_ORDINALS = {"first": "1", "second": "2", "third": "3", "fourth": "4"}
+
+class EarningsEvent(NamedTuple):
+    """
+    Earnings result parsed out of one headline.
+
+    surprise_pct is signed: positive for a beat, negative for a miss, None when
+    the headline carries no percentage.
+    """
+    ticker: str
+    period: Optional[str]
+    direction: Optional[str]
+    surprise_pct: Optional[float]
+
+def _year(text):
+    if text is None:
+        return None
+    return text if len(text) == 4 else f"20{text}"
+
+def _period(text):
+    match = _QUARTER.search(text)
+    if match:
+        quarter = match.group(1) or match.group(2) or _ORDINALS[match.group(3)]
+        year = _year(match.group(4))
+        return f"Q{quarter} {year}" if year else f"Q{quarter}"
+    match = _FISCAL_YEAR.search(text)
+    if match:
+        year = _year(match.group(1))
+        return f"FY{year}" if year else "FY"
+    return None
+
+def _direction(text):
+    # Earliest verb wins so "beat ... but guidance fell short" reads as a beat
+    found = [
+        (match.start(), direction)
+        for direction, pattern in (("beat", _BEAT), ("miss", _MISS), ("inline", _INLINE))
+        for match in [pattern.search(text)] if match
+    ]
+    return min(found)[1] if found else None
+
+def parse_earnings_headline(ticker, text):
+    """
+    Parse a single cleaned headline into an EarningsEvent.
+    Args:
+        ticker (str): Ticker the headline belongs to.
+        text (str): Headline text, as produced by clean_earnings_data.
+    Returns:
+        EarningsEvent: Parsed record; fields that cannot be found are None.
+    """
+    text = text.lower()
+    direction = _direction(text)
+    surprise = None
+    if direction == "inline":
+        surprise = 0.0
+    elif direction is not None:
+        match = _PERCENT.search(text)
+        if match:
+            surprise = float(match.group(1))
+            if direction == "miss":
+                surprise = -surprise
+    return EarningsEvent(ticker, _period(text), direction, surprise)
+
+def extract_earnings_events(earnings_data):
+    """
+    Parse every cleaned headline into structured earnings records.
+    Args:
+        earnings_data (dict): Ticker -> cleaned headline, e.g. from clean_earnings_data.
+    Returns:
+        dict: Ticker -> EarningsEvent for every ticker in earnings_data.
+    """
+    return {
+        ticker: parse_earnings_headline(ticker, text)
+        for ticker, text in earnings_data.items()
+        if isinstance(text, str)
+    }
+
+if __name__ == "__main__":
+    # Example usage
+    headlines = {
+        "TSM": "tsmc q2 2025 earnings beat estimates by 4%",
+        "005930.KS": "samsung second-quarter profit missed estimates by 2.5 percent",
+        "AAPL": "No recent earnings news for AAPL"
+    }
+    for event in extract_earnings_events(headlines).values():
+        print("Earnings Event:", event)
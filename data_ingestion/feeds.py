@@ -0,0 +1,207 @@
+import io
+import json
+import hashlib
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import NamedTuple, Optional
+from data_ingestion.http_cache import get_response_cache
+from data_ingestion.politeness import INTERACTIVE, get_scheduler
+from data_ingestion.scraper import DEFAULT_TIMEOUT, fetch_page, make_session
+
+# Per-ticker headline feed; {ticker} is substituted
+DEFAULT_FEED_URL = "https://feeds.finance.yahoo.com/rss/2.0/headline?s={ticker}&region=US&lang=en-US"
+
+class FeedItem(NamedTuple):
+    """One RSS item or Atom entry. published is an ISO-8601 UTC string when the feed dates it."""
+    guid: str
+    title: str
+    link: Optional[str]
+    published: Optional[str]
+
+def _local(tag):
+    # "{http://www.w3.org/2005/Atom}entry" -> "entry"
+    return tag.rsplit('}', 1)[-1]
+
+def _parse_date(text):
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        stamp = parsedate_to_datetime(text)  # RSS: RFC 822
+    except (TypeError, ValueError):
+        try:
+            stamp = datetime.fromisoformat(text.replace('Z', '+00:00'))  # Atom: RFC 3339
+        except ValueError:
+            return None
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return stamp.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def _item(elem):
+    fields = {}
+    link = None
+    for child in elem:
+        name = _local(child.tag)
+        if name == 'link':
+            # Atom puts the URL in href, RSS in the element text
+            if link is None or child.get('rel', 'alternate') == 'alternate':
+                link = child.get('href') or (child.text or '').strip() or link
+        elif name in ('title', 'guid', 'id', 'pubDate', 'published', 'updated') and name not in fields:
+            fields[name] = (child.text or '').strip()
+    published = _parse_date(fields.get('pubDate') or fields.get('published') or fields.get('updated'))
+    title = fields.get('title', '')
+    guid = fields.get('guid') or fields.get('id') or link or title
+    return FeedItem(guid, title, link, published)
+
+def iter_feed_items(source):
+    """
+    Stream items from an RSS 2.0 or Atom document without building the whole tree.
+    Args:
+        source (bytes, str or file): Feed body, or a file object to read from.
+    Yields:
+        FeedItem: Items in document order (newest first for most feeds).
+    """
+    if isinstance(source, str):
+        # Already decoded: expat ignores the declared encoding for text input
+        source = io.StringIO(source)
+    elif isinstance(source, bytes):
+        source = io.BytesIO(source)
+    for _, elem in ET.iterparse(source, events=('end',)):
+        if _local(elem.tag) in ('item', 'entry'):
+            yield _item(elem)
+            # Drop the finished item so memory stays bounded by one item
+            elem.clear()
+
+def new_feed_items(source, cursor=None):
+    """
+    Items newer than a cursor, parsing only as far as the first already-seen item.
+    An item is old if its guid is the cursor's guid (the feed's previous head) or it is
+    dated at or before the cursor's published time.
+    Args:
+        source (bytes, str or file): Feed body.
+        cursor (dict): {"guid": ..., "published": ...} from the previous poll, or None for all items.
+    Returns:
+        tuple: (list of new FeedItem in feed order, updated cursor dict).
+    """
+    cursor = cursor or {}
+    last_guid = cursor.get("guid")
+    last_published = cursor.get("published")
+    items = []
+    for item in iter_feed_items(source):
+        if last_guid is not None and item.guid == last_guid:
+            break
+        if last_published and item.published and item.published <= last_published:
+            continue
+        items.append(item)
+    if not items:
+        return items, dict(cursor)
+    dated = [item.published for item in items if item.published]
+    return items, {
+        "guid": items[0].guid,
+        "published": max(dated + ([last_published] if last_published else [])) if dated else last_published
+    }
+
+class FeedReader:
+    """
+    Incremental poller for RSS/Atom headline feeds.
+
+    Each feed URL keeps a cursor (head guid and newest published time) plus the
+    ETag/Last-Modified validators from its last response. Polls send conditional
+    GETs, so an unchanged feed costs a 304 and no parsing, and a changed feed is
+    only parsed down to the first item seen before. Cursors live in the response
+    cache's validators table when a cache is available, otherwise in memory.
+    """
+
+    def __init__(self, cache=None, feed_url=DEFAULT_FEED_URL, scheduler=None, timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            cache (ResponseCache): Response cache holding bodies and cursors. Defaults to get_response_cache().
+            feed_url (str): Feed URL template with a {ticker} placeholder.
+            scheduler (PolitenessScheduler): Per-domain pacing. Defaults to the shared get_scheduler().
+            timeout (tuple): (connect, read) timeouts in seconds per request.
+        """
+        self.cache = cache if cache is not None else get_response_cache()
+        self.feed_url = feed_url
+        self.scheduler = scheduler if scheduler is not None else get_scheduler()
+        self.timeout = timeout
+        # Feed bytes that actually went through the XML parser
+        self.bytes_parsed = 0
+        self._state = {}
+
+    def _load_state(self, url):
+        if url not in self._state and self.cache is not None:
+            stored = self.cache.get_validators(url)
+            if stored is not None:
+                try:
+                    cursor = json.loads(stored["result"])
+                except (TypeError, ValueError):
+                    cursor = {}
+                self._state[url] = {**stored, "cursor": cursor}
+        return self._state.get(url)
+
+    def _save_state(self, url, content_hash, cursor, headers):
+        state = {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_hash": content_hash,
+            "cursor": cursor
+        }
+        self._state[url] = state
+        if self.cache is not None:
+            self.cache.set_validators(
+                url, content_hash, json.dumps(cursor), etag=state["etag"], last_modified=state["last_modified"]
+            )
+
+    def poll(self, url, session=None, priority=INTERACTIVE):
+        """
+        Fetch one feed and return the items added since the previous poll.
+        Args:
+            url (str): Feed URL.
+            session (requests.Session): Pooled session to reuse connections.
+            priority (int): Scheduler priority, INTERACTIVE or BACKGROUND.
+        Returns:
+            list: New FeedItem records, newest first (empty if nothing changed).
+        """
+        state = self._load_state(url)
+        status, body, headers = fetch_page(
+            url, cache=self.cache, session=session, timeout=self.timeout, validators=state,
+            scheduler=self.scheduler, priority=priority
+        )
+        if status == 304:
+            return []
+        raw = body.encode('utf-8')
+        content_hash = hashlib.sha256(raw).hexdigest()
+        if state is not None and state.get("content_hash") == content_hash:
+            return []
+        self.bytes_parsed += len(raw)
+        items, cursor = new_feed_items(body, state["cursor"] if state else None)
+        self._save_state(url, content_hash, cursor, headers)
+        return items
+
+    def poll_tickers(self, tickers, priority=INTERACTIVE):
+        """
+        Poll the headline feed of every ticker.
+        Args:
+            tickers (list): Ticker symbols.
+            priority (int): Scheduler priority, INTERACTIVE or BACKGROUND.
+        Returns:
+            dict: Ticker -> list of new FeedItem records (empty on error or no news).
+        """
+        results = {}
+        with make_session() as session:
+            for ticker in tickers:
+                try:
+                    results[ticker] = self.poll(self.feed_url.format(ticker=ticker), session, priority)
+                except Exception as e:
+                    print(f"Error polling feed for {ticker}: {e}")
+                    results[ticker] = []
+        return results
+
+if __name__ == "__main__":
+    # Example usage: a second poll only returns items published in between
+    reader = FeedReader()
+    for ticker, items in reader.poll_tickers(["TSM", "005930.KS"]).items():
+        print(f"{ticker}: {len(items)} new items")
+        for item in items[:3]:
+            print("  ", item.published, item.title)
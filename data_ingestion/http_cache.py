@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+from data_ingestion.quote_cache import DEFAULT_TTLS
+
+# Expiry in seconds per endpoint, matched on the longest URL prefix. Market data
+# expires with QuoteCache's fresh TTLs, so the persistent layer never keeps a
+# quote alive longer than the in-memory cache in front of it would.
+DEFAULT_ENDPOINT_TTLS = {
+    "yfinance://quote/": DEFAULT_TTLS["realtime"],
+    "yfinance://history/": DEFAULT_TTLS["historical"],
+    "https://finance.yahoo.com/quote/": 15 * 60,
+    "https://feeds.finance.yahoo.com/": 60
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS validators (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT NOT NULL,
+    result TEXT,
+    updated_at REAL NOT NULL
+)
+"""
+
+class ResponseCache:
+    """
+    Persistent response cache in SQLite, keyed by URL and query parameters.
+
+    The database runs in WAL mode with a busy timeout, so several orchestrator
+    workers can read and write the same file concurrently, and cached responses
+    survive restarts.
+    """
+
+    def __init__(self, path="data_ingestion/http_cache.sqlite", default_ttl=300, endpoint_ttls=None):
+        """
+        Args:
+            path (str): SQLite database file.
+            default_ttl (float): Expiry in seconds for URLs without an endpoint rule.
+            endpoint_ttls (dict): URL prefix to expiry in seconds, merged over DEFAULT_ENDPOINT_TTLS.
+        """
+        self.path = path
+        self.default_ttl = default_ttl
+        self.endpoint_ttls = {**DEFAULT_ENDPOINT_TTLS, **(endpoint_ttls or {})}
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        # sqlite3 connections are not shareable across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(url, params=None):
+        """
+        Build the cache key for a URL and its query parameters (order-insensitive).
+        """
+        query = urlencode(sorted((params or {}).items()), doseq=True)
+        return hashlib.sha256(f"{url}?{query}".encode("utf-8")).hexdigest()
+
+    def ttl_for(self, url):
+        """
+        Return the expiry in seconds that applies to a URL.
+        """
+        matches = [prefix for prefix in self.endpoint_ttls if url.startswith(prefix)]
+        return self.endpoint_ttls[max(matches, key=len)] if matches else self.default_ttl
+
+    def get(self, url, params=None):
+        """
+        Look up an unexpired response.
+        Args:
+            url (str): Request URL.
+            params (dict): Query parameters.
+        Returns:
+            tuple: (body bytes, headers dict, status) or None on a miss.
+        """
+        row = self._connect().execute(
+            "SELECT body, headers, status FROM responses WHERE key = ? AND expires_at > ?",
+            (self.make_key(url, params), time.time())
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], json.loads(row[1]), row[2]
+
+    def set(self, url, body, params=None, headers=None, status=200, ttl=None):
+        """
+        Store a response, replacing any previous entry for the same key.
+        Args:
+            url (str): Request URL.
+            body (bytes or str): Response body.
+            params (dict): Query parameters.
+            headers (dict): Response headers worth keeping.
+            status (int): HTTP status code.
+            ttl (float): Expiry in seconds. Defaults to the endpoint rule for the URL.
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl_for(url))
+        self._connect().execute(
+            "INSERT OR REPLACE INTO responses (key, url, status, headers, body, stored_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.make_key(url, params), url, status, json.dumps(dict(headers or {})), body, now, expires_at)
+        )
+
+    def get_json(self, url, params=None):
+        cached = self.get(url, params)
+        return json.loads(cached[0]) if cached is not None else None
+
+    def set_json(self, url, payload, params=None, ttl=None):
+        self.set(url, json.dumps(payload), params=params, headers={"Content-Type": "application/json"}, ttl=ttl)
+
+    def get_validators(self, url):
+        """
+        Return the revalidation record for a URL, kept independently of response expiry.
+        Args:
+            url (str): Page URL.
+        Returns:
+            dict: etag, last_modified, content_hash and the derived result, or None if unseen.
+        """
+        row = self._connect().execute(
+            "SELECT etag, last_modified, content_hash, result FROM validators WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "content_hash": row[2], "result": row[3]}
+
+    def set_validators(self, url, content_hash, result, etag=None, last_modified=None):
+        """
+        Record validators for a URL together with the result derived from that content.
+        Args:
+            url (str): Page URL.
+            content_hash (str): Hash of the page body the result was derived from.
+            result (str): Output worth reusing while the content is unchanged.
+            etag (str): ETag response header, if any.
+            last_modified (str): Last-Modified response header, if any.
+        """
+        self._connect().execute(
+            "INSERT OR REPLACE INTO validators (url, etag, last_modified, content_hash, result, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, content_hash, result, time.time())
+        )
+
+    def purge_expired(self):
+        """
+        Delete expired entries.
+        Returns:
+            int: Number of rows removed.
+        """
+        return self._connect().execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def stats(self):
+        """
+        Return hit/miss counters for this process and the number of stored entries.
+        """
+        entries = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_response_cache():
+    """
+    Return the process-wide cache shared by data_ingestion.api and data_ingestion.scraper.
+
+    The file is taken from HTTP_CACHE_PATH (default data_ingestion/http_cache.sqlite).
+    Setting HTTP_CACHE_PATH to an empty string disables caching.
+    Returns:
+        ResponseCache: Shared cache, or None if disabled.
+    """
+    global _default_cache
+    path = os.getenv("HTTP_CACHE_PATH", "data_ingestion/http_cache.sqlite")
+    if not path:
+        return None
+    with _default_lock:
+        if _default_cache is None or _default_cache.path != path:
+            _default_cache = ResponseCache(path)
+        return _default_cache
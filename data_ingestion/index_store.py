@@ -0,0 +1,278 @@
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+from typing import NamedTuple, Optional
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+FORMAT_VERSION = 3
+# Names the generation directory holding the latest complete save
+CURRENT = "CURRENT"
+# An unpublished generation this old is a save that died, not one still being written
+ABANDONED_SAVE_SECONDS = 60 * 60
+
+class SavedIndex(NamedTuple):
+    """A loaded index with the bookkeeping saved beside it."""
+    store: FAISS
+    meta: dict
+    signatures: Optional[np.ndarray]  # near-duplicate signatures, or None if not saved
+    signature_ids: Optional[list]  # docstore id of each signature
+    sources: dict  # source file path -> ids of the chunks indexed from it
+
+class MappedDocstore(Docstore, AddableMixin):
+    """
+    Docstore over a saved docstore.jsonl, read through a shared memory map.
+
+    Only the id -> line position table is held in memory; a document's text is
+    decoded from the mapped file when a search returns it. Documents added after
+    loading are kept in memory until the index is saved again.
+    """
+
+    def __init__(self, path, ids, offsets):
+        """
+        Args:
+            path (str): docstore.jsonl, one JSON document per index position.
+            ids (list): Docstore id of each line.
+            offsets (np.ndarray): Byte offset of each line, plus the file length.
+        """
+        self._positions = {doc_id: position for position, doc_id in enumerate(ids)}
+        self._offsets = offsets
+        self._added = {}
+        with open(path, "rb") as f:
+            # mmap refuses empty files; an index whose chunks were all deleted saves one
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if len(offsets) > 1 else b""
+
+    def search(self, search):
+        if search in self._added:
+            return self._added[search]
+        position = self._positions.get(search)
+        if position is None:
+            return f"ID {search} not found."
+        record = json.loads(self._map[self._offsets[position]:self._offsets[position + 1]])
+        return Document(id=search, page_content=record["page_content"], metadata=record["metadata"])
+
+    def add(self, texts):
+        overlapping = [doc_id for doc_id in texts if doc_id in self._positions or doc_id in self._added]
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        self._added.update(texts)
+
+    def delete(self, ids):
+        missing = [doc_id for doc_id in ids if doc_id not in self._positions and doc_id not in self._added]
+        if missing:
+            raise ValueError(f"Tried to delete ids that do not exist: {missing}")
+        # The mapped file is read-only; dropping the id is enough, and the next save leaves the line out
+        for doc_id in ids:
+            self._positions.pop(doc_id, None)
+            self._added.pop(doc_id, None)
+
+def ensure_writable(vector_store):
+    """
+    Give a store loaded with mmap_index its own copy of the vectors before they change.
+    The mapped vectors are a read-only view of index.faiss, and faiss aborts the process
+    on an add or delete against them.
+    Args:
+        vector_store (FAISS): Store about to be merged into or deleted from.
+    Returns:
+        bool: True if the vectors were copied into process memory.
+    """
+    import faiss
+    codes = getattr(vector_store.index, "codes", None)
+    if codes is None or codes.is_owned:
+        return False
+    vector_store.index = faiss.deserialize_index(faiss.serialize_index(vector_store.index))
+    return True
+
+class VectorIndexStore:
+    """
+    On-disk FAISS index with an aligned docstore, loaded through FAISS's mmap IO flags.
+
+    Each save writes a new generation directory holding index.faiss, docstore.jsonl
+    (line i is the document at index position i), the line offsets and ids, the
+    near-duplicate signatures, which chunks came from which source file, and
+    meta.json. The CURRENT file names the generation to load and is replaced
+    atomically once every file is written, so a load never pairs files from
+    different saves and an interrupted save leaves the previous one in place.
+    Loading maps the vectors and documents read-only instead of reading them, so
+    startup does not grow with the corpus and every process that loads the same
+    files shares their pages. The previous generation is kept for processes that
+    are still opening it; older ones, and saves that never finished, are removed.
+    """
+
+    def __init__(self, root="data_ingestion/vector_index"):
+        """
+        Args:
+            root (str): Directory holding the index generations.
+        """
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, *names):
+        return os.path.join(self.root, *names)
+
+    def current_generation(self):
+        """
+        Returns:
+            str: Name of the generation directory a load reads, or None if nothing is saved.
+        """
+        try:
+            with open(self._path(CURRENT), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _publish(self, generation):
+        # Write beside CURRENT, then swap it in; readers see the old name or the new one
+        tmp_path = self._path(f"{CURRENT}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(generation)
+        os.replace(tmp_path, self._path(CURRENT))
+
+    def _prune(self, generation, previous):
+        # Generation names sort by save time. Keep the new one and the one it replaced; an
+        # unpublished newer one may be another worker's save in progress until it goes quiet.
+        for name in os.listdir(self.root):
+            if not name.startswith("gen-") or name in (generation, previous):
+                continue
+            path = self._path(name)
+            superseded = previous is not None and name < previous
+            if superseded or time.time() - os.path.getmtime(path) > ABANDONED_SAVE_SECONDS:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def save(self, vector_store, near_duplicates=None, embeddings_model=None, sources=None):
+        """
+        Write a FAISS vector store (and the near-duplicate filter state) to disk as a new generation.
+        Args:
+            vector_store (FAISS): Store to save. Its index must not change while saving.
+            near_duplicates (NearDuplicateFilter): Filter whose signatures to keep, if any.
+            sources (dict): Source file path -> ids of its chunks, so a changed file's chunks
+                can still be replaced after a restart.
+            embeddings_model (str): Name of the model that produced the vectors; a load
+                with a different model is refused.
+        Returns:
+            int: Number of vectors saved.
+        """
+        import faiss
+        ntotal = vector_store.index.ntotal
+        ids = [vector_store.index_to_docstore_id[position] for position in range(ntotal)]
+        with self._lock:
+            previous = self.current_generation()
+            generation = f"gen-{time.time_ns()}-{os.getpid()}"
+            directory = self._path(generation)
+            os.makedirs(directory)
+
+            def write(name, writer):
+                with open(os.path.join(directory, name), "wb") as f:
+                    writer(f)
+
+            write("index.faiss", lambda f: faiss.write_index(vector_store.index, faiss.PyCallbackIOWriter(f.write)))
+            offsets = np.zeros(ntotal + 1, dtype=np.int64)
+
+            def write_docstore(f):
+                for position, doc_id in enumerate(ids):
+                    doc = vector_store.docstore.search(doc_id)
+                    line = json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}) + "\n"
+                    f.write(line.encode("utf-8"))
+                    offsets[position + 1] = f.tell()
+
+            write("docstore.jsonl", write_docstore)
+            write("docstore.offsets.npy", lambda f: np.save(f, offsets))
+            write("ids.json", lambda f: f.write(json.dumps(ids).encode("utf-8")))
+            write("sources.json", lambda f: f.write(json.dumps(sources or {}).encode("utf-8")))
+            meta = {
+                "version": FORMAT_VERSION,
+                "ntotal": ntotal,
+                "distance_strategy": vector_store.distance_strategy.value,
+                "embeddings_model": embeddings_model,
+                "near_duplicates": None
+            }
+            if near_duplicates is not None:
+                signatures, signature_ids = near_duplicates.signatures()
+                write("near_duplicates.npy", lambda f: np.save(f, signatures))
+                write("near_duplicates.ids.json", lambda f: f.write(json.dumps(signature_ids).encode("utf-8")))
+                meta["near_duplicates"] = {
+                    "count": len(signatures),
+                    "threshold": near_duplicates.threshold,
+                    "num_perm": near_duplicates.num_perm,
+                    "shingle_size": near_duplicates.shingle_size,
+                    "seed": near_duplicates.seed
+                }
+            write("meta.json", lambda f: f.write(json.dumps(meta).encode("utf-8")))
+            self._publish(generation)
+            self._prune(generation, previous)
+        return ntotal
+
+    def load(self, embeddings, embeddings_model=None, mmap_index=True):
+        """
+        Load the current generation without reading the vectors or documents into memory.
+        Args:
+            embeddings (Embeddings): Embedding model for queries and later additions.
+            embeddings_model (str): Expected model name; a mismatch means nothing is loaded.
+            mmap_index (bool): Map index.faiss read-only instead of reading it. Call
+                ensure_writable before adding to or deleting from the returned store.
+        Returns:
+            SavedIndex: The store and its bookkeeping, or None if nothing usable is saved.
+        """
+        import faiss
+        generation = self.current_generation()
+        if generation is None:
+            return None
+
+        def path(name):
+            return self._path(generation, name)
+
+        try:
+            with open(path("meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != FORMAT_VERSION:
+                print(f"Ignoring vector index in {self.root}: format version {meta.get('version')}")
+                return None
+            if embeddings_model is not None and meta.get("embeddings_model") not in (None, embeddings_model):
+                print(f"Ignoring vector index in {self.root}: built with {meta['embeddings_model']}")
+                return None
+            # IO_FLAG_MMAP alone still copies a flat index's vectors into memory; MMAP_IFC leaves them in the file
+            flags = faiss.IO_FLAG_MMAP_IFC if mmap_index else 0
+            index = faiss.read_index(path("index.faiss"), flags)
+            offsets = np.load(path("docstore.offsets.npy"), mmap_mode="r")
+            with open(path("ids.json"), "r", encoding="utf-8") as f:
+                ids = json.load(f)
+            if not index.ntotal == len(ids) == len(offsets) - 1 == meta["ntotal"]:
+                # Files of one generation are never rewritten, so this means they were tampered with
+                print(f"Ignoring vector index in {self.root}: files are out of step")
+                return None
+            signatures = signature_ids = None
+            if meta.get("near_duplicates"):
+                signatures = np.load(path("near_duplicates.npy"), mmap_mode="r")
+                with open(path("near_duplicates.ids.json"), "r", encoding="utf-8") as f:
+                    signature_ids = json.load(f)
+                if not len(signatures) == len(signature_ids) == meta["near_duplicates"]["count"]:
+                    signatures = signature_ids = None
+            with open(path("sources.json"), "r", encoding="utf-8") as f:
+                sources = json.load(f)
+            store = FAISS(
+                embedding_function=embeddings,
+                index=index,
+                docstore=MappedDocstore(path("docstore.jsonl"), ids, offsets),
+                index_to_docstore_id=dict(enumerate(ids)),
+                distance_strategy=DistanceStrategy(meta["distance_strategy"])
+            )
+            return SavedIndex(store, meta, signatures, signature_ids, sources)
+        except Exception as e:
+            print(f"Error loading vector index from {self.root}: {e}")
+            return None
+
+if __name__ == "__main__":
+    # Example usage: save a tiny store, then load it memory-mapped
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    embeddings = DeterministicFakeEmbedding(size=16)
+    docs = [Document(page_content="TSMC beat estimates by 4%"), Document(page_content="Samsung missed by 2%")]
+    store = VectorIndexStore("/tmp/vector_index_demo")
+    store.save(FAISS.from_documents(docs, embeddings, ids=["tsmc", "samsung"], distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT))
+    saved = store.load(embeddings)
+    print(saved.meta["ntotal"], saved.store.similarity_search("TSMC beat estimates by 4%", k=1))
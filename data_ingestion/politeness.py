@@ -0,0 +1,219 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Lower runs first: a user waiting on a response jumps ahead of cache refreshes
+INTERACTIVE = 0
+BACKGROUND = 10
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+class _Domain:
+    __slots__ = (
+        "rate", "capacity", "concurrency", "tokens", "updated", "paused_until",
+        "waiting", "in_flight", "max_queue_depth", "started", "throttled", "waits"
+    )
+
+    def __init__(self, rate, capacity, concurrency):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.concurrency = concurrency
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waiting = []
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.started = 0
+        self.throttled = 0
+        # priority -> [count, total seconds, max seconds]
+        self.waits = {}
+
+    def delay(self, now):
+        """Seconds until a request may start, ignoring the concurrency limit."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+class PolitenessScheduler:
+    """
+    Per-domain pacing for scraper threads.
+
+    Every request to a domain first takes a slot: slots are handed out in priority
+    order (then FIFO), no faster than the domain's token-bucket rate and with at most
+    `concurrency` requests to the domain in flight. Callers keep their own threads;
+    the scheduler only decides when each one may go.
+    """
+
+    def __init__(self, rate=4.0, burst=8, concurrency=8, domain_limits=None):
+        """
+        Args:
+            rate (float): Requests per second allowed to each domain.
+            burst (float): Requests a domain may receive back to back after being idle.
+            concurrency (int): Maximum requests in flight to one domain.
+            domain_limits (dict): Per-domain overrides, e.g. {"finance.yahoo.com": {"rate": 2}}.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.domain_limits = domain_limits or {}
+        self._domains = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _domain(self, domain):
+        state = self._domains.get(domain)
+        if state is None:
+            limits = self.domain_limits.get(domain, {})
+            state = self._domains[domain] = _Domain(
+                limits.get("rate", self.rate),
+                limits.get("burst", self.burst),
+                limits.get("concurrency", self.concurrency)
+            )
+        return state
+
+    def acquire(self, url, priority=BACKGROUND):
+        """
+        Block until a request to url's domain may start.
+        Args:
+            url (str): Request URL (only the host is used).
+            priority (int): INTERACTIVE, BACKGROUND or any int; lower goes first.
+        Returns:
+            str: The domain, to pass to release().
+        """
+        domain = urlsplit(url).netloc.lower()
+        enqueued = time.monotonic()
+        with self._cond:
+            state = self._domain(domain)
+            ticket = (priority, next(self._seq))
+            heapq.heappush(state.waiting, ticket)
+            state.max_queue_depth = max(state.max_queue_depth, len(state.waiting))
+            while True:
+                if state.waiting[0] == ticket and state.in_flight < state.concurrency:
+                    now = time.monotonic()
+                    delay = state.delay(now)
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+            heapq.heappop(state.waiting)
+            state.tokens -= 1
+            state.in_flight += 1
+            state.started += 1
+            waited = now - enqueued
+            stats = state.waits.setdefault(priority, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += waited
+            stats[2] = max(stats[2], waited)
+            # The next waiter in line may be able to go as well
+            self._cond.notify_all()
+        return domain
+
+    def release(self, domain):
+        """
+        Mark a request started by acquire() as finished.
+        Args:
+            domain (str): Value returned by acquire().
+        """
+        with self._cond:
+            self._domains[domain].in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, url, priority=BACKGROUND):
+        """
+        Context manager holding a request slot for url's domain.
+        Args:
+            url (str): Request URL.
+            priority (int): INTERACTIVE, BACKGROUND or any int; lower goes first.
+        """
+        domain = self.acquire(url, priority)
+        try:
+            yield
+        finally:
+            self.release(domain)
+
+    def pause(self, url, seconds):
+        """
+        Hold back every request to url's domain, typically after a 429.
+        Args:
+            url (str): Any URL on the throttled domain.
+            seconds (float): Pause length.
+        """
+        with self._cond:
+            state = self._domain(urlsplit(url).netloc.lower())
+            state.paused_until = max(state.paused_until, time.monotonic() + seconds)
+            state.tokens = 0.0
+            state.throttled += 1
+            self._cond.notify_all()
+
+    def stats(self):
+        """
+        Queue and wait-time metrics per domain.
+        Returns:
+            dict: Domain -> queue_depth, max_queue_depth, in_flight, started, throttled and
+            per-priority wait counts, mean and max in seconds.
+        """
+        with self._cond:
+            return {
+                domain: {
+                    "queue_depth": len(state.waiting),
+                    "max_queue_depth": state.max_queue_depth,
+                    "in_flight": state.in_flight,
+                    "started": state.started,
+                    "throttled": state.throttled,
+                    "wait": {
+                        PRIORITY_NAMES.get(priority, str(priority)): {
+                            "count": count,
+                            "mean_s": round(total / count, 4),
+                            "max_s": round(longest, 4)
+                        }
+                        for priority, (count, total, longest) in sorted(state.waits.items())
+                    }
+                }
+                for domain, state in self._domains.items()
+            }
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """
+    Return the process-wide scheduler shared by all scrapes, created on first use.
+    Limits come from SCRAPER_RATE (requests/s per domain), SCRAPER_BURST and
+    SCRAPER_CONCURRENCY (in-flight requests per domain).
+    Returns:
+        PolitenessScheduler: Shared scheduler.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PolitenessScheduler(
+                rate=float(os.getenv("SCRAPER_RATE", "4")),
+                burst=float(os.getenv("SCRAPER_BURST", "8")),
+                concurrency=int(os.getenv("SCRAPER_CONCURRENCY", "8"))
+            )
+        return _scheduler
+
+if __name__ == "__main__":
+    # Example usage: 12 background and 3 interactive requests to one domain
+    from concurrent.futures import ThreadPoolExecutor
+    scheduler = PolitenessScheduler(rate=10, burst=2, concurrency=2)
+
+    def job(i, priority):
+        with scheduler.slot(f"https://finance.yahoo.com/quote/T{i}/news", priority):
+            time.sleep(0.05)
+
+    with ThreadPoolExecutor(max_workers=15) as pool:
+        for i in range(12):
+            pool.submit(job, i, BACKGROUND)
+        time.sleep(0.1)
+        for i in range(3):
+            pool.submit(job, i, INTERACTIVE)
+    print("Scheduler Stats:", scheduler.stats())
@@ -0,0 +1,106 @@
+import os
+import re
+import threading
+import numpy as np
+
+COLUMNS = ("Close", "Volume")
+
+class PriceStore:
+    """
+    On-disk columnar store of daily bars, one .npz file per ticker.
+
+    Each file holds a sorted datetime64[D] date array plus one array per column,
+    so extending a ticker only touches the bars that are new since the last run.
+    The file also records the earliest date that has been requested from the
+    provider, so a ticker that listed recently is not backfilled over and over.
+    """
+
+    def __init__(self, root="data_ingestion/price_store"):
+        """
+        Args:
+            root (str): Directory holding the per-ticker .npz files.
+        """
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, ticker):
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9._-]", "_", ticker) + ".npz")
+
+    def load(self, ticker):
+        """
+        Load every stored bar for a ticker.
+        Args:
+            ticker (str): Ticker symbol.
+        Returns:
+            dict: {"dates": datetime64[D] array, "Close": array, "Volume": array}, or None if nothing is stored.
+        """
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return {name: data[name] for name in ("dates",) + COLUMNS}
+
+    def coverage(self, ticker):
+        """
+        Return the date range already fetched for a ticker.
+        Args:
+            ticker (str): Ticker symbol.
+        Returns:
+            tuple: (covered_from, last_fetched) as datetime64[D], or None if the ticker is not stored.
+        """
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return data["covered"][0], data["covered"][1]
+
+    def append(self, ticker, dates, columns, covered_from, covered_to):
+        """
+        Merge new bars into the stored series. Bars for dates already stored are replaced.
+        Args:
+            ticker (str): Ticker symbol.
+            dates (array-like): Bar dates, convertible to datetime64[D].
+            columns (dict): Column name to array-like of values, aligned with dates.
+            covered_from (datetime64): First date of the range these bars were fetched for.
+            covered_to (datetime64): Last date of the range these bars were fetched for.
+        Returns:
+            int: Number of bars in the store after the merge.
+        """
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        covered = np.array([covered_from, covered_to], dtype="datetime64[D]")
+        with self._lock:
+            stored = self.load(ticker)
+            if stored is not None:
+                stored_covered = self.coverage(ticker)
+                covered = np.array([min(covered[0], stored_covered[0]), max(covered[1], stored_covered[1])])
+                keep = ~np.isin(stored["dates"], dates)
+                dates = np.concatenate([stored["dates"][keep], dates])
+                merged = {name: np.concatenate([stored[name][keep], np.asarray(columns[name])]) for name in COLUMNS}
+            else:
+                merged = {name: np.asarray(columns[name]) for name in COLUMNS}
+            order = np.argsort(dates, kind="stable")
+            arrays = {"dates": dates[order], "covered": covered, **{name: merged[name][order] for name in COLUMNS}}
+
+            path = self._path(ticker)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+            return len(arrays["dates"])
+
+    def window(self, ticker, days):
+        """
+        Return the stored bars from the last `days` calendar days.
+        Args:
+            ticker (str): Ticker symbol.
+            days (int): Lookback in calendar days, counted back from today.
+        Returns:
+            dict: Same layout as load(), or None if nothing is stored.
+        """
+        bars = self.load(ticker)
+        if bars is None:
+            return None
+        cutoff = np.datetime64("today", "D") - np.timedelta64(days, "D")
+        mask = bars["dates"] >= cutoff
+        return {name: values[mask] for name, values in bars.items()}
@@ -0,0 +1,364 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+import numpy as np
+import yfinance as yf
+from data_ingestion.http_cache import get_response_cache
+from data_ingestion.series import HistoricalSeries
+
+PERIOD_DAYS = {"1d": 1, "5d": 5, "1mo": 30, "3mo": 91, "6mo": 182, "1y": 365, "2y": 730, "5y": 1826, "10y": 3652}
+
+class ReplayMiss(LookupError):
+    """Raised by ReplayProvider when no recorded response exists for a request."""
+
+class MarketDataProvider:
+    """
+    Source of quotes and daily history behind the data_ingestion.api fetchers.
+
+    Implementations raise on failure (requests.HTTPError for rate limits) and
+    leave retries and mock fallbacks to data_ingestion.api.
+    """
+
+    name = "base"
+
+    def get_quote(self, ticker):
+        """
+        Fetch the latest quote for one ticker.
+        Args:
+            ticker (str): Ticker symbol.
+        Returns:
+            dict: {"price": float, "volume": int, "market_cap": int, or None if unknown}.
+        """
+        raise NotImplementedError
+
+    def get_quotes(self, tickers):
+        """
+        Fetch latest quotes for several tickers in as few calls as the provider allows.
+        Tickers the provider has no data for are left out of the result.
+        Args:
+            tickers (list): Ticker symbols.
+        Returns:
+            dict: Quote per ticker.
+        """
+        return {ticker: self.get_quote(ticker) for ticker in tickers}
+
+    def get_history(self, ticker, period=None, start=None, end=None):
+        """
+        Fetch daily bars either for a period or for a [start, end) date range.
+        Args:
+            ticker (str): Ticker symbol.
+            period (str): yfinance-style period (e.g., '1mo').
+            start (str): First date (YYYY-MM-DD), inclusive.
+            end (str): Last date (YYYY-MM-DD), exclusive.
+        Returns:
+            HistoricalSeries: Daily bars.
+        """
+        raise NotImplementedError
+
+class YFinanceProvider(MarketDataProvider):
+    """Live Yahoo Finance data through yfinance."""
+
+    name = "yfinance"
+
+    def get_quote(self, ticker):
+        info = yf.Ticker(ticker).info
+        return {
+            "price": info.get("regularMarketPrice", 0),
+            "volume": info.get("regularMarketVolume", 0),
+            "market_cap": info.get("marketCap", 0)
+        }
+
+    def get_quotes(self, tickers):
+        # yfinance has no batched .info; one download call returns the latest
+        # daily bar for every symbol. Market cap would take a request per symbol
+        # (fast_info or .info), so bulk quotes report it as unknown.
+        frame = yf.download(
+            list(tickers),
+            period="5d",
+            interval="1d",
+            group_by="ticker",
+            progress=False,
+            threads=True
+        )
+        quotes = {}
+        for ticker in tickers:
+            quote = _last_bar(frame, ticker)
+            if quote is not None:
+                quotes[ticker] = quote
+        return quotes
+
+    def get_history(self, ticker, period=None, start=None, end=None):
+        if start is not None:
+            hist = yf.Ticker(ticker).history(start=start, end=end)
+        else:
+            hist = yf.Ticker(ticker).history(period=period or "1mo")
+        return HistoricalSeries.from_frame(hist)
+
+def _last_bar(frame, ticker):
+    """
+    Pick the latest non-empty daily bar for one ticker out of a yf.download frame.
+    Args:
+        frame (DataFrame): Result of yf.download, grouped by ticker.
+        ticker (str): Ticker symbol to extract.
+    Returns:
+        dict: Quote with volume 0 if the bar has none and market_cap None, or None if the ticker has no bars.
+    """
+    if hasattr(frame.columns, "levels"):
+        if ticker not in frame.columns.get_level_values(0):
+            return None
+        bars = frame[ticker]
+    else:
+        bars = frame
+    bars = bars.dropna(subset=["Close"])
+    if bars.empty:
+        return None
+    last = bars.iloc[-1]
+    volume = float(last["Volume"])
+    return {
+        "price": float(last["Close"]),
+        "volume": 0 if np.isnan(volume) else int(volume),
+        "market_cap": None
+    }
+
+def _safe_name(ticker):
+    return re.sub(r"[^A-Za-z0-9._-]", "_", ticker) + ".json"
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+class RecordingProvider(MarketDataProvider):
+    """
+    Pass-through provider that captures every response to disk for ReplayProvider.
+
+    Quotes are stored as quotes/<ticker>.json (latest wins). History is stored as
+    history/<ticker>.json and merged across calls, so one file accumulates every
+    bar seen for that ticker.
+    """
+
+    name = "record"
+
+    def __init__(self, inner, root):
+        """
+        Args:
+            inner (MarketDataProvider): Provider that serves the live requests.
+            root (str): Directory to write captured responses to.
+        """
+        self.inner = inner
+        self.root = root
+        self._lock = threading.Lock()
+
+    def get_quote(self, ticker):
+        quote = self.inner.get_quote(ticker)
+        _write_json(os.path.join(self.root, "quotes", _safe_name(ticker)), quote)
+        return quote
+
+    def get_quotes(self, tickers):
+        quotes = self.inner.get_quotes(tickers)
+        for ticker, quote in quotes.items():
+            _write_json(os.path.join(self.root, "quotes", _safe_name(ticker)), quote)
+        return quotes
+
+    def get_history(self, ticker, period=None, start=None, end=None):
+        series = self.inner.get_history(ticker, period=period, start=start, end=end)
+        path = os.path.join(self.root, "history", _safe_name(ticker))
+        with self._lock:
+            merged = {}
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    recorded = json.load(f)
+                merged = dict(zip(recorded["dates"], zip(recorded["close"], recorded["volume"])))
+            merged.update(zip(series.dates.astype(str).tolist(), zip(series.close.tolist(), series.volume.tolist())))
+            dates = sorted(merged)
+            _write_json(path, {
+                "dates": dates,
+                "close": [merged[d][0] for d in dates],
+                "volume": [merged[d][1] for d in dates]
+            })
+        return series
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves responses captured by RecordingProvider, with injected latency.
+
+    Period requests are answered relative to the last recorded bar rather than
+    today, so a replay gives the same answer on any day it is run.
+    """
+
+    name = "replay"
+
+    def __init__(self, root, latency=0.0, jitter=0.0):
+        """
+        Args:
+            root (str): Directory written by RecordingProvider.
+            latency (float): Seconds slept per provider call.
+            jitter (float): Extra uniform random seconds added to each call.
+        """
+        self.root = root
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._history = {}
+
+    def _delay(self):
+        with self._lock:
+            self.calls += 1
+        wait = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if wait > 0:
+            time.sleep(wait)
+
+    def _read_quote(self, ticker):
+        path = os.path.join(self.root, "quotes", _safe_name(ticker))
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def get_quote(self, ticker):
+        self._delay()
+        quote = self._read_quote(ticker)
+        if quote is None:
+            raise ReplayMiss(f"No recorded quote for {ticker}")
+        return quote
+
+    def get_quotes(self, tickers):
+        self._delay()
+        quotes = {}
+        for ticker in tickers:
+            quote = self._read_quote(ticker)
+            if quote is not None:
+                quotes[ticker] = quote
+        return quotes
+
+    def _load_history(self, ticker):
+        if ticker not in self._history:
+            path = os.path.join(self.root, "history", _safe_name(ticker))
+            if not os.path.exists(path):
+                raise ReplayMiss(f"No recorded history for {ticker}")
+            with open(path, "r", encoding="utf-8") as f:
+                recorded = json.load(f)
+            self._history[ticker] = HistoricalSeries(recorded["dates"], recorded["close"], recorded["volume"])
+        return self._history[ticker]
+
+    def get_history(self, ticker, period=None, start=None, end=None):
+        self._delay()
+        series = self._load_history(ticker)
+        if start is not None:
+            mask = series.dates >= np.datetime64(start, "D")
+            if end is not None:
+                mask &= series.dates < np.datetime64(end, "D")
+        elif len(series):
+            days = PERIOD_DAYS.get(period or "1mo", 30)
+            mask = series.dates > series.dates[-1] - np.timedelta64(days, "D")
+        else:
+            return series
+        return HistoricalSeries(series.dates[mask], series.close[mask], series.volume[mask])
+
+class CachingProvider(MarketDataProvider):
+    """
+    Wraps a provider with the persistent ResponseCache, so quotes and history
+    survive restarts and are shared between worker processes.
+
+    This layer sits under each process's in-memory QuoteCache and its expiries
+    follow QuoteCache's fresh TTLs (see DEFAULT_ENDPOINT_TTLS). A QuoteCache miss
+    or refresh may still be answered from here with an entry another worker
+    stored earlier, so the worst-case age of a quote is about twice the
+    realtime TTL, plus QuoteCache's stale window.
+    """
+
+    name = "cached"
+
+    def __init__(self, inner, cache):
+        """
+        Args:
+            inner (MarketDataProvider): Provider that serves cache misses.
+            cache (ResponseCache): Persistent cache to read and write.
+        """
+        self.inner = inner
+        self.cache = cache
+
+    def _quote_url(self, ticker):
+        return f"{self.inner.name}://quote/{ticker}"
+
+    def get_quote(self, ticker):
+        quote = self.cache.get_json(self._quote_url(ticker))
+        if quote is None:
+            quote = self.inner.get_quote(ticker)
+            self.cache.set_json(self._quote_url(ticker), quote)
+        return quote
+
+    def get_quotes(self, tickers):
+        quotes, missing = {}, []
+        for ticker in tickers:
+            quote = self.cache.get_json(self._quote_url(ticker))
+            if quote is None:
+                missing.append(ticker)
+            else:
+                quotes[ticker] = quote
+        if missing:
+            fetched = self.inner.get_quotes(missing)
+            for ticker, quote in fetched.items():
+                self.cache.set_json(self._quote_url(ticker), quote)
+            quotes.update(fetched)
+        return quotes
+
+    def get_history(self, ticker, period=None, start=None, end=None):
+        url = f"{self.inner.name}://history/{ticker}"
+        params = {key: value for key, value in (("period", period), ("start", start), ("end", end)) if value}
+        cached = self.cache.get_json(url, params)
+        if cached is not None:
+            return HistoricalSeries(cached["dates"], cached["close"], cached["volume"])
+        series = self.inner.get_history(ticker, period=period, start=start, end=end)
+        if len(series.dates) == 0:
+            # yfinance answers errors with an empty frame; caching it would hide the data for hours
+            return series
+        self.cache.set_json(url, {
+            "dates": series.dates.astype(str).tolist(),
+            "close": series.close.tolist(),
+            "volume": series.volume.tolist()
+        }, params)
+        return series
+
+def provider_from_env():
+    """
+    Build the provider selected by environment variables.
+
+    MARKET_DATA_PROVIDER: 'yfinance' (default), 'record', 'replay' or 'synthetic'.
+    MARKET_DATA_REPLAY_DIR: Capture directory for 'record' and 'replay'.
+    MARKET_DATA_REPLAY_LATENCY: Seconds of injected latency per replayed call.
+    SYNTHETIC_TICKERS, SYNTHETIC_YEARS, SYNTHETIC_SEED: Universe size for 'synthetic'.
+    Live yfinance data goes through the persistent response cache unless
+    HTTP_CACHE_PATH is set to an empty string.
+    Returns:
+        MarketDataProvider: Configured provider.
+    """
+    kind = os.getenv("MARKET_DATA_PROVIDER", "yfinance").lower()
+    root = os.getenv("MARKET_DATA_REPLAY_DIR", "data_ingestion/replay")
+    if kind == "synthetic":
+        from data_ingestion.synthetic import SyntheticProvider, SyntheticUniverse
+        return SyntheticProvider(SyntheticUniverse(
+            n_tickers=int(os.getenv("SYNTHETIC_TICKERS", "100")),
+            years=int(os.getenv("SYNTHETIC_YEARS", "1")),
+            seed=int(os.getenv("SYNTHETIC_SEED", "0"))
+        ))
+    if kind == "replay":
+        return ReplayProvider(root, latency=float(os.getenv("MARKET_DATA_REPLAY_LATENCY", "0")))
+    if kind == "record":
+        return RecordingProvider(YFinanceProvider(), root)
+    cache = get_response_cache()
+    return CachingProvider(YFinanceProvider(), cache) if cache is not None else YFinanceProvider()
+
+if __name__ == "__main__":
+    # Capture a replay set for the default tickers
+    recorder = RecordingProvider(YFinanceProvider(), os.getenv("MARKET_DATA_REPLAY_DIR", "data_ingestion/replay"))
+    tickers = ["TSM", "005930.KS"]
+    print("Quotes:", recorder.get_quotes(tickers))
+    for ticker in tickers:
+        print("History:", ticker, recorder.get_history(ticker, period="1y"))
@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Seconds an entry is fresh, per field
+DEFAULT_TTLS = {"realtime": 15, "historical": 6 * 60 * 60}
+# Extra seconds a stale entry may still be served while it is refreshed in the background
+DEFAULT_STALE_TTLS = {"realtime": 120, "historical": 24 * 60 * 60}
+
+class QuoteCache:
+    """
+    In-process market-data cache with per-field TTLs and stale-while-revalidate.
+
+    Fresh entries are served from memory. Entries past their TTL but inside the
+    stale window are still served, and a single background refresh per key is
+    scheduled to update them. Anything older is a miss and is loaded inline.
+    """
+
+    def __init__(self, ttls=None, stale_ttls=None, max_workers=2):
+        """
+        Args:
+            ttls (dict): Fresh lifetime in seconds per field (e.g., {'realtime': 15}).
+            stale_ttls (dict): Stale-serving window in seconds per field.
+            max_workers (int): Background refresh threads.
+        """
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stale_ttls = {**DEFAULT_STALE_TTLS, **(stale_ttls or {})}
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quote-refresh")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def get(self, field, key, loader):
+        """
+        Return one cached value, loading it on a miss.
+        Args:
+            field (str): Data field ('realtime' or 'historical').
+            key (str): Cache key, usually the ticker symbol.
+            loader (callable): Called as loader(key) to fetch the value.
+        Returns:
+            Any: Cached or freshly loaded value.
+        """
+        return self.get_many(field, [key], lambda keys: {k: loader(k) for k in keys})[key]
+
+    def get_many(self, field, keys, loader):
+        """
+        Return cached values for several keys, loading all misses with one loader call.
+        Args:
+            field (str): Data field ('realtime' or 'historical').
+            keys (list): Cache keys, usually ticker symbols.
+            loader (callable): Called as loader(list_of_keys) and must return {key: value}.
+        Returns:
+            dict: Value per key.
+        """
+        ttl = self.ttls.get(field, 0)
+        stale_ttl = self.stale_ttls.get(field, 0)
+        now = time.monotonic()
+        result, missing, stale = {}, [], []
+
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get((field, key))
+                age = now - entry[1] if entry else None
+                if entry and age < ttl:
+                    self.hits += 1
+                    result[key] = entry[0]
+                elif entry and age < ttl + stale_ttl:
+                    self.stale_hits += 1
+                    result[key] = entry[0]
+                    if (field, key) not in self._refreshing:
+                        self._refreshing.add((field, key))
+                        stale.append(key)
+                else:
+                    self.misses += 1
+                    missing.append(key)
+
+        if stale:
+            self._executor.submit(self._refresh, field, stale, loader)
+        if missing:
+            loaded = loader(missing)
+            self._store(field, loaded)
+            result.update(loaded)
+        return result
+
+    def _store(self, field, values):
+        now = time.monotonic()
+        with self._lock:
+            for key, value in values.items():
+                self._entries[(field, key)] = (value, now)
+
+    def _refresh(self, field, keys, loader):
+        try:
+            self._store(field, loader(keys))
+            with self._lock:
+                self.refreshes += 1
+        except Exception as e:
+            print(f"Background refresh of {field} for {keys} failed: {e}")
+            with self._lock:
+                self.refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.difference_update((field, key) for key in keys)
+
+    def invalidate(self, field=None, key=None):
+        """
+        Drop cached entries.
+        Args:
+            field (str): Only drop entries for this field. Drops all fields if None.
+            key (str): Only drop this key. Drops all keys if None.
+        """
+        with self._lock:
+            for entry_key in list(self._entries):
+                if (field is None or entry_key[0] == field) and (key is None or entry_key[1] == key):
+                    del self._entries[entry_key]
+
+    def stats(self):
+        """
+        Return cache counters for sizing and monitoring.
+        Returns:
+            dict: Hit, stale-hit, miss and refresh counters plus entry count and hit ratio.
+        """
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0
+            }
@@ -0,0 +1,95 @@
+import asyncio
+import random
+import time
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by every coroutine that talks to one provider.
+
+    A 429 from the provider pauses the whole bucket, so all in-flight callers back
+    off together instead of each one hammering the endpoint on its own schedule.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate (float): Tokens added per second (sustained requests per second).
+            capacity (float): Maximum burst size. Defaults to rate.
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = None
+        self._loop = None
+
+    def _get_lock(self):
+        # asyncio.Lock is tied to the loop it is first used on; limiters live at
+        # module level and may outlive a loop (e.g. repeated asyncio.run calls).
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens=1):
+        """
+        Wait until a token is available and take it.
+        Args:
+            tokens (float): Number of tokens to take.
+        """
+        async with self._get_lock():
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        """
+        Stop handing out tokens for the given number of seconds.
+        Args:
+            seconds (float): Pause length, typically a backoff delay after a 429.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = 0.0
+        self.paused_until = max(self.paused_until, now + seconds)
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """
+    Exponential backoff with full jitter.
+    Args:
+        attempt (int): Zero-based retry attempt.
+        base (float): Delay ceiling for the first retry in seconds.
+        cap (float): Upper bound for the delay ceiling in seconds.
+    Returns:
+        float: Seconds to wait before the next attempt.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+_limiters = {}
+
+def get_limiter(provider, rate=2.0, capacity=5):
+    """
+    Return the shared limiter for a provider, creating it on first use.
+    Args:
+        provider (str): Provider name (e.g., 'yahoo').
+        rate (float): Requests per second if the limiter is created.
+        capacity (float): Burst size if the limiter is created.
+    Returns:
+        TokenBucket: Limiter shared by all callers of that provider.
+    """
+    if provider not in _limiters:
+        _limiters[provider] = TokenBucket(rate, capacity)
+    return _limiters[provider]
@@ -1,63 +1,450 @@
-import requests
-from bs4 import BeautifulSoup
-import re
-from datetime import datetime
-
-def scrape_earnings_data(tickers, base_url="https://finance.yahoo.com/quote"):
-    """
-    Scrape earnings data for given tickers from a financial news site.
-    Args:
-        tickers (list): List of ticker symbols (e.g., ['TSM', '005930.KS']).
-        base_url (str): Base URL for scraping (e.g., Yahoo Finance).
-    Returns:
-        dict: Earnings data with ticker as key and summary as value.
-    """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    earnings_data = {}
-    
-    for ticker in tickers:
-        try:
-            # Construct URL (mock example, adjust for actual source)
-            url = f"{base_url}/{ticker}/news"
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Mock parsing: Look for headlines with "earnings"
-            headlines = soup.find_all('h3', class_=re.compile('.*news.*'))
-            for headline in headlines:
-                text = headline.get_text().lower()
-                if "earnings" in text:
-                    earnings_data[ticker] = text
-                    break
-            else:
-                earnings_data[ticker] = f"No recent earnings news for {ticker}"
-        except Exception as e:
-            print(f"Error scraping data for {ticker}: {e}")
-            earnings_data[ticker] = f"Failed to scrape earnings for {ticker}"
-    
-    return earnings_data
-
-def clean_earnings_data(raw_data):
-    """
-    Clean scraped earnings data for RAG.
-    Args:
-        raw_data (dict): Raw earnings data from scraper.
-    Returns:
-        dict: Cleaned earnings data.
-    """
-    cleaned = {}
-    for ticker, text in raw_data.items():
-        # Remove unwanted characters and normalize
-        cleaned_text = re.sub(r'\s+', ' ', text).strip()
-        cleaned[ticker] = cleaned_text
-    return cleaned
-
-if __name__ == "__main__":
-    # Example usage
-    tickers = ["TSM", "005930.KS"]
-    raw_data = scrape_earnings_data(tickers)
-    cleaned_data = clean_earnings_data(raw_data)
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+import re
+import os
+import json
+import math
+import heapq
+import hashlib
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+from data_ingestion.http_cache import get_response_cache
+from data_ingestion.politeness import BACKGROUND, INTERACTIVE, PolitenessScheduler, get_scheduler
+from data_ingestion.rate_limit import backoff_delay
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# (connect, read) timeouts in seconds for every scraper request
+DEFAULT_TIMEOUT = (3.05, 10)
+
+_WHITESPACE = re.compile(r'\s+')
+_NEWS_CLASS = re.compile(r'news')
+_HEADLINE_NODES = SoupStrainer(['h3', 'time'])
+
+try:
+    import lxml  # noqa: F401 - BeautifulSoup's 'lxml' tree builder
+    _LXML_PARSERS = ("strainer", "lxml")
+except ImportError:
+    _LXML_PARSERS = ()
+
+# Headline extraction backends, fastest first:
+#   stream      - stdlib tokenizer, no tree
+#   strainer    - lxml parse restricted to <h3> and <time> elements (needs lxml)
+#   lxml        - full lxml tree (needs lxml)
+#   html.parser - full pure-Python tree (original behaviour)
+PARSERS = ("stream", *_LXML_PARSERS, "html.parser")
+DEFAULT_PARSER = os.getenv("SCRAPER_PARSER", "stream")
+
+# Headlines kept per ticker, and how fast a headline's rank decays with age
+DEFAULT_TOP_N = 5
+RECENCY_HALF_LIFE_HOURS = 24.0
+
+_RELEVANCE_WEIGHTS = {
+    "earnings": 3.0, "eps": 2.0, "results": 1.0, "profit": 1.0, "revenue": 1.0, "sales": 1.0,
+    "guidance": 1.0, "outlook": 1.0, "forecast": 1.0, "estimates": 1.0, "quarter": 1.0,
+    "beat": 1.0, "beats": 1.0, "miss": 1.0, "missed": 1.0, "tops": 1.0,
+}
+_RELEVANCE_TERMS = re.compile(r'\b(' + '|'.join(_RELEVANCE_WEIGHTS) + r')\b')
+
+class Headline(NamedTuple):
+    """One ranked news headline for a ticker."""
+    title: str
+    published: Optional[str]
+    relevance: float
+
+def make_session(per_host=16):
+    """
+    Build a requests Session with a bounded keep-alive connection pool per host.
+    Args:
+        per_host (int): Maximum open connections to any one host. Extra requests wait for a free connection.
+    Returns:
+        requests.Session: Session to share across scraping threads.
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=per_host, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def fetch_page(
+    url,
+    headers=None,
+    cache=None,
+    session=None,
+    timeout=DEFAULT_TIMEOUT,
+    validators=None,
+    scheduler=None,
+    priority=INTERACTIVE
+):
+    """
+    Fetch a page, serving it from the persistent response cache while fresh and
+    revalidating with a conditional GET once it has expired.
+    Args:
+        url (str): Page URL.
+        headers (dict): Request headers. Defaults to HEADERS.
+        cache (ResponseCache): Response cache, or None to always go to the network.
+        session (requests.Session): Pooled session to reuse connections. A one-off request is made if None.
+        timeout (tuple): (connect, read) timeouts in seconds.
+        validators (dict): Stored ETag/Last-Modified for the URL, sent as If-None-Match/If-Modified-Since.
+        scheduler (PolitenessScheduler): Paces network requests per domain. Cache hits skip it.
+        priority (int): Scheduler priority, INTERACTIVE or BACKGROUND.
+    Returns:
+        tuple: (status, body, response headers). status is 304 and body is None when the
+        server reports the page unchanged.
+    """
+    if cache is not None:
+        cached = cache.get(url)
+        if cached is not None:
+            return cached[2], cached[0].decode("utf-8"), cached[1]
+    request_headers = dict(headers or HEADERS)
+    if validators:
+        if validators.get("etag"):
+            request_headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            request_headers["If-Modified-Since"] = validators["last_modified"]
+    if scheduler is not None:
+        with scheduler.slot(url, priority):
+            response = (session or requests).get(url, headers=request_headers, timeout=timeout)
+        if response.status_code == 429:
+            # Slow the whole domain down, not just this ticker
+            retry_after = str(response.headers.get("Retry-After", ""))
+            scheduler.pause(url, float(retry_after) if retry_after.isdigit() else backoff_delay(3))
+    else:
+        response = (session or requests).get(url, headers=request_headers, timeout=timeout)
+    if response.status_code == 304:
+        return 304, None, dict(response.headers)
+    response.raise_for_status()
+    kept = {name: response.headers[name] for name in ("Content-Type", "ETag", "Last-Modified") if name in response.headers}
+    if cache is not None:
+        cache.set(url, response.text, headers=kept, status=response.status_code)
+    return response.status_code, response.text, kept
+
+class _HeadlineTokenizer(HTMLParser):
+    """Emits ("h3", text) for news headlines and ("time", datetime) without building a document tree."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.nodes = []
+        self._parts = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'h3' and self._parts is None:
+            classes = next((value for name, value in attrs if name == 'class'), None)
+            if classes and _NEWS_CLASS.search(classes):
+                self._parts = []
+        elif tag == 'time':
+            published = next((value for name, value in attrs if name == 'datetime'), None)
+            if published:
+                self.nodes.append(('time', published))
+
+    def handle_endtag(self, tag):
+        if tag == 'h3' and self._parts is not None:
+            self.nodes.append(('h3', ''.join(self._parts)))
+            self._parts = None
+
+    def handle_data(self, data):
+        if self._parts is not None:
+            self._parts.append(data)
+
+def _stream_nodes(html, chunk_size=16384):
+    # Feed the page in chunks and hand nodes out as they complete, so no node list grows with the page
+    tokenizer = _HeadlineTokenizer()
+    for start in range(0, len(html), chunk_size):
+        tokenizer.feed(html[start:start + chunk_size])
+        yield from tokenizer.nodes
+        tokenizer.nodes.clear()
+    tokenizer.close()
+    yield from tokenizer.nodes
+
+def _iter_nodes(html, parser):
+    if parser == "stream":
+        yield from _stream_nodes(html)
+        return
+    if parser in ("strainer", "lxml") and not _LXML_PARSERS:
+        raise ValueError(f"Parser {parser!r} needs lxml, which is not installed; use one of {PARSERS}")
+    if parser == "strainer":
+        soup = BeautifulSoup(html, 'lxml', parse_only=_HEADLINE_NODES)
+    elif parser in ("lxml", "html.parser"):
+        soup = BeautifulSoup(html, parser)
+    else:
+        raise ValueError(f"Unknown parser {parser!r}; expected one of {PARSERS}")
+    for node in soup.find_all(['h3', 'time']):
+        if node.name == 'h3':
+            if _NEWS_CLASS.search(' '.join(node.get('class') or ())):
+                yield 'h3', node.get_text()
+        elif node.get('datetime'):
+            yield 'time', node['datetime']
+
+def iter_headline_items(html, parser=DEFAULT_PARSER):
+    """
+    Yield news headlines with the timestamp of their story, in page order.
+    A headline takes the first <time datetime=...> that follows it before the next headline.
+    Args:
+        html (str): Page body.
+        parser (str): One of PARSERS.
+    Yields:
+        tuple: (headline text, ISO timestamp string or None).
+    """
+    pending = None
+    for kind, value in _iter_nodes(html, parser):
+        if kind == 'h3':
+            if pending is not None:
+                yield pending, None
+            pending = value
+        elif pending is not None:
+            yield pending, value
+            pending = None
+    if pending is not None:
+        yield pending, None
+
+def extract_headlines(html, parser=DEFAULT_PARSER):
+    """
+    Extract the text of news headline <h3> elements from a page.
+    Args:
+        html (str): Page body.
+        parser (str): One of PARSERS.
+    Returns:
+        list: Headline texts in page order.
+    """
+    return [text for kind, text in _iter_nodes(html, parser) if kind == 'h3']
+
+def _age_hours(published, now):
+    if not published:
+        return None
+    try:
+        stamp = datetime.fromisoformat(published.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return max((now - stamp).total_seconds() / 3600.0, 0.0)
+
+def rank_headlines(
+    items, ticker, top_n=DEFAULT_TOP_N, now=None, half_life_hours=RECENCY_HALF_LIFE_HOURS, keep_best=None
+):
+    """
+    Dedupe, score and keep the best headlines in one pass over (text, published) items.
+    Relevance is the summed weight of earnings terms in the headline (plus one for a
+    ticker mention); headlines with no relevant terms are dropped. Rank halves every
+    half_life_hours of age, and undated headlines count as one half-life old.
+    Args:
+        items (iterable): (headline text, ISO timestamp or None) pairs, e.g. from iter_headline_items.
+        ticker (str): Ticker the page belongs to.
+        top_n (int): Maximum headlines to keep.
+        now (datetime): Reference time for ages. Defaults to the current UTC time.
+        half_life_hours (float): Age at which a headline's rank halves.
+        keep_best (callable): Optional predicate on headline text. The best-ranked matching
+            headline is appended after the top_n if it did not make the cut.
+    Returns:
+        list: Headline records, best first, plus the keep_best headline if it was appended.
+    """
+    now = now or datetime.now(timezone.utc)
+    symbol = ticker.lower().split('.')[0]
+    seen = set()
+    heap = []
+    best = None
+    for position, (text, published) in enumerate(items):
+        title = _clean_text(text)
+        key = title.lower()
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        terms = set(_RELEVANCE_TERMS.findall(key))
+        relevance = sum(_RELEVANCE_WEIGHTS[term] for term in terms) + (1.0 if symbol in key.split() else 0.0)
+        if relevance <= 0:
+            continue
+        age = _age_hours(published, now)
+        age = half_life_hours if age is None else age
+        # Log-space score keeps very old headlines comparable instead of underflowing to 0
+        score = math.log(relevance) - math.log(2) * age / half_life_hours
+        entry = (score, -position, Headline(title, published, relevance))
+        if keep_best is not None and (best is None or entry > best) and keep_best(title):
+            best = entry
+        if len(heap) < top_n:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    ranked = sorted(heap, reverse=True)
+    if best is not None and best not in heap:
+        ranked.append(best)
+    return [headline for _, _, headline in ranked]
+
+def parse_headlines(html, ticker, parser=DEFAULT_PARSER, top_n=DEFAULT_TOP_N, keep_best=None):
+    """
+    Extract the top-N relevant headlines for a ticker from a news page.
+    Args:
+        html (str): Page body.
+        ticker (str): Ticker the page belongs to.
+        parser (str): One of PARSERS.
+        top_n (int): Maximum headlines to keep.
+        keep_best (callable): Optional predicate; see rank_headlines.
+    Returns:
+        list: Headline records, best first.
+    """
+    return rank_headlines(iter_headline_items(html, parser), ticker, top_n, keep_best=keep_best)
+
+def _earnings_headline(headlines, ticker):
+    for headline in headlines:
+        if _is_earnings(headline.title):
+            return headline.title.lower()
+    return f"No recent earnings news for {ticker}"
+
+def _is_earnings(text):
+    return "earnings" in text.lower()
+
+def _cached_headlines(validators):
+    try:
+        return [Headline(*item) for item in json.loads(validators["result"])]
+    except (TypeError, ValueError):
+        # Rows written before headlines were stored as JSON: parse the page again
+        return None
+
+def _scrape_ticker(ticker, base_url, cache, session, timeout, parser, top_n, scheduler, priority):
+    try:
+        # Construct URL (mock example, adjust for actual source)
+        url = f"{base_url}/{ticker}/news"
+        validators = cache.get_validators(url) if cache is not None else None
+        status, body, headers = fetch_page(
+            url, cache=cache, session=session, timeout=timeout, validators=validators,
+            scheduler=scheduler, priority=priority
+        )
+
+        # Unchanged page (304 or same bytes): reuse the ranked headlines instead of parsing again
+        cached = _cached_headlines(validators) if validators is not None else None
+        if status == 304 and cached is not None:
+            return cached
+        content_hash = hashlib.sha256(body.encode("utf-8")).hexdigest() if body is not None else None
+        if cached is not None and validators["content_hash"] == content_hash:
+            return cached
+        if body is None:
+            status, body, headers = fetch_page(
+                url, cache=cache, session=session, timeout=timeout, scheduler=scheduler, priority=priority
+            )
+            content_hash = hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+        # Keep the best earnings headline even when other news outranks it, for scrape_earnings_data
+        headlines = parse_headlines(body, ticker, parser, top_n, keep_best=_is_earnings)
+        if cache is not None:
+            cache.set_validators(
+                url,
+                content_hash,
+                json.dumps([list(headline) for headline in headlines]),
+                etag=headers.get("ETag"),
+                last_modified=headers.get("Last-Modified")
+            )
+        return headlines
+    except Exception as e:
+        print(f"Error scraping data for {ticker}: {e}")
+        return None
+
+def _scrape_all(tickers, base_url, cache, max_workers, per_host, timeout, parser, top_n, scheduler, priority):
+    cache = cache if cache is not None else get_response_cache()
+    scheduler = scheduler if scheduler is not None else get_scheduler()
+    tickers = list(tickers)
+
+    with make_session(per_host) as session:
+        def scrape(ticker):
+            return _scrape_ticker(ticker, base_url, cache, session, timeout, parser, top_n, scheduler, priority)
+
+        if max_workers > 1 and len(tickers) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers)), thread_name_prefix="scraper") as pool:
+                results = list(pool.map(scrape, tickers))
+        else:
+            results = [scrape(ticker) for ticker in tickers]
+
+    return dict(zip(tickers, results))
+
+def scrape_headlines(
+    tickers,
+    base_url="https://finance.yahoo.com/quote",
+    cache=None,
+    max_workers=1,
+    per_host=16,
+    timeout=DEFAULT_TIMEOUT,
+    parser=DEFAULT_PARSER,
+    top_n=DEFAULT_TOP_N,
+    scheduler=None,
+    priority=INTERACTIVE
+):
+    """
+    Scrape the top-N relevant news headlines per ticker, ranked by recency and relevance.
+    Args:
+        tickers (list): List of ticker symbols.
+        base_url (str): Base URL for scraping (e.g., Yahoo Finance).
+        cache (ResponseCache): Response cache. Defaults to the shared cache from get_response_cache().
+        max_workers (int): Pages fetched concurrently.
+        per_host (int): Maximum open connections to one host in the shared session pool.
+        timeout (tuple): (connect, read) timeouts in seconds per request.
+        parser (str): Headline extraction backend, one of PARSERS.
+        top_n (int): Maximum headlines kept per ticker.
+        scheduler (PolitenessScheduler): Per-domain pacing. Defaults to the shared get_scheduler().
+        priority (int): INTERACTIVE for user-facing calls, BACKGROUND for refreshes.
+    Returns:
+        dict: Ticker -> list of Headline records, best first (empty if the page could not be scraped).
+    """
+    results = _scrape_all(tickers, base_url, cache, max_workers, per_host, timeout, parser, top_n, scheduler, priority)
+    return {ticker: (headlines or [])[:top_n] for ticker, headlines in results.items()}
+
+def scrape_earnings_data(
+    tickers,
+    base_url="https://finance.yahoo.com/quote",
+    cache=None,
+    max_workers=1,
+    per_host=16,
+    timeout=DEFAULT_TIMEOUT,
+    parser=DEFAULT_PARSER,
+    scheduler=None,
+    priority=INTERACTIVE
+):
+    """
+    Scrape earnings data for given tickers from a financial news site.
+    Args:
+        tickers (list): List of ticker symbols (e.g., ['TSM', '005930.KS']).
+        base_url (str): Base URL for scraping (e.g., Yahoo Finance).
+        cache (ResponseCache): Response cache. Defaults to the shared cache from get_response_cache().
+        max_workers (int): Pages fetched concurrently. 1 scrapes tickers one after another.
+        per_host (int): Maximum open connections to one host in the shared session pool.
+        timeout (tuple): (connect, read) timeouts in seconds per request.
+        parser (str): Headline extraction backend, one of PARSERS (default from SCRAPER_PARSER).
+        scheduler (PolitenessScheduler): Per-domain pacing. Defaults to the shared get_scheduler().
+        priority (int): INTERACTIVE for user-facing calls, BACKGROUND for refreshes.
+    Returns:
+        dict: Earnings data with ticker as key and the best-ranked earnings headline as value.
+    """
+    results = _scrape_all(
+        tickers, base_url, cache, max_workers, per_host, timeout, parser, DEFAULT_TOP_N, scheduler, priority
+    )
+    return {
+        ticker: _earnings_headline(headlines, ticker) if headlines is not None else f"Failed to scrape earnings for {ticker}"
+        for ticker, headlines in results.items()
+    }
+
+def _clean_text(text):
+    return _WHITESPACE.sub(' ', text).strip()
+
+def clean_earnings_data(raw_data):
+    """
+    Clean scraped earnings data for RAG.
+    Args:
+        raw_data (dict): Raw earnings data from scraper.
+    Returns:
+        dict: Cleaned earnings data.
+    """
+    cleaned = {}
+    for ticker, text in raw_data.items():
+        # Remove unwanted characters and normalize
+        cleaned[ticker] = _clean_text(text)
+    return cleaned
+
+if __name__ == "__main__":
+    # Example usage
+    tickers = ["TSM", "005930.KS"]
+    raw_data = scrape_earnings_data(tickers)
+    cleaned_data = clean_earnings_data(raw_data)
     print("Scraped Earnings Data:", cleaned_data)
\ No newline at end of file
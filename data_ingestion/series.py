@@ -0,0 +1,111 @@
+import numpy as np
+
+class HistoricalSeries:
+    """
+    Daily close/volume bars for one ticker, held as contiguous numpy arrays.
+
+    This is the in-memory form used from data_ingestion.api through the agents.
+    Call to_dict() only where a plain JSON-style mapping is actually needed.
+    """
+
+    __slots__ = ("dates", "close", "volume")
+
+    def __init__(self, dates, close, volume):
+        """
+        Args:
+            dates (array-like): Bar dates, convertible to datetime64[D].
+            close (array-like): Closing prices aligned with dates.
+            volume (array-like): Traded volume aligned with dates.
+        """
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.nan_to_num(np.asarray(volume, dtype=np.float64)).astype(np.int64)
+
+    @classmethod
+    def from_frame(cls, hist):
+        """
+        Build a series from a yfinance history DataFrame.
+        Args:
+            hist (DataFrame): Frame with a DatetimeIndex and Close/Volume columns.
+        Returns:
+            HistoricalSeries: Series with one entry per row.
+        """
+        index = hist.index
+        if getattr(index, "tz", None) is not None:
+            index = index.tz_localize(None)
+        return cls(index.values.astype("datetime64[D]"), hist["Close"].to_numpy(), hist["Volume"].to_numpy())
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a series from the legacy {"Close": {date: price}, "Volume": {date: volume}} form.
+        Args:
+            data (dict): Close and Volume mappings keyed by date.
+        Returns:
+            HistoricalSeries: Series sorted by date.
+        """
+        closes = data.get("Close", {})
+        volumes = data.get("Volume", {})
+        dates = sorted(closes, key=lambda d: np.datetime64(str(d)[:10], "D"))
+        return cls(
+            [str(d)[:10] for d in dates],
+            [closes[d] for d in dates],
+            [volumes.get(d, 0) for d in dates]
+        )
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], [])
+
+    def __len__(self):
+        return len(self.dates)
+
+    def last_close(self):
+        """
+        Return the most recent close, or None for an empty series.
+        """
+        return float(self.close[-1]) if len(self.close) else None
+
+    def pct_change(self):
+        """
+        Return the percentage change from the first to the last close, or None if undefined.
+        """
+        if len(self.close) < 2 or self.close[0] == 0:
+            return None
+        return float((self.close[-1] / self.close[0] - 1) * 100)
+
+    def to_dict(self):
+        """
+        Convert to the legacy {"Close": {date: price}, "Volume": {date: volume}} form for JSON output.
+        Returns:
+            dict: Close and Volume mappings keyed by ISO date string.
+        """
+        dates = self.dates.astype(str).tolist()
+        return {
+            "Close": dict(zip(dates, self.close.tolist())),
+            "Volume": dict(zip(dates, self.volume.tolist()))
+        }
+
+    def __repr__(self):
+        if not len(self):
+            return "HistoricalSeries(empty)"
+        change = self.pct_change()
+        change_text = f", change {change:+.2f}%" if change is not None else ""
+        return (
+            f"HistoricalSeries({len(self)} bars {self.dates[0]}..{self.dates[-1]}, "
+            f"close {self.close[0]:.2f}->{self.close[-1]:.2f}{change_text})"
+        )
+
+def as_series(data):
+    """
+    Coerce historical data in either form to a HistoricalSeries.
+    Args:
+        data (HistoricalSeries or dict): Series or legacy Close/Volume mapping.
+    Returns:
+        HistoricalSeries: The series, or an empty one if data is falsy.
+    """
+    if isinstance(data, HistoricalSeries):
+        return data
+    if not data:
+        return HistoricalSeries.empty()
+    return HistoricalSeries.from_dict(data)
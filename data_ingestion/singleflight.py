@@ -0,0 +1,147 @@
+import asyncio
+import functools
+import inspect
+import threading
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers that arrive while it is
+    still in flight wait for it and receive the same result (or exception).
+    Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.executions = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) unless an identical call is already in flight.
+        Args:
+            key (hashable): Identity of the call (e.g., ('historical', 'TSM', '1mo')).
+            fn (callable): Function to run.
+        Returns:
+            Any: Result of the shared execution.
+        """
+        if not self.enabled:
+            return fn(*args, **kwargs)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self.executions += 1
+                del self._calls[key]
+            call.event.set()
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """
+        Async counterpart of do() for coroutine functions on the running loop.
+        Args:
+            key (hashable): Identity of the call.
+            fn (callable): Coroutine function to run.
+        Returns:
+            Any: Result of the shared execution.
+        """
+        if not self.enabled:
+            return await fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        task = self._tasks.get(task_key)
+        if task is None:
+            task = loop.create_task(fn(*args, **kwargs))
+            self._tasks[task_key] = task
+            task.add_done_callback(lambda _: self._done(task_key))
+        else:
+            self.shared += 1
+        # shield so one cancelled waiter does not cancel the fetch for everyone else
+        return await asyncio.shield(task)
+
+    def _done(self, task_key):
+        self._tasks.pop(task_key, None)
+        with self._lock:
+            self.executions += 1
+
+    def coalesce(self, fn):
+        """
+        Decorator that coalesces calls whose bound arguments are equal.
+        Works for plain functions and coroutine functions.
+        """
+        signature = inspect.signature(fn)
+
+        def make_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (fn.__qualname__,) + tuple(_freeze(v) for v in bound.arguments.values())
+            hash(key)
+            return key
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    key = make_key(args, kwargs)
+                except TypeError:
+                    return await fn(*args, **kwargs)
+                return await self.do_async(key, fn, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                key = make_key(args, kwargs)
+            except TypeError:
+                return fn(*args, **kwargs)
+            return self.do(key, fn, *args, **kwargs)
+        return wrapper
+
+    def stats(self):
+        """
+        Return coalescing counters.
+        Returns:
+            dict: Upstream executions, calls that shared another call's result, and calls in flight.
+        """
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "shared": self.shared,
+                "in_flight": len(self._calls) + len(self._tasks)
+            }
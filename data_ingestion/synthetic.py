@@ -0,0 +1,160 @@
+import numpy as np
+from data_ingestion.providers import MarketDataProvider, PERIOD_DAYS
+from data_ingestion.series import HistoricalSeries
+
+_SUFFIXES = ("", ".KS", ".TW", ".T", ".HK")
+
+class SyntheticUniverse:
+    """
+    Deterministic fabricated market for scale testing.
+
+    Bars are generated per ticker on demand from (seed, ticker index), so a
+    10k-ticker, multi-year universe costs almost nothing until a ticker is
+    actually read, and the same seed always yields the same data.
+    """
+
+    def __init__(self, n_tickers=100, years=1, seed=0, end=None):
+        """
+        Args:
+            n_tickers (int): Number of tickers to fabricate.
+            years (int): Years of daily bars per ticker.
+            seed (int): Seed for every random draw.
+            end (str): Date of the last bar (YYYY-MM-DD). Defaults to today, so the incremental
+                history path, which asks for the days before today, finds bars.
+        """
+        self.seed = seed
+        self.tickers = [f"SYN{i:05d}{_SUFFIXES[i % len(_SUFFIXES)]}" for i in range(n_tickers)]
+        self._index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        end_day = np.busday_offset(np.datetime64(end or "today", "D"), 0, roll="backward")
+        start_day = end_day - np.timedelta64(int(years * 365), "D")
+        self.dates = np.arange(start_day, end_day + np.timedelta64(1, "D"), dtype="datetime64[D]")
+        self.dates = self.dates[np.is_busday(self.dates)]
+
+    def _rng(self, ticker, stream):
+        return np.random.default_rng([self.seed, self._index[ticker], stream])
+
+    def bars(self, ticker):
+        """
+        Generate daily OHLCV bars for one ticker (geometric Brownian motion).
+        Args:
+            ticker (str): Ticker from self.tickers.
+        Returns:
+            dict: "dates", "Open", "High", "Low", "Close" and "Volume" arrays.
+        """
+        rng = self._rng(ticker, 0)
+        n = len(self.dates)
+        start_price = rng.uniform(10, 500)
+        drift, vol = rng.uniform(-0.0002, 0.0008), rng.uniform(0.01, 0.035)
+        close = start_price * np.exp(np.cumsum(rng.normal(drift, vol, n)))
+        open_ = np.concatenate([[start_price], close[:-1]]) * np.exp(rng.normal(0, vol / 4, n))
+        spread = np.abs(rng.normal(0, vol / 2, n))
+        return {
+            "dates": self.dates,
+            "Open": open_,
+            "High": np.maximum(open_, close) * (1 + spread),
+            "Low": np.minimum(open_, close) * (1 - spread),
+            "Close": close,
+            "Volume": rng.lognormal(14, 1, n).astype(np.int64)
+        }
+
+    def history(self, ticker):
+        """
+        Return the full bar history for one ticker as a HistoricalSeries.
+        """
+        bars = self.bars(ticker)
+        return HistoricalSeries(bars["dates"], bars["Close"], bars["Volume"])
+
+    def quote(self, ticker):
+        """
+        Return a quote built from the ticker's last bar.
+        Returns:
+            dict: {"price": float, "volume": int, "market_cap": int}.
+        """
+        bars = self.bars(ticker)
+        shares = int(self._rng(ticker, 1).uniform(1e7, 5e9))
+        price = float(bars["Close"][-1])
+        return {"price": price, "volume": int(bars["Volume"][-1]), "market_cap": int(price * shares)}
+
+    def portfolios(self, n_holdings, holdings_per_portfolio=50):
+        """
+        Fabricate portfolios whose positions add up to n_holdings in total.
+        Args:
+            n_holdings (int): Total number of positions across all portfolios.
+            holdings_per_portfolio (int): Positions per portfolio (the last one may be smaller).
+        Returns:
+            list: Pairs of (portfolio, yesterday_portfolio) dicts mapping ticker to AUM weight.
+        """
+        rng = np.random.default_rng([self.seed, 2])
+        size = min(holdings_per_portfolio, len(self.tickers))
+        result = []
+        remaining = n_holdings
+        while remaining > 0:
+            count = min(size, remaining)
+            picks = rng.choice(len(self.tickers), size=count, replace=False)
+            allocation = rng.uniform(0.05, 0.4)
+            weights = rng.dirichlet(np.ones(count)) * allocation
+            drift = weights * np.exp(rng.normal(0, 0.05, count))
+            result.append((
+                {self.tickers[i]: float(w) for i, w in zip(picks, weights)},
+                {self.tickers[i]: float(w) for i, w in zip(picks, drift)}
+            ))
+            remaining -= count
+        return result
+
+    def earnings_headlines(self, tickers=None):
+        """
+        Fabricate one earnings headline per ticker, in the lowercase form the scraper produces.
+        Args:
+            tickers (list): Tickers to cover. Defaults to the whole universe.
+        Returns:
+            dict: Headline per ticker (e.g., "syn00001.ks q2 2025 earnings beat estimates by 4.2%").
+        """
+        last = self.dates[-1].astype(object)
+        period = f"q{(last.month - 1) // 3 + 1} {last.year}"
+        headlines = {}
+        for ticker in tickers if tickers is not None else self.tickers:
+            surprise = round(float(self._rng(ticker, 3).normal(0, 5)), 1)
+            verb = "beat" if surprise >= 0 else "missed"
+            headlines[ticker] = f"{ticker.lower()} {period} earnings {verb} estimates by {abs(surprise)}%"
+        return headlines
+
+class SyntheticProvider(MarketDataProvider):
+    """MarketDataProvider serving a SyntheticUniverse, for pipeline runs at scale."""
+
+    name = "synthetic"
+
+    def __init__(self, universe):
+        """
+        Args:
+            universe (SyntheticUniverse): Fabricated market to serve.
+        """
+        self.universe = universe
+
+    def get_quote(self, ticker):
+        if ticker not in self.universe._index:
+            raise LookupError(f"{ticker} is not in the synthetic universe")
+        return self.universe.quote(ticker)
+
+    def get_quotes(self, tickers):
+        return {ticker: self.universe.quote(ticker) for ticker in tickers if ticker in self.universe._index}
+
+    def get_history(self, ticker, period=None, start=None, end=None):
+        if ticker not in self.universe._index:
+            raise LookupError(f"{ticker} is not in the synthetic universe")
+        series = self.universe.history(ticker)
+        if start is not None:
+            mask = series.dates >= np.datetime64(start, "D")
+            if end is not None:
+                mask &= series.dates < np.datetime64(end, "D")
+        else:
+            days = PERIOD_DAYS.get(period or "1mo", 30)
+            mask = series.dates > series.dates[-1] - np.timedelta64(days, "D")
+        return HistoricalSeries(series.dates[mask], series.close[mask], series.volume[mask])
+
+if __name__ == "__main__":
+    universe = SyntheticUniverse(n_tickers=5, years=1)
+    print("Tickers:", universe.tickers)
+    print("Quote:", universe.quote(universe.tickers[0]))
+    print("History:", universe.history(universe.tickers[0]))
+    print("Portfolio:", universe.portfolios(n_holdings=3)[0][0])
+    print("Headlines:", universe.earnings_headlines(universe.tickers[:2]))
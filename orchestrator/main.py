@@ -1,126 +1,191 @@
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from typing import Optional
-import logging
-import os
-from pathlib import Path
-from dotenv import load_dotenv
-import uuid
-from contextlib import asynccontextmanager
-
-# Set up logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-# Load .env safely
-dotenv_path = Path(__file__).resolve().parent.parent / ".env"
-if dotenv_path.exists():
-    load_dotenv(dotenv_path=dotenv_path)
-    logger.info(f"Loaded environment variables from {dotenv_path}")
-else:
-    logger.warning(f".env file not found at {dotenv_path}")
-
-# Import agents and other modules
-try:
-    from agents.scraping_agent import ScrapingAgent
-    from agents.api_agent import APIAgent
-    from agents.retriever_agent import RetrieverAgent
-    from agents.analysis_agent import AnalysisAgent
-    from agents.language_agent import LanguageAgent
-    from agents.voice_agent import VoiceAgent
-    from data_ingestion.document_loader import load_documents
-    from orchestrator.router import process_query
-except ImportError as e:
-    logger.error(f"Failed to import modules: {str(e)}")
-    raise
-
-app = FastAPI(title="Finance Assistant Orchestrator")
-
-# Initialize agents
-try:
-    api_agent = APIAgent()
-    scraping_agent = ScrapingAgent()
-    retriever_agent = RetrieverAgent()
-    analysis_agent = AnalysisAgent()
-    language_agent = LanguageAgent()
-    voice_agent = VoiceAgent()
-except Exception as e:
-    logger.error(f"Error initializing agents: {str(e)}")
-    raise
-
-# Load and index documents
-def initialize_vector_store():
-    try:
-        document_path = os.getenv("DOCUMENT_PATH", "sample_earnings.pdf")
-        documents = load_documents(document_path)
-        if documents:
-            retriever_agent.index_documents(documents)
-            logger.info("Initialized vector store with documents")
-        else:
-            logger.error("No documents loaded for vector store")
-            raise RuntimeError("Failed to initialize vector store: No documents loaded")
-    except Exception as e:
-        logger.error(f"Error initializing vector store: {str(e)}")
-        raise
-
-# Lifespan event
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    initialize_vector_store()
-    yield
-
-app = FastAPI(title="Finance Assistant Orchestrator", lifespan=lifespan)
-
-# Request and response models
-class QueryRequest(BaseModel):
-    query: str
-    audio_file: Optional[UploadFile] = File(None)
-
-class QueryResponse(BaseModel):
-    response: str
-    audio_output: Optional[str] = None
-
-# Endpoint to process query
-@app.post("/process_query", response_model=QueryResponse)
-async def handle_query(request: QueryRequest):
-    try:
-        query = request.query
-        if request.audio_file:
-            audio_content = await request.audio_file.read()
-            query = voice_agent.speech_to_text(audio_content)
-            if not query:
-                return QueryResponse(response="Error transcribing audio.", audio_output=None)
-            logger.info(f"Transcribed audio to query: {query}")
-
-        response = process_query(
-            query=query,
-            api_agent=api_agent,
-            scraping_agent=scraping_agent,
-            retriever_agent=retriever_agent,
-            analysis_agent=analysis_agent,
-            language_agent=language_agent
-        )
-
-        audio_output = f"output_{uuid.uuid4()}.mp3"
-        success = voice_agent.text_to_speech(response, audio_output)
-        audio_path = audio_output if success and os.path.exists(audio_output) else None
-
-        return QueryResponse(response=response, audio_output=audio_path)
-
-    except FileNotFoundError as e:
-        logger.error(f"File error: {str(e)}")
-        return QueryResponse(response=f"File error: {str(e)}", audio_output=None)
-    except ValueError as e:
-        logger.error(f"Transcription error: {str(e)}")
-        return QueryResponse(response=f"Transcription error: {str(e)}", audio_output=None)
-    except Exception as e:
-        logger.error(f"Error processing query: {str(e)}")
-        return QueryResponse(response=f"Error: {str(e)}", audio_output=None)
-
-# Endpoint to download audio
-@app.get("/download_audio/{filename}")
-async def download_audio(filename: str):
-    if os.path.exists(filename):
-        return FileResponse(filename, media_type="audio/mpeg")
-    return {"error": "Audio file not found"}
\ No newline at end of file
+from fastapi import FastAPI, UploadFile, File
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from typing import Optional
+import asyncio
+import logging
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+import uuid
+from contextlib import asynccontextmanager
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Load .env safely
+dotenv_path = Path(__file__).resolve().parent.parent / ".env"
+if dotenv_path.exists():
+    load_dotenv(dotenv_path=dotenv_path)
+    logger.info(f"Loaded environment variables from {dotenv_path}")
+else:
+    logger.warning(f".env file not found at {dotenv_path}")
+
+# Import agents and other modules
+try:
+    from agents.scraping_agent import ScrapingAgent
+    from agents.api_agent import APIAgent
+    from agents.retriever_agent import RetrieverAgent
+    from agents.analysis_agent import AnalysisAgent
+    from agents.language_agent import LanguageAgent
+    from agents.voice_agent import VoiceAgent
+    from data_ingestion.document_loader import DocumentManifest, iter_documents
+    from data_ingestion.price_store import PriceStore
+    from orchestrator.router import run_pipeline
+    from orchestrator.scheduler import WarmupScheduler
+    from orchestrator.watcher import DocumentWatcher
+except ImportError as e:
+    logger.error(f"Failed to import modules: {str(e)}")
+    raise
+
+app = FastAPI(title="Finance Assistant Orchestrator")
+
+# Initialize agents
+try:
+    api_agent = APIAgent(price_store=PriceStore(os.getenv("PRICE_STORE_DIR", "data_ingestion/price_store")))
+    scraping_agent = ScrapingAgent()
+    # The index is saved here and memory-mapped on the next start; empty disables persistence
+    index_dir = os.getenv("INDEX_DIR", "data_ingestion/vector_index") or None
+    retriever_agent = RetrieverAgent(
+        near_duplicate_threshold=float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8")) or None,
+        index_dir=index_dir
+    )
+    analysis_agent = AnalysisAgent()
+    language_agent = LanguageAgent()
+    voice_agent = VoiceAgent()
+except Exception as e:
+    logger.error(f"Error initializing agents: {str(e)}")
+    raise
+
+# Files already in the index; startup and warmup refreshes only re-read what changed.
+# Saved next to the index, since it only describes what that index holds.
+document_manifest = DocumentManifest(os.path.join(index_dir, "manifest.json") if index_dir else None)
+
+# Load and index documents
+def initialize_vector_store():
+    try:
+        document_path = os.getenv("DOCUMENT_PATH", "sample_earnings.pdf")
+        # Streamed: files are read, cleaned, chunked and embedded a batch at a time
+        added = retriever_agent.index_documents(iter_documents(document_path, manifest=document_manifest))
+        if retriever_agent.vector_store is not None:
+            if added:
+                retriever_agent.save_index()
+            document_manifest.save()
+            logger.info(f"Initialized vector store with {added} new chunks")
+        else:
+            logger.error("No documents loaded for vector store")
+            raise RuntimeError("Failed to initialize vector store: No documents loaded")
+    except Exception as e:
+        logger.error(f"Error initializing vector store: {str(e)}")
+        raise
+
+# Pre-market warmup ahead of KRX and NYSE opens
+warmup_scheduler = WarmupScheduler(
+    api_agent=api_agent,
+    scraping_agent=scraping_agent,
+    analysis_agents={"default": analysis_agent},
+    refresh_index=initialize_vector_store,
+    markets=[m.strip() for m in os.getenv("WARMUP_MARKETS", "KRX,NYSE").split(",") if m.strip()],
+    lead_minutes=int(os.getenv("WARMUP_LEAD_MINUTES", "15")),
+    max_age_minutes=int(os.getenv("WARMUP_MAX_AGE_MINUTES", "20"))
+)
+
+# Hot ingestion: files dropped into WATCH_DIRS (comma-separated) are indexed while serving
+document_watcher = DocumentWatcher(
+    retriever_agent,
+    directories=[d.strip() for d in os.getenv("WATCH_DIRS", "").split(",") if d.strip()],
+    interval_seconds=float(os.getenv("WATCH_INTERVAL_SECONDS", "10")),
+    manifest_dir=index_dir
+)
+
+# Lifespan event
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The index is loaded and built here, not at import, so importing the app stays cheap
+    if not retriever_agent.load_index():
+        # Saved manifests describe a saved index; without one every file has to be read again
+        for manifest in [document_manifest, *document_watcher.manifests.values()]:
+            manifest.entries.clear()
+    initialize_vector_store()
+    if os.getenv("WARMUP_ENABLED", "1") == "1":
+        warmup_scheduler.start()
+    if document_watcher.directories:
+        document_watcher.start()
+    yield
+    await warmup_scheduler.stop()
+    document_watcher.stop(timeout=30)
+
+app = FastAPI(title="Finance Assistant Orchestrator", lifespan=lifespan)
+
+# Request and response models
+class QueryRequest(BaseModel):
+    query: str
+    audio_file: Optional[UploadFile] = File(None)
+
+class QueryResponse(BaseModel):
+    response: str
+    audio_output: Optional[str] = None
+
+# Endpoint to process query
+@app.post("/process_query", response_model=QueryResponse)
+async def handle_query(request: QueryRequest):
+    try:
+        query = request.query
+        if request.audio_file:
+            audio_content = await request.audio_file.read()
+            query = await asyncio.to_thread(voice_agent.speech_to_text, audio_content)
+            if not query:
+                return QueryResponse(response="Error transcribing audio.", audio_output=None)
+            logger.info(f"Transcribed audio to query: {query}")
+
+        # The pipeline blocks on network, embeddings and the LLM; keep it off the event loop
+        response = await asyncio.to_thread(
+            run_pipeline,
+            query=query,
+            api_agent=api_agent,
+            scraping_agent=scraping_agent,
+            retriever_agent=retriever_agent,
+            analysis_agent=analysis_agent,
+            language_agent=language_agent,
+            # Pre-open warmup results, while fresh, spare the first queries the full fetch
+            prepared=warmup_scheduler.prepared("default")
+        )
+
+        audio_output = f"output_{uuid.uuid4()}.mp3"
+        # Path of the saved file, or None if speech synthesis failed
+        audio_path = await asyncio.to_thread(voice_agent.text_to_speech, response, audio_output)
+
+        return QueryResponse(response=response, audio_output=audio_path)
+
+    except FileNotFoundError as e:
+        logger.error(f"File error: {str(e)}")
+        return QueryResponse(response=f"File error: {str(e)}", audio_output=None)
+    except ValueError as e:
+        logger.error(f"Transcription error: {str(e)}")
+        return QueryResponse(response=f"Transcription error: {str(e)}", audio_output=None)
+    except Exception as e:
+        logger.error(f"Error processing query: {str(e)}")
+        return QueryResponse(response=f"Error: {str(e)}", audio_output=None)
+
+# Endpoint to download audio
+@app.get("/download_audio/{filename}")
+async def download_audio(filename: str):
+    if os.path.exists(filename):
+        return FileResponse(filename, media_type="audio/mpeg")
+    return {"error": "Audio file not found"}
+
+# Endpoint to inspect the pre-market warmup schedule
+@app.get("/warmup_status")
+async def warmup_status():
+    return warmup_scheduler.status()
+
+# Endpoint to inspect the watched-directory ingestion
+@app.get("/watcher_status")
+async def watcher_status():
+    return document_watcher.status()
+
+# Endpoint to inspect per-domain scraping queues
+@app.get("/scraper_status")
+async def scraper_status():
+    return scraping_agent.scheduler_stats()
\ No newline at end of file
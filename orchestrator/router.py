@@ -1,43 +1,90 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
-from agents.api_agent import APIAgent
-from agents.scraping_agent import ScrapingAgent
-from agents.retriever_agent import RetrieverAgent
-from agents.analysis_agent import AnalysisAgent
-from agents.language_agent import LanguageAgent
-from agents.voice_agent import VoiceAgent
-
-router = APIRouter()
-
-class QueryInput(BaseModel):
-    query: str
-    audio_file: str = None
-
-@router.post("/process")
-async def process_query(input: QueryInput):
-    api_agent = APIAgent()
-    scraping_agent = ScrapingAgent()
-    retriever_agent = RetrieverAgent()
-    analysis_agent = AnalysisAgent()
-    language_agent = LanguageAgent()
-    voice_agent = VoiceAgent()
-
-    query = voice_agent.speech_to_text(input.audio_file) if input.audio_file else input.query
-    market_data = api_agent.get_market_data()
-    scraped_data = scraping_agent.get_earnings_data(query)
-    retriever_agent.index(scraped_data)
-    context = retriever_agent.retrieve(query)
-
-    if not context:
-        fallback = "Please clarify your query."
-        output_audio = voice_agent.text_to_speech(fallback)
-        return {"response": fallback, "audio": output_audio}
-
-    exposure = analysis_agent.calculate_exposure(market_data)
-    earnings_surprise = analysis_agent.check_earnings_surprise(market_data.get("TSM", {}), "TSM")
-    earnings_text = f"TSMC beat estimates by {earnings_surprise:.1f}%." if earnings_surprise else "No earnings data."
-    context_text = context[0].page_content if context else "Neutral sentiment."
-    narrative = language_agent.generate_narrative(exposure, earnings_text, context_text)
-    output_audio = voice_agent.text_to_speech(narrative)
-
+from typing import Dict, Optional
+from fastapi import APIRouter
+from pydantic import BaseModel
+from agents.api_agent import APIAgent
+from agents.scraping_agent import ScrapingAgent
+from agents.retriever_agent import RetrieverAgent
+from agents.analysis_agent import AnalysisAgent
+from agents.language_agent import LanguageAgent
+from agents.voice_agent import VoiceAgent
+
+router = APIRouter()
+
+# Shared across requests so headlines indexed by earlier queries are not embedded again
+_retriever_agent = None
+
+def get_retriever_agent():
+    global _retriever_agent
+    if _retriever_agent is None:
+        _retriever_agent = RetrieverAgent()
+    return _retriever_agent
+
+def run_pipeline(
+    query: str,
+    api_agent: APIAgent,
+    scraping_agent: ScrapingAgent,
+    retriever_agent: RetrieverAgent,
+    analysis_agent: AnalysisAgent,
+    language_agent: LanguageAgent,
+    prepared: Optional[Dict] = None
+) -> str:
+    """
+    Answer one query: market data, earnings, retrieval and analysis feed the narrative.
+    Blocking (network, embeddings, LLM); call it from a worker thread inside the event loop.
+    Args:
+        query (str): User query.
+        api_agent (APIAgent): Market data source.
+        scraping_agent (ScrapingAgent): Earnings source.
+        retriever_agent (RetrieverAgent): Document index.
+        analysis_agent (AnalysisAgent): Portfolio analysis.
+        language_agent (LanguageAgent): Narrative generation.
+        prepared (Dict, optional): Fresh warmup results (WarmupScheduler.prepared); their market
+            data, earnings and analysis are used instead of being fetched and computed again.
+    Returns:
+        str: Narrative answering the query.
+    """
+    if prepared is not None:
+        market_data, earnings_data = prepared["market_data"], prepared["earnings"]
+    else:
+        market_data = api_agent.get_market_data()
+        earnings_data = scraping_agent.get_earnings_data()
+    retrieved = retriever_agent.retrieve(query) or []
+    if prepared is not None:
+        analysis = prepared["analysis"]
+    else:
+        analysis = analysis_agent.analyze_risk_exposure(market_data, earnings_data)
+    return language_agent.generate_narrative(query, market_data, [doc for doc, _ in retrieved], analysis)
+
+class QueryInput(BaseModel):
+    query: str
+    audio_file: str = None
+
+@router.post("/process")
+async def process_query(input: QueryInput):
+    api_agent = APIAgent()
+    scraping_agent = ScrapingAgent()
+    retriever_agent = get_retriever_agent()
+    analysis_agent = AnalysisAgent()
+    language_agent = LanguageAgent()
+    voice_agent = VoiceAgent()
+
+    query = voice_agent.speech_to_text(input.audio_file) if input.audio_file else input.query
+    market_data = api_agent.get_market_data()
+    # Portfolio tickers; the free-text query is for retrieval, not a ticker list
+    scraped_data = scraping_agent.get_earnings_data()
+    retriever_agent.index(scraped_data)
+    context = retriever_agent.retrieve(query)
+
+    if not context:
+        fallback = "Please clarify your query."
+        output_audio = voice_agent.text_to_speech(fallback)
+        return {"response": fallback, "audio": output_audio}
+
+    exposure = analysis_agent.calculate_exposure(market_data)
+    earnings_surprise = analysis_agent.check_earnings_surprise(scraped_data, "TSM")
+    earnings_text = f"TSMC beat estimates by {earnings_surprise:.1f}%." if earnings_surprise else "No earnings data."
+    context_text = context[0].page_content if context else "Neutral sentiment."
+    narrative = language_agent.generate_narrative(exposure, earnings_text, context_text)
+    output_audio = voice_agent.text_to_speech(narrative)
+
     return {"response": narrative, "audio": output_audio}
\ No newline at end of file
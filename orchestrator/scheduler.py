@@ -0,0 +1,198 @@
+import asyncio
+import logging
+from datetime import datetime, time, timedelta, timezone
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from zoneinfo import ZoneInfo
+from data_ingestion.politeness import BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+# Regular session open per market, in the exchange's local time
+MARKET_OPENS = {
+    "KRX": ("Asia/Seoul", time(9, 0)),
+    "NYSE": ("America/New_York", time(9, 30)),
+}
+
+def next_warmup(markets: Iterable[str], lead: timedelta, now: Optional[datetime] = None) -> Optional[Tuple[datetime, str]]:
+    """
+    Find the next pre-open warmup across markets.
+    Args:
+        markets (Iterable[str]): Market codes from MARKET_OPENS (e.g., ["KRX", "NYSE"]).
+        lead (timedelta): How long before the open to warm up.
+        now (datetime, optional): Timezone-aware current time. Defaults to now in UTC.
+    Returns:
+        Optional[Tuple[datetime, str]]: UTC time of the next warmup and the market it is for,
+        or None if there are no markets to warm up for.
+    """
+    now = now or datetime.now(timezone.utc)
+    candidates = []
+    for market in markets:
+        tz_name, open_time = MARKET_OPENS[market]
+        tz = ZoneInfo(tz_name)
+        local_day = now.astimezone(tz).date()
+        for offset in range(8):
+            day = local_day + timedelta(days=offset)
+            if day.weekday() >= 5:
+                continue
+            run_at = (datetime.combine(day, open_time, tzinfo=tz) - lead).astimezone(timezone.utc)
+            if run_at > now:
+                candidates.append((run_at, market))
+                break
+    return min(candidates, default=None)
+
+class WarmupScheduler:
+    """
+    Runs the morning-brief pipeline ahead of each configured market open.
+
+    A warmup fetches quotes and history (filling the APIAgent quote cache and
+    price store), scrapes earnings (filling the response cache), refreshes the
+    retriever index and precomputes the analysis for every portfolio, so the
+    first request of the day finds warm state instead of doing all of it inline.
+    """
+
+    def __init__(
+        self,
+        api_agent,
+        scraping_agent,
+        analysis_agents: Dict[str, object],
+        refresh_index: Optional[Callable[[], None]] = None,
+        markets: Iterable[str] = ("KRX", "NYSE"),
+        lead_minutes: int = 15,
+        max_age_minutes: int = 20
+    ):
+        """
+        Args:
+            api_agent (APIAgent): Agent whose caches should be warmed.
+            scraping_agent (ScrapingAgent): Agent used to prefetch earnings.
+            analysis_agents (Dict[str, AnalysisAgent]): One AnalysisAgent per portfolio name.
+            refresh_index (Callable, optional): Rebuilds or refreshes the retriever index.
+            markets (Iterable[str]): Market codes from MARKET_OPENS.
+            lead_minutes (int): Minutes before each open to run.
+            max_age_minutes (int): How long a warmup's results are served to queries (see prepared);
+                the default covers the lead time plus the first minutes after the open.
+        """
+        markets = tuple(markets)
+        if not markets:
+            raise ValueError(f"No markets to warm up for; expected some of {sorted(MARKET_OPENS)}")
+        unknown = set(markets) - set(MARKET_OPENS)
+        if unknown:
+            raise ValueError(f"Unknown markets: {sorted(unknown)}")
+        self.api_agent = api_agent
+        self.scraping_agent = scraping_agent
+        self.analysis_agents = analysis_agents
+        self.refresh_index = refresh_index
+        self.markets = markets
+        self.lead = timedelta(minutes=lead_minutes)
+        self.max_age = timedelta(minutes=max_age_minutes)
+        self.latest: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def warmup(self, market: str = "manual") -> Dict:
+        """
+        Run one warmup pass and keep its results in self.latest.
+        Args:
+            market (str): Market the pass is for (used for reporting only).
+        Returns:
+            Dict: Prepared market data, earnings and per-portfolio analysis.
+        """
+        started = datetime.now(timezone.utc)
+        logger.info("Starting pre-market warmup for %s", market)
+        market_data, earnings = await asyncio.gather(
+            asyncio.to_thread(self.api_agent.get_market_data),
+            # Background priority so user queries arriving mid-warmup are scraped first
+            asyncio.to_thread(self.scraping_agent.get_earnings_data, priority=BACKGROUND)
+        )
+        if self.refresh_index is not None:
+            await asyncio.to_thread(self.refresh_index)
+        # Off the event loop, like the fetches: queries keep being served meanwhile
+        analysis = await asyncio.to_thread(lambda: {
+            name: agent.analyze_risk_exposure(market_data, earnings)
+            for name, agent in self.analysis_agents.items()
+        })
+        self.latest = {
+            "market": market,
+            "prepared_at": datetime.now(timezone.utc).isoformat(),
+            "duration_seconds": (datetime.now(timezone.utc) - started).total_seconds(),
+            "market_data": market_data,
+            "earnings": earnings,
+            "analysis": analysis
+        }
+        logger.info("Pre-market warmup for %s finished in %.1fs", market, self.latest["duration_seconds"])
+        return self.latest
+
+    async def run(self):
+        """
+        Sleep until each upcoming warmup time and run it, forever (or until there is nothing to schedule).
+        """
+        while True:
+            scheduled = next_warmup(self.markets, self.lead)
+            if scheduled is None:
+                logger.warning("No pre-market warmup to schedule for markets %s", list(self.markets))
+                return
+            run_at, market = scheduled
+            delay = (run_at - datetime.now(timezone.utc)).total_seconds()
+            logger.info("Next pre-market warmup for %s at %s", market, run_at.isoformat())
+            await asyncio.sleep(max(delay, 0))
+            try:
+                await self.warmup(market)
+            except Exception as e:
+                logger.error("Pre-market warmup for %s failed: %s", market, str(e), exc_info=True)
+
+    def start(self):
+        """
+        Schedule run() on the running event loop.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        """
+        Cancel the scheduling loop.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def prepared(self, portfolio: str = "default", now: Optional[datetime] = None) -> Optional[Dict]:
+        """
+        The last warmup's results for one portfolio, if still fresh enough to answer a query with.
+        Args:
+            portfolio (str): Portfolio name from analysis_agents.
+            now (datetime, optional): Timezone-aware current time. Defaults to now in UTC.
+        Returns:
+            Optional[Dict]: {"market_data", "earnings", "analysis"}, or None if there is no warmup
+            younger than max_age for this portfolio.
+        """
+        latest = self.latest
+        if not latest or portfolio not in latest["analysis"]:
+            return None
+        now = now or datetime.now(timezone.utc)
+        if now - datetime.fromisoformat(latest["prepared_at"]) > self.max_age:
+            return None
+        return {
+            "market_data": latest["market_data"],
+            "earnings": latest["earnings"],
+            "analysis": latest["analysis"][portfolio]
+        }
+
+    def status(self) -> Dict:
+        """
+        Summarize the schedule and the last warmup (without the bulky payloads).
+        Returns:
+            Dict: Next run (None if nothing is scheduled), markets and last warmup metadata.
+        """
+        run_at, market = next_warmup(self.markets, self.lead) or (None, None)
+        last = None
+        if self.latest:
+            last = {key: self.latest[key] for key in ("market", "prepared_at", "duration_seconds")}
+        return {
+            "markets": list(self.markets),
+            "next_run": run_at.isoformat() if run_at else None,
+            "next_market": market,
+            "last_warmup": last,
+            "running": self._task is not None and not self._task.done()
+        }
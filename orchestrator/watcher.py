@@ -0,0 +1,130 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+from data_ingestion.document_loader import DocumentManifest, iter_documents
+
+logger = logging.getLogger(__name__)
+
+def _manifest_path(manifest_dir: str, directory: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(directory).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(manifest_dir, f"watch-{digest}.json")
+
+class DocumentWatcher:
+    """
+    Polls directories for new or changed documents and indexes them into a live RetrieverAgent.
+
+    Each directory keeps its own DocumentManifest, so a poll only stats unchanged
+    files and reads the ones whose size, mtime or content moved. New chunks are
+    embedded on the watcher thread and merged into the running index; queries are
+    served throughout. A changed file's earlier chunks are deleted once its new
+    version is indexed, and a deleted file's chunks are dropped.
+    """
+
+    def __init__(
+        self,
+        retriever_agent,
+        directories: Iterable[str],
+        interval_seconds: float = 10.0,
+        manifest_dir: Optional[str] = None
+    ):
+        """
+        Args:
+            retriever_agent (RetrieverAgent): Agent whose index receives the new chunks.
+            directories (Iterable[str]): Directories (or single files) to watch.
+            interval_seconds (float): Pause between polls.
+            manifest_dir (str, optional): Where to keep each directory's manifest, next to the
+                saved index. None keeps them in memory, so every file is read again after a restart.
+        """
+        self.retriever_agent = retriever_agent
+        self.directories = tuple(directories)
+        self.interval_seconds = interval_seconds
+        self.manifests = {
+            directory: DocumentManifest(_manifest_path(manifest_dir, directory) if manifest_dir else None)
+            for directory in self.directories
+        }
+        self.polls = 0
+        self.chunks_added = 0
+        self.last_poll: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> int:
+        """
+        Index whatever changed in the watched directories since the previous poll.
+        Returns:
+            int: Number of chunks embedded and added.
+        """
+        added = 0
+        for directory, manifest in self.manifests.items():
+            documents = iter_documents(directory, manifest=manifest, include_mock=False)
+            indexed = self.retriever_agent.index_documents(documents)
+            # iter_documents stages files no longer on disk; save() below forgets them
+            removed = self.retriever_agent.remove_sources(manifest.missing())
+            if indexed or removed:
+                # The saved index must hold the chunks before the manifest says they are done
+                self.retriever_agent.save_index()
+            added += indexed
+            # Only after indexing succeeded, so a failed poll re-reads the same files
+            manifest.save()
+        self.polls += 1
+        self.chunks_added += added
+        self.last_poll = datetime.now(timezone.utc).isoformat()
+        if added:
+            logger.info("Document watcher indexed %d new chunks", added)
+        return added
+
+    def run(self):
+        """
+        Poll until stop() is called, starting immediately.
+        """
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("Document watcher poll failed: %s", str(e), exc_info=True)
+            self._stop.wait(max(self.interval_seconds - (time.monotonic() - started), 0))
+
+    def start(self):
+        """
+        Run the polling loop on a daemon thread.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="document-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop polling and wait for an in-progress poll to finish.
+        Args:
+            timeout (float, optional): Seconds to wait for the thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self) -> Dict:
+        """
+        Summarize what the watcher has done.
+        Returns:
+            Dict: Watched directories, poll counts and the last poll time and error.
+        """
+        return {
+            "directories": list(self.directories),
+            "interval_seconds": self.interval_seconds,
+            "polls": self.polls,
+            "chunks_added": self.chunks_added,
+            "files_tracked": sum(len(manifest.entries) for manifest in self.manifests.values()),
+            "last_poll": self.last_poll,
+            "last_error": self.last_error,
+            "running": self._thread is not None and self._thread.is_alive()
+        }
@@ -0,0 +1,653 @@
+import asyncio
+import itertools
+import os
+import pytest
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from requests.exceptions import HTTPError
+from langchain.docstore.document import Document
+from data_ingestion.api import (
+    fetch_stock_data,
+    fetch_stock_data_bulk,
+    fetch_market_data_async,
+    fetch_historical_data,
+    fetch_historical_data_incremental,
+    set_provider
+)
+from data_ingestion.providers import CachingProvider, MarketDataProvider, RecordingProvider, ReplayProvider
+from data_ingestion.synthetic import SyntheticProvider, SyntheticUniverse
+from data_ingestion.http_cache import ResponseCache
+from data_ingestion.politeness import BACKGROUND, INTERACTIVE, PolitenessScheduler
+from data_ingestion.chunking import batched, chunk_document, chunk_documents
+from data_ingestion.dedupe import NearDuplicateFilter, content_hash
+from data_ingestion.document_loader import DocumentManifest, iter_pdf_documents, load_documents
+from data_ingestion.earnings import EarningsEvent, extract_earnings_events
+from data_ingestion.feeds import FeedItem, FeedReader, iter_feed_items
+from data_ingestion.index_store import VectorIndexStore, ensure_writable
+from data_ingestion.scraper import DEFAULT_TIMEOUT, scrape_earnings_data
+from data_ingestion import scraper
+from data_ingestion.price_store import PriceStore
+from data_ingestion.rate_limit import TokenBucket
+from data_ingestion.quote_cache import QuoteCache
+from data_ingestion.series import HistoricalSeries, as_series
+
+@pytest.fixture(autouse=True)
+def no_persistent_cache(monkeypatch):
+    # Keep the shared on-disk response cache out of unit tests
+    monkeypatch.setenv("HTTP_CACHE_PATH", "")
+    set_provider(None)
+    yield
+    set_provider(None)
+
+def _download_frame(tickers):
+    index = pd.to_datetime(["2025-05-27", "2025-05-28"])
+    columns = pd.MultiIndex.from_product([tickers, ["Close", "Volume"]])
+    rows = [[148.0 + i, 1000000] * len(tickers) for i in range(len(index))]
+    return pd.DataFrame(rows, index=index, columns=columns)
+
+@patch("data_ingestion.providers.yf.Ticker")
+@patch("data_ingestion.providers.yf.download")
+def test_fetch_stock_data_bulk(mock_download, mock_ticker):
+    mock_download.side_effect = lambda chunk, **kwargs: _download_frame(chunk)
+    result = fetch_stock_data_bulk(["TSM", "005930.KS", "TSM"])
+    assert mock_download.call_count == 1
+    assert list(result) == ["TSM", "005930.KS"]
+    assert result["TSM"]["price"] == 149.0
+    assert result["TSM"]["volume"] == 1000000
+    # Market cap would take a per-symbol request, so the bulk path leaves it unknown
+    assert result["TSM"]["market_cap"] is None
+    mock_ticker.assert_not_called()
+
+@patch("data_ingestion.providers.yf.download")
+def test_fetch_stock_data_bulk_missing_volume(mock_download):
+    frame = _download_frame(["TSM"])
+    frame.loc[frame.index[-1], ("TSM", "Volume")] = float("nan")
+    mock_download.return_value = frame
+    result = fetch_stock_data_bulk(["TSM"])
+    assert result["TSM"] == {"price": 149.0, "volume": 0, "market_cap": None}
+
+@patch("data_ingestion.providers.yf.download")
+def test_fetch_stock_data_bulk_chunks_and_fallback(mock_download):
+    mock_download.side_effect = lambda chunk, **kwargs: _download_frame([t for t in chunk if t != "TSM"])
+    result = fetch_stock_data_bulk(["TSM", "AAPL", "MSFT"], chunk_size=2)
+    assert mock_download.call_count == 2
+    assert result["TSM"]["price"] == 150.25  # mock fallback
+    assert result["MSFT"]["price"] == 149.0
+
+def test_token_bucket_pause_delays_acquire():
+    bucket = TokenBucket(rate=1000, capacity=1)
+
+    async def run():
+        await bucket.acquire()
+        bucket.pause(0.05)
+        start = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.04
+
+@patch("data_ingestion.providers.yf.Ticker")
+def test_fetch_market_data_async_retries_on_429(mock_ticker):
+    calls = {"count": 0}
+
+    def info():
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise HTTPError("429 Client Error: Too Many Requests")
+        return {"regularMarketPrice": 150, "regularMarketVolume": 1000, "marketCap": 10}
+
+    type(mock_ticker.return_value).info = property(lambda self: info())
+    mock_ticker.return_value.history.return_value = _download_frame(["TSM"])["TSM"]
+    limiter = TokenBucket(rate=1000, capacity=10)
+
+    result = asyncio.run(fetch_market_data_async(["TSM"], concurrency=2, limiter=limiter))
+    assert calls["count"] == 2
+    assert result["realtime"]["TSM"]["price"] == 150
+    assert len(result["historical"]["TSM"]) == 2
+
+def test_quote_cache_stale_while_revalidate():
+    cache = QuoteCache(ttls={"realtime": 0.01}, stale_ttls={"realtime": 60})
+    calls = []
+
+    def loader(keys):
+        calls.append(list(keys))
+        return {key: len(calls) for key in keys}
+
+    assert cache.get_many("realtime", ["TSM"], loader) == {"TSM": 1}
+    time.sleep(0.02)
+    assert cache.get_many("realtime", ["TSM"], loader) == {"TSM": 1}  # stale value served
+    cache._executor.shutdown(wait=True)
+    assert cache._entries[("realtime", "TSM")][0] == 2
+    assert cache.stats()["refreshes"] == 1
+    assert cache.stats()["stale_hits"] == 1
+
+@patch("data_ingestion.providers.yf.Ticker")
+def test_incremental_history_only_fetches_missing_bars(mock_ticker, tmp_path):
+    today = np.datetime64("today", "D")
+    days = [today - np.timedelta64(n, "D") for n in (20, 10)]
+    frame = pd.DataFrame({"Close": [148.0, 150.0], "Volume": [1000, 2000]}, index=pd.to_datetime([str(d) for d in days]))
+    mock_ticker.return_value.history.return_value = frame
+    store = PriceStore(str(tmp_path))
+
+    first = fetch_historical_data_incremental("TSM", store, lookback_days=30)
+    assert first.close.tolist() == [148.0, 150.0]
+    assert mock_ticker.return_value.history.call_count == 1
+
+    mock_ticker.return_value.history.return_value = frame.iloc[0:0]
+    fetch_historical_data_incremental("TSM", store, lookback_days=30)
+    fetch_historical_data_incremental("TSM", store, lookback_days=30)
+    assert mock_ticker.return_value.history.call_count == 1
+
+    longer = fetch_historical_data_incremental("TSM", store, lookback_days=90)
+    assert mock_ticker.return_value.history.call_count == 2
+    start = mock_ticker.return_value.history.call_args.kwargs["start"]
+    assert start == str(today - np.timedelta64(90, "D"))
+    assert len(longer) == 2
+
+    # Nothing came back for a range with trading days, so it was not marked as covered
+    older = today - np.timedelta64(60, "D")
+    mock_ticker.return_value.history.return_value = pd.DataFrame(
+        {"Close": [140.0], "Volume": [900]}, index=pd.to_datetime([str(older)])
+    )
+    assert fetch_historical_data_incremental("TSM", store, lookback_days=90).close.tolist() == [140.0, 148.0, 150.0]
+    assert mock_ticker.return_value.history.call_count == 3
+    fetch_historical_data_incremental("TSM", store, lookback_days=90)
+    assert mock_ticker.return_value.history.call_count == 3
+
+    # A few settled sessions answered without bars are holidays: the gap is closed, not retried
+    mock_ticker.return_value.history.return_value = frame.iloc[0:0]
+    fetch_historical_data_incremental("TSM", store, lookback_days=94)
+    assert mock_ticker.return_value.history.call_count == 4
+    assert fetch_historical_data_incremental("TSM", store, lookback_days=94).close.tolist() == [140.0, 148.0, 150.0]
+    assert mock_ticker.return_value.history.call_count == 4
+
+def test_historical_series_round_trip():
+    legacy = {"Close": {"2025-05-28": 150.25, "2025-05-01": 145.0}, "Volume": {"2025-05-01": 11000000, "2025-05-28": 12000000}}
+    series = HistoricalSeries.from_dict(legacy)
+    assert series.dates.tolist()[0].isoformat() == "2025-05-01"
+    assert series.last_close() == 150.25
+    assert round(series.pct_change(), 2) == 3.62
+    assert series.to_dict() == {
+        "Close": {"2025-05-01": 145.0, "2025-05-28": 150.25},
+        "Volume": {"2025-05-01": 11000000, "2025-05-28": 12000000}
+    }
+    assert as_series(series) is series
+    assert len(as_series({})) == 0
+
+@patch("data_ingestion.providers.yf.Ticker")
+def test_concurrent_identical_fetches_are_coalesced(mock_ticker):
+    def slow_history(**kwargs):
+        time.sleep(0.1)
+        return _download_frame(["TSM"])["TSM"]
+
+    mock_ticker.return_value.history.side_effect = slow_history
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(pool.map(lambda _: fetch_historical_data("TSM", period="1mo"), range(10)))
+    assert mock_ticker.return_value.history.call_count == 1
+    assert all(result is results[0] for result in results)
+
+class _StaticProvider(MarketDataProvider):
+    def get_quote(self, ticker):
+        return {"price": 150.0, "volume": 1000, "market_cap": 10}
+
+    def get_history(self, ticker, period=None, start=None, end=None):
+        return HistoricalSeries(["2025-05-01", "2025-05-27", "2025-05-28"], [145.0, 149.0, 150.25], [1, 2, 3])
+
+def test_record_replay_provider(tmp_path):
+    recorder = RecordingProvider(_StaticProvider(), str(tmp_path))
+    recorder.get_quotes(["TSM"])
+    recorder.get_history("TSM", period="1mo")
+
+    replay = ReplayProvider(str(tmp_path), latency=0.01)
+    set_provider(replay)
+    try:
+        start = time.monotonic()
+        assert fetch_stock_data("TSM")["price"] == 150.0
+        assert time.monotonic() - start >= 0.01
+        assert fetch_historical_data("TSM", period="5d").close.tolist() == [149.0, 150.25]
+        assert replay.get_history("TSM", start="2025-05-27", end="2025-05-28").close.tolist() == [149.0]
+        assert fetch_stock_data("AAPL")["price"] == 0  # replay miss falls back like a provider error
+    finally:
+        set_provider(None)
+
+def test_caching_provider_skips_empty_history(tmp_path):
+    inner = _StaticProvider()
+    provider = CachingProvider(inner, ResponseCache(str(tmp_path / "cache.sqlite")))
+    with patch.object(inner, "get_history", return_value=HistoricalSeries([], [], [])) as mock_history:
+        assert len(provider.get_history("TSM", period="1mo")) == 0
+        assert len(provider.get_history("TSM", period="1mo")) == 0
+    assert mock_history.call_count == 2
+
+    # A real series is cached as before
+    assert provider.get_history("TSM", period="1mo").close.tolist() == [145.0, 149.0, 150.25]
+    with patch.object(inner, "get_history") as mock_history:
+        assert provider.get_history("TSM", period="1mo").close.tolist() == [145.0, 149.0, 150.25]
+    mock_history.assert_not_called()
+
+def test_synthetic_universe_is_deterministic():
+    first = SyntheticUniverse(n_tickers=20, years=1, seed=7)
+    second = SyntheticUniverse(n_tickers=20, years=1, seed=7)
+    ticker = first.tickers[3]
+    assert first.history(ticker).close.tolist() == second.history(ticker).close.tolist()
+    assert first.earnings_headlines([ticker]) == second.earnings_headlines([ticker])
+    holdings = first.portfolios(n_holdings=45, holdings_per_portfolio=10)
+    assert sum(len(today) for today, _ in holdings) == 45
+
+    set_provider(SyntheticProvider(first))
+    try:
+        quotes = fetch_stock_data_bulk(first.tickers)
+        assert len(quotes) == 20
+        assert quotes[ticker]["price"] == first.quote(ticker)["price"]
+        assert len(fetch_historical_data(ticker, period="1mo")) > 15
+    finally:
+        set_provider(None)
+
+def test_synthetic_history_through_price_store(tmp_path):
+    universe = SyntheticUniverse(n_tickers=3, years=1, seed=7)
+    ticker = universe.tickers[1]
+    set_provider(SyntheticProvider(universe))
+    try:
+        series = fetch_historical_data_incremental(ticker, PriceStore(str(tmp_path)), lookback_days=30)
+    finally:
+        set_provider(None)
+    # Synthetic bars, not the mock fallback; today's bar is left to the realtime quote
+    expected = universe.history(ticker)
+    expected = expected.close[(expected.dates >= series.dates[0]) & (expected.dates < np.datetime64("today", "D"))]
+    assert len(series) > 15
+    assert series.close.tolist() == expected.tolist()
+
+def test_response_cache_persists_and_expires(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path, endpoint_ttls={"https://example.com/slow/": 0})
+    cache.set("https://example.com/quote", "<html>TSM</html>", params={"b": 2, "a": 1})
+    cache.set("https://example.com/slow/page", "gone")
+
+    reopened = ResponseCache(path)
+    body, headers, status = reopened.get("https://example.com/quote", params={"a": 1, "b": 2})
+    assert body == b"<html>TSM</html>" and status == 200
+    assert ResponseCache(path, endpoint_ttls={"https://example.com/slow/": 0}).get("https://example.com/slow/page") is None
+    assert reopened.get("https://example.com/quote") is None  # params are part of the key
+
+@patch("data_ingestion.scraper.requests.Session.get")
+def test_scraper_uses_response_cache(mock_get, tmp_path):
+    mock_get.return_value.text = '<h3 class="news-title">TSMC earnings beat estimates by 4%</h3>'
+    mock_get.return_value.headers = {}
+    mock_get.return_value.status_code = 200
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    first = scrape_earnings_data(["TSM"], cache=cache)
+    second = scrape_earnings_data(["TSM"], cache=cache)
+    assert first == second == {"TSM": "tsmc earnings beat estimates by 4%"}
+    assert mock_get.call_count == 1
+
+@patch("data_ingestion.scraper.requests.Session.get")
+def test_concurrent_scrape_overlaps_requests(mock_get):
+    def slow_page(url, **kwargs):
+        assert kwargs["timeout"] == DEFAULT_TIMEOUT
+        time.sleep(0.1)
+        response = type("Response", (), {})()
+        response.text = f'<h3 class="news-item">{url.split("/")[-2]} earnings beat</h3>'
+        response.headers, response.status_code = {}, 200
+        response.raise_for_status = lambda: None
+        return response
+
+    mock_get.side_effect = slow_page
+    tickers = [f"T{i}" for i in range(20)]
+    start = time.monotonic()
+    scheduler = PolitenessScheduler(rate=1000, burst=20, concurrency=20)
+    result = scrape_earnings_data(tickers, cache=None, max_workers=20, per_host=20, scheduler=scheduler)
+    assert time.monotonic() - start < 1.0
+    assert list(result) == tickers
+    assert result["T7"] == "t7 earnings beat"
+
+@patch("data_ingestion.scraper.parse_headlines", wraps=scraper.parse_headlines)
+@patch("data_ingestion.scraper.requests.Session.get")
+def test_scraper_revalidates_with_conditional_get(mock_get, mock_parse, tmp_path):
+    page = '<h3 class="news-title">TSMC  earnings beat estimates</h3>'
+    responses = [(200, page), (304, ""), (200, page)]
+
+    def respond(url, headers=None, **kwargs):
+        status, text = responses.pop(0)
+        if status == 304:
+            assert headers["If-None-Match"] == '"v1"'
+        response = type("Response", (), {})()
+        response.status_code, response.text = status, text
+        response.headers = {"ETag": '"v1"'}
+        response.raise_for_status = lambda: None
+        return response
+
+    mock_get.side_effect = respond
+    # Expire page bodies immediately so every scrape has to revalidate
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), endpoint_ttls={"https://finance.yahoo.com/quote/": 0})
+    results = [scrape_earnings_data(["TSM"], cache=cache)["TSM"] for _ in range(3)]
+    assert results[0] == results[1] == results[2] == "tsmc earnings beat estimates"
+    assert mock_get.call_count == 3
+    assert mock_parse.call_count == 1
+
+@pytest.mark.parametrize("parser", scraper.PARSERS)
+def test_headline_parsers_agree(parser):
+    page = (
+        '<html><script>var s = "<h3 class=\'news\'>earnings in script</h3>";</script>'
+        '<h3 class="price-label">Earnings date</h3>'
+        '<h3 class="clamp yf-news-title">Chip demand &amp; supply</h3>'
+        '<h3 class="clamp yf-news-title">TSMC <b>earnings</b> beat</h3></html>'
+    )
+    assert scraper.extract_headlines(page, parser) == ["Chip demand & supply", "TSMC earnings beat"]
+    assert [headline.title for headline in scraper.parse_headlines(page, "TSM", parser)] == ["TSMC earnings beat"]
+    assert scraper.parse_headlines("<p>nothing</p>", "TSM", parser) == []
+
+def test_lxml_parsers_need_lxml():
+    with patch.object(scraper, "_LXML_PARSERS", ()):
+        with pytest.raises(ValueError, match="needs lxml"):
+            scraper.extract_headlines("<p>nothing</p>", "strainer")
+
+def test_extract_earnings_events():
+    events = extract_earnings_events({
+        "TSM": "tsmc 2q25 profit tops estimates by 4.2%, but guidance falls short",
+        "005930.KS": "samsung third-quarter 2024 earnings missed forecasts by 3 percent",
+        "AAPL": "apple fy2025 results in line with expectations",
+        "MSFT": "No recent earnings news for MSFT"
+    })
+    assert events["TSM"] == EarningsEvent("TSM", "Q2 2025", "beat", 4.2)
+    assert events["005930.KS"] == EarningsEvent("005930.KS", "Q3 2024", "miss", -3.0)
+    assert events["AAPL"] == EarningsEvent("AAPL", "FY2025", "inline", 0.0)
+    assert events["MSFT"] == EarningsEvent("MSFT", None, None, None)
+
+@pytest.mark.parametrize("parser", scraper.PARSERS)
+def test_scraper_ranks_headlines_by_recency_and_relevance(parser):
+    story = '<li><h3 class="yf-news-title">{}</h3><p>summary</p>{}</li>'
+    page = "<ul>" + "".join(story.format(title, f'<time datetime="{stamp}">ago</time>' if stamp else "") for title, stamp in [
+        ("TSMC earnings beat estimates", "2025-05-01T08:00:00Z"),
+        ("Chip stocks rally", "2025-05-01T11:00:00Z"),
+        ("TSMC  earnings beat estimates", "2025-05-01T09:00:00Z"),
+        ("TSMC raises revenue outlook", "2025-05-01T11:30:00Z"),
+        ("Last year's earnings results", "2025-04-01T00:00:00Z"),
+        ("Undated profit warning", None),
+    ]) + "</ul>"
+    now = datetime(2025, 5, 1, 12, 0, tzinfo=timezone.utc)
+    items = list(scraper.iter_headline_items(page, parser))
+    assert items[0] == ("TSMC earnings beat estimates", "2025-05-01T08:00:00Z")
+    assert items[-1] == ("Undated profit warning", None)
+
+    ranked = scraper.rank_headlines(items, "TSM", top_n=3, now=now)
+    assert [h.title for h in ranked] == [
+        "TSMC earnings beat estimates", "TSMC raises revenue outlook", "Undated profit warning"
+    ]
+    assert ranked[0].published == "2025-05-01T08:00:00Z"
+    assert ranked[0].relevance == 5.0
+
+@patch("data_ingestion.scraper.requests.Session.get")
+def test_scraper_keeps_earnings_headline_outranked_by_other_news(mock_get, tmp_path):
+    fresh = datetime.now(timezone.utc).isoformat()
+    story = '<li><h3 class="yf-news-title">{}</h3><time datetime="{}">ago</time></li>'
+    mock_get.return_value.text = "<ul>" + "".join(story.format(title, fresh) for title in [
+        "TSMC raises revenue outlook", "TSMC guidance tops forecast", "TSMC quarter sales beat",
+        "TSMC profit forecast raised", "TSMC revenue guidance beats estimates",
+    ]) + story.format("TSMC earnings beat estimates by 4%", "2025-05-01T08:00:00Z") + "</ul>"
+    mock_get.return_value.headers = {}
+    mock_get.return_value.status_code = 200
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    assert "earnings" not in " ".join(h.title for h in scraper.scrape_headlines(["TSM"], cache=cache)["TSM"])
+    # Parsed once above; the earnings headline comes back from the cached ranking too
+    assert scrape_earnings_data(["TSM"], cache=cache) == {"TSM": "tsmc earnings beat estimates by 4%"}
+    assert len(scraper.scrape_headlines(["TSM"], cache=cache)["TSM"]) == scraper.DEFAULT_TOP_N
+
+def test_politeness_scheduler_paces_domain_and_prefers_interactive():
+    scheduler = PolitenessScheduler(rate=20, burst=1, concurrency=1)
+    order = []
+
+    def job(name, priority, host="finance.yahoo.com"):
+        with scheduler.slot(f"https://{host}/quote/{name}/news", priority):
+            order.append(name)
+            time.sleep(0.02)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        pool.submit(job, "B0", BACKGROUND)
+        time.sleep(0.005)
+        for i in range(1, 5):
+            pool.submit(job, f"B{i}", BACKGROUND)
+        time.sleep(0.005)
+        pool.submit(job, "I0", INTERACTIVE)
+        pool.submit(job, "other", BACKGROUND, "news.example.com")
+    # 6 requests to one domain at 20/s with a burst of 1 need at least 0.25s
+    assert time.monotonic() - start >= 0.25
+    # Other domains are paced separately and don't queue behind Yahoo
+    assert [name for name in order if name != "other"][:2] == ["B0", "I0"]
+    assert order.index("other") < order.index("B1")
+    stats = scheduler.stats()["finance.yahoo.com"]
+    assert stats["started"] == 6 and stats["queue_depth"] == 0 and stats["in_flight"] == 0
+    assert stats["max_queue_depth"] >= 5
+    assert stats["wait"]["interactive"]["count"] == 1
+    assert stats["wait"]["background"]["max_s"] >= stats["wait"]["interactive"]["max_s"]
+
+FEED_FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "feeds")
+
+def _feed_fixture(name):
+    with open(os.path.join(FEED_FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+def test_iter_feed_items_reads_rss_and_atom():
+    rss = list(iter_feed_items(_feed_fixture("TSM_rss_0900.xml")))
+    assert rss[0] == FeedItem(
+        "tsm-0830", "TSMC Q2 2025 earnings beat estimates by 4%",
+        "https://finance.yahoo.com/news/tsmc-q2-earnings-beat-0830.html", "2025-05-01T08:30:00Z"
+    )
+    atom = list(iter_feed_items(_feed_fixture("005930.KS_atom.xml")))
+    assert [item.guid for item in atom] == ["urn:news:samsung-q2-miss", "urn:news:samsung-hbm"]
+    assert atom[0].link == "https://news.example.com/samsung-q2-miss"
+    assert atom[0].published == "2025-05-01T00:00:00Z"
+    assert atom[1].published == "2025-04-30T16:00:00Z"
+
+@patch("data_ingestion.scraper.requests.Session.get")
+def test_feed_reader_only_returns_new_items(mock_get, tmp_path):
+    responses = [
+        (200, _feed_fixture("TSM_rss_0900.xml"), '"a"'),
+        (304, "", '"a"'),
+        (200, _feed_fixture("TSM_rss_1000.xml"), '"b"'),
+    ]
+
+    def respond(url, headers=None, **kwargs):
+        status, text, etag = responses.pop(0)
+        if status == 304:
+            assert headers["If-None-Match"] == '"a"'
+        response = type("Response", (), {})()
+        response.status_code, response.text, response.headers = status, text, {"ETag": etag}
+        response.raise_for_status = lambda: None
+        return response
+
+    mock_get.side_effect = respond
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), endpoint_ttls={"https://feeds.finance.yahoo.com/": 0})
+    scheduler = PolitenessScheduler(rate=1000, burst=10)
+    first = FeedReader(cache=cache, scheduler=scheduler).poll_tickers(["TSM"])["TSM"]
+    assert [item.guid for item in first] == ["tsm-0830", "tsm-0715", "tsm-0600"]
+
+    # A fresh reader picks the cursor up from the cache
+    reader = FeedReader(cache=cache, scheduler=scheduler)
+    assert reader.poll_tickers(["TSM"]) == {"TSM": []}
+    assert reader.bytes_parsed == 0
+    new = reader.poll_tickers(["TSM"])["TSM"]
+    assert [item.title for item in new] == ["Analysts lift TSMC price targets after earnings", "TSMC shares jump 3% in Taipei"]
+    assert mock_get.call_count == 3
+
+def test_load_documents_reads_only_new_or_changed_files(tmp_path):
+    source = tmp_path / "research"
+    source.mkdir()
+    for i in range(5):
+        (source / f"note_{i}.txt").write_text(f"Research note {i}", encoding="utf-8")
+    (source / "deck.bin").write_bytes(b"\x00")
+    manifest = DocumentManifest(str(tmp_path / "manifest.json"))
+
+    first = load_documents(str(source), manifest=manifest)
+    assert sorted(doc.metadata["source"] for doc in first[3:]) == [f"note_{i}.txt" for i in range(5)]
+    manifest.save()
+
+    # Restarted process: unchanged files are not even opened
+    manifest = DocumentManifest(str(tmp_path / "manifest.json"))
+    (source / "note_1.txt").write_text("Research note 1, revised", encoding="utf-8")
+    (source / "note_5.txt").write_text("Research note 5", encoding="utf-8")
+    os.utime(source / "note_2.txt", ns=(0, 0))  # touched, same content
+    (source / "note_4.txt").unlink()
+    with patch("data_ingestion.document_loader.open", wraps=open) as mock_open:
+        second = load_documents(str(source), manifest=manifest)
+    opened = sorted(os.path.basename(call.args[0]) for call in mock_open.call_args_list)
+    assert opened == ["note_1.txt", "note_2.txt", "note_5.txt"]
+    assert [doc.page_content for doc in second[3:]] == ["Research note 1, revised", "Research note 5"]
+    # A deletion is staged like a read, so an index run that fails before save() still sees it
+    assert [os.path.basename(path) for path in manifest.missing()] == ["note_4.txt"]
+    assert any(path.endswith("note_4.txt") for path in manifest.entries)
+    manifest.save()
+    assert manifest.missing() == []
+    assert sorted(os.path.basename(path) for path in manifest.entries) == [f"note_{i}.txt" for i in (0, 1, 2, 3, 5)]
+
+def _write_pdf(path, page_texts):
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica")
+    }))
+    for text in page_texts:
+        page = writer.add_blank_page(612, 792)
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+    with open(path, "wb") as f:
+        writer.write(f)
+
+def test_pdf_pages_are_extracted_in_parallel_and_in_order(tmp_path):
+    path = str(tmp_path / "sample_earnings.pdf")
+    _write_pdf(path, [f"TSMC 10-K page {i + 1}" for i in range(19)] + [""])
+    pages = list(iter_pdf_documents(path, max_workers=2))
+    assert [doc.page_content for doc in pages] == [f"TSMC 10-K page {i + 1}" for i in range(19)]
+    assert pages[11].metadata["source"] == "sample_earnings.pdf"
+    assert (pages[11].metadata["page"], pages[11].metadata["total_pages"]) == (12, 20)
+
+    # DOCUMENT_PATH may point straight at a PDF
+    manifest = DocumentManifest()
+    assert len(load_documents(path, manifest=manifest, pdf_workers=1)) == 3 + 19
+    manifest.save()
+    assert len(load_documents(path, manifest=manifest, pdf_workers=1)) == 3
+
+def test_chunking_streams_overlapping_token_windows():
+    text = " ".join(f"w{i}" for i in range(450))
+    doc = Document(page_content=text, metadata={"source": "10-K.pdf", "page": 3})
+    chunks = list(chunk_document(doc, max_tokens=200, overlap=40))
+    assert [c.metadata["chunk_index"] for c in chunks] == [0, 1, 2]
+    assert [c.page_content.split()[0] for c in chunks] == ["w0", "w160", "w320"]
+    assert [len(c.page_content.split()) for c in chunks] == [200, 200, 130]
+    for chunk in chunks:
+        assert text[chunk.metadata["char_start"]:chunk.metadata["char_end"]] == chunk.page_content
+        assert chunk.metadata["parent_id"] == content_hash(text)
+        assert chunk.metadata["source"] == "10-K.pdf" and chunk.metadata["page"] == 3
+
+    # Lazy end to end: an endless document stream still yields the first batches
+    endless = (Document(page_content=f"note {i}") for i in itertools.count())
+    batches = list(itertools.islice(batched(chunk_documents(endless), 4), 2))
+    assert [[c.page_content for c in batch] for batch in batches] == [
+        ["note 0", "note 1", "note 2", "note 3"], ["note 4", "note 5", "note 6", "note 7"]
+    ]
+
+def test_near_duplicate_filter_threshold():
+    base = "TSMC reported quarterly revenue ahead of guidance as AI server demand lifted wafer shipments. " * 3
+    syndicated = "Reuters - " + base.replace("lifted", "boosted", 1)
+    unrelated = "Samsung Electronics warned that memory prices would keep falling through the third quarter."
+    docs = [Document(page_content=text) for text in (base, syndicated, unrelated, base.upper())]
+
+    near = NearDuplicateFilter(threshold=0.8)
+    assert [doc.page_content for doc in near.filter(docs)] == [base, unrelated]
+    assert (near.kept, near.dropped) == (2, 2)
+
+    # A stricter threshold keeps the edited copy but still drops the exact one
+    strict = NearDuplicateFilter(threshold=0.99)
+    assert [doc.page_content for doc in strict.filter(docs)] == [base, syndicated, unrelated]
+    assert strict.dropped == 1
+
+    # Restored signatures behave like documents kept by this filter
+    restored = NearDuplicateFilter(threshold=0.8)
+    restored.restore(*near.signatures())
+    assert restored.is_duplicate(syndicated)
+    assert not restored.is_duplicate("Hynix beat estimates on HBM demand", doc_id="hynix")
+    assert restored.kept == 3
+
+    # A discarded document no longer blocks its edited copy
+    assert restored.discard(["hynix", "unknown"]) == 1
+    assert not restored.is_duplicate("Hynix beat estimates on HBM demand!")
+    assert len(restored.signatures()[0]) == restored.kept == 3
+
+def test_vector_index_store_round_trip(tmp_path):
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.vectorstores.utils import DistanceStrategy
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    embeddings = DeterministicFakeEmbedding(size=16)
+    docs = [
+        Document(page_content="TSMC beat estimates by 4%", metadata={"ticker": "TSM"}),
+        Document(page_content="Samsung missed estimates by 2%", metadata={"ticker": "005930.KS"}),
+    ]
+    vector_store = FAISS.from_documents(docs, embeddings, ids=["tsm", "samsung"], distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT)
+    store = VectorIndexStore(str(tmp_path))
+    assert store.save(vector_store, embeddings_model="fake", sources={"/docs/tsm.txt": ["tsm"]}) == 2
+
+    assert store.load(embeddings, embeddings_model="other") is None
+    loaded, meta, signatures, _, sources = store.load(embeddings, embeddings_model="fake")
+    assert (meta["ntotal"], signatures, sources) == (2, None, {"/docs/tsm.txt": ["tsm"]})
+    assert loaded.index_to_docstore_id == {0: "tsm", 1: "samsung"}
+    [(doc, _)] = loaded.similarity_search_with_score("Samsung missed estimates by 2%", k=1)
+    assert (doc.id, doc.metadata) == ("samsung", {"ticker": "005930.KS"})
+    # The vectors stay in the mapped file until something is written
+    assert not loaded.index.codes.is_owned
+
+    # New documents merge into a private copy of the mapped index and are saved with it
+    assert ensure_writable(loaded)
+    assert loaded.index.codes.is_owned and not ensure_writable(loaded)
+    loaded.merge_from(FAISS.from_documents([Document(page_content="Hynix beat")], embeddings, ids=["hynix"],
+                                          distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT))
+    assert store.save(loaded, embeddings_model="fake") == 3
+    reloaded = store.load(embeddings).store
+    assert reloaded.docstore.search("hynix").page_content == "Hynix beat"
+    assert reloaded.docstore.search("tsm").page_content == "TSMC beat estimates by 4%"
+
+    # Deleting from the mapped index leaves the files alone until the next save
+    ensure_writable(reloaded)
+    reloaded.delete(["tsm", "hynix"])
+    assert reloaded.docstore.search("tsm") == "ID tsm not found."
+    assert [doc.id for doc in reloaded.similarity_search("TSMC beat estimates by 4%", k=3)] == ["samsung"]
+    assert store.load(embeddings).store.index.ntotal == 3
+    assert store.save(reloaded) == 1
+    assert store.load(embeddings).store.index_to_docstore_id == {0: "samsung"}
+
+    # An index whose chunks were all deleted still loads
+    emptied = store.load(embeddings).store
+    ensure_writable(emptied)
+    emptied.delete(["samsung"])
+    assert store.save(emptied) == 0
+    assert store.load(embeddings).store.similarity_search("Samsung", k=1) == []
+
+    # A save interrupted after writing its files, with the same count (delete one, add one),
+    # leaves the previous save in place instead of pairing new vectors with old documents
+    swapped = FAISS.from_documents([Document(page_content="Hynix beat")], embeddings, ids=["hynix"],
+                                   distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT)
+    with patch.object(store, "_publish", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            store.save(swapped)
+    assert store.load(embeddings).store.docstore.search("hynix") == "ID hynix not found."
+    store.save(swapped)
+    assert store.load(embeddings).store.similarity_search("Hynix beat", k=1)[0].id == "hynix"
+    # Older generations are removed; the interrupted one could still be another worker's save in progress
+    generations = sorted(name for name in os.listdir(tmp_path) if name.startswith("gen-"))
+    assert len(generations) == 3 and generations[-1] == store.current_generation()
+    with patch("data_ingestion.index_store.ABANDONED_SAVE_SECONDS", -1):
+        store.save(swapped)
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("gen-")]) == 2
+
+    # Files that disagree within a generation are refused
+    (tmp_path / store.current_generation() / "ids.json").write_text('["samsung", "tsm"]', encoding="utf-8")
+    assert store.load(embeddings) is None
@@ -1,72 +1,306 @@
-import pytest
-from fastapi.testclient import TestClient
-from orchestrator.main import app
-from unittest.mock import patch
-from langchain.docstore.document import Document
-
-# Mock data for pipeline tests
-mock_market_data = {
-    "realtime": {"TSM": {"price": 150}},
-    "historical": {"TSM": {"Close": {"2025-05-01": 148}}}
-}
-mock_earnings_data = {"TSM": "beat estimates by 4%"}
-mock_retrieved_docs = [(Document(page_content="TSMC beat earnings by 4%", metadata={"source": "earnings"}), 0.9)]
-mock_analysis = {
-    "current_allocation": "22%",
-    "yesterday_allocation": "18%",
-    "earnings_summary": {"TSM": "beat estimates by 4%"},
-    "price_changes": {"TSM": "Current price: 150"}
-}
-mock_response = "Today, your Asia tech allocation is 22% of AUM, up from 18% yesterday. TSMC beat estimates by 4%."
-
-client = TestClient(app)
-
-@patch("os.getenv")
-@patch("agents.api_agent.APIAgent.get_market_data")
-@patch("agents.scraping_agent.ScrapingAgent.get_earnings_data")
-@patch("agents.retriever_agent.RetrieverAgent.retrieve")
-@patch("agents.analysis_agent.AnalysisAgent.analyze_risk_exposure")
-@patch("agents.language_agent.LanguageAgent.generate_narrative")
-@patch("agents.voice_agent.VoiceAgent.text_to_speech")
-@patch("data_ingestion.document_loader.load_documents")
-def test_pipeline(
-    mock_load_docs,
-    mock_tts,
-    mock_language,
-    mock_analysis,
-    mock_retrieve,
-    mock_scrape,
-    mock_api,
-    mock_getenv
-):
-    mock_getenv.return_value = "mock_openai_api_key"
-    mock_load_docs.return_value = [Document(page_content="Mock earnings document")]
-    mock_api.return_value = mock_market_data
-    mock_scrape.return_value = mock_earnings_data
-    mock_retrieve.return_value = mock_retrieved_docs
-    mock_analysis.return_value = mock_analysis
-    mock_language.return_value = mock_response
-    mock_tts.return_value = "response.mp3"
-
-    response = client.post(
-        "/process_query",
-        json={"query": "What's our risk exposure in Asia tech stocks today?"}
-    )
-    assert response.status_code == 200
-    assert response.json()["response"] == mock_response
-    assert response.json()["audio_output"] == "response.mp3"
-
-@patch("os.getenv")
-@patch("agents.retriever_agent.RetrieverAgent.retrieve")
-@patch("data_ingestion.document_loader.load_documents")
-def test_pipeline_error(mock_load_docs, mock_retrieve, mock_getenv):
-    mock_getenv.return_value = "mock_openai_api_key"
-    mock_load_docs.return_value = [Document(page_content="Mock earnings document")]
-    mock_retrieve.side_effect = Exception("Retrieval error")
-    response = client.post(
-        "/process_query",
-        json={"query": "What's our risk exposure in Asia tech stocks today?"}
-    )
-    assert response.status_code == 200
-    assert response.json()["response"].startswith("Error:")
-    assert response.json()["audio_output"] is None
\ No newline at end of file
+import pytest
+from fastapi.testclient import TestClient
+from orchestrator.main import QueryRequest, app, handle_query, warmup_scheduler
+from orchestrator.scheduler import WarmupScheduler, next_warmup
+from orchestrator.watcher import DocumentWatcher
+from agents.retriever_agent import RetrieverAgent
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+import asyncio
+import os
+import threading
+from langchain.docstore.document import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from data_ingestion.api import set_provider
+
+# Mock data for pipeline tests
+mock_market_data = {
+    "realtime": {"TSM": {"price": 150}},
+    "historical": {"TSM": {"Close": {"2025-05-01": 148}}}
+}
+mock_earnings_data = {"TSM": "beat estimates by 4%"}
+mock_retrieved_docs = [(Document(page_content="TSMC beat earnings by 4%", metadata={"source": "earnings"}), 0.9)]
+mock_analysis = {
+    "current_allocation": "22%",
+    "yesterday_allocation": "18%",
+    "earnings_summary": {"TSM": "beat estimates by 4%"},
+    "price_changes": {"TSM": "Current price: 150"}
+}
+mock_response = "Today, your Asia tech allocation is 22% of AUM, up from 18% yesterday. TSMC beat estimates by 4%."
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def no_persistent_cache(monkeypatch):
+    # Keep the shared on-disk response cache out of pipeline tests
+    monkeypatch.setenv("HTTP_CACHE_PATH", "")
+    set_provider(None)
+    yield
+    set_provider(None)
+
+@patch.dict(os.environ, {"OPENAI_API_KEY": "mock_openai_api_key"})
+@patch("agents.api_agent.APIAgent.get_market_data")
+@patch("agents.scraping_agent.ScrapingAgent.get_earnings_data")
+@patch("agents.retriever_agent.RetrieverAgent.retrieve")
+@patch("agents.analysis_agent.AnalysisAgent.analyze_risk_exposure")
+@patch("agents.language_agent.LanguageAgent.generate_narrative")
+@patch("agents.voice_agent.VoiceAgent.text_to_speech")
+@patch("data_ingestion.document_loader.load_documents")
+def test_pipeline(
+    mock_load_docs,
+    mock_tts,
+    mock_language,
+    mock_analysis,
+    mock_retrieve,
+    mock_scrape,
+    mock_api
+):
+    mock_load_docs.return_value = [Document(page_content="Mock earnings document")]
+    mock_api.return_value = mock_market_data
+    mock_scrape.return_value = mock_earnings_data
+    mock_retrieve.return_value = mock_retrieved_docs
+    mock_analysis.return_value = mock_analysis
+    mock_language.return_value = mock_response
+    mock_tts.return_value = "response.mp3"
+
+    response = client.post(
+        "/process_query",
+        json={"query": "What's our risk exposure in Asia tech stocks today?"}
+    )
+    assert response.status_code == 200
+    assert response.json()["response"] == mock_response
+    assert response.json()["audio_output"] == "response.mp3"
+
+@patch.dict(os.environ, {"OPENAI_API_KEY": "mock_openai_api_key"})
+@patch("agents.api_agent.APIAgent.get_market_data")
+@patch("agents.scraping_agent.ScrapingAgent.get_earnings_data")
+@patch("agents.retriever_agent.RetrieverAgent.retrieve")
+@patch("data_ingestion.document_loader.load_documents")
+def test_pipeline_error(mock_load_docs, mock_retrieve, mock_scrape, mock_api):
+    mock_load_docs.return_value = [Document(page_content="Mock earnings document")]
+    mock_api.return_value = mock_market_data
+    mock_scrape.return_value = mock_earnings_data
+    mock_retrieve.side_effect = Exception("Retrieval error")
+    response = client.post(
+        "/process_query",
+        json={"query": "What's our risk exposure in Asia tech stocks today?"}
+    )
+    assert response.status_code == 200
+    assert response.json()["response"].startswith("Error:")
+    assert response.json()["audio_output"] is None
+
+@patch("agents.api_agent.APIAgent.get_market_data")
+@patch("agents.scraping_agent.ScrapingAgent.get_earnings_data")
+@patch("agents.retriever_agent.RetrieverAgent.retrieve")
+@patch("agents.analysis_agent.AnalysisAgent.analyze_risk_exposure")
+@patch("agents.language_agent.LanguageAgent.generate_narrative")
+@patch("agents.voice_agent.VoiceAgent.text_to_speech")
+def test_query_does_not_block_event_loop(mock_tts, mock_language, mock_analysis, mock_retrieve, mock_scrape, mock_api):
+    started, release = threading.Event(), threading.Event()
+    timed_out = []
+
+    def slow_market_data():
+        started.set()
+        # Times out only if the event loop is stuck in here
+        timed_out.append(not release.wait(5))
+        return mock_market_data
+
+    mock_api.side_effect = slow_market_data
+    mock_scrape.return_value = mock_earnings_data
+    mock_retrieve.return_value = mock_retrieved_docs
+    mock_analysis.return_value = mock_analysis
+    mock_language.return_value = mock_response
+    mock_tts.return_value = None
+
+    async def scenario():
+        query = asyncio.create_task(handle_query(QueryRequest(query="Asia tech risk?")))
+        # Only reached while the query is still fetching if the loop is free
+        await asyncio.to_thread(started.wait, 5)
+        release.set()
+        return await query
+
+    response = asyncio.run(scenario())
+    assert timed_out == [False]
+    assert response.response == mock_response
+
+
+def test_next_warmup_picks_earliest_open():
+    # Friday 2025-05-30 23:00 UTC: KRX is closed for the weekend, NYSE opens Monday 13:30 UTC
+    now = datetime(2025, 5, 30, 23, 0, tzinfo=timezone.utc)
+    run_at, market = next_warmup(["KRX", "NYSE"], timedelta(minutes=15), now=now)
+    assert market == "KRX"
+    assert run_at == datetime(2025, 6, 1, 23, 45, tzinfo=timezone.utc)  # Monday 08:45 in Seoul
+    run_at, market = next_warmup(["NYSE"], timedelta(minutes=15), now=now)
+    assert run_at == datetime(2025, 6, 2, 13, 15, tzinfo=timezone.utc)
+
+def test_warmup_scheduler_requires_markets():
+    assert next_warmup([], timedelta(minutes=15)) is None
+    with pytest.raises(ValueError):
+        WarmupScheduler(None, None, {}, markets=[])
+    with pytest.raises(ValueError):
+        WarmupScheduler(None, None, {}, markets=["LSE"])
+
+def test_warmup_runs_analysis_off_the_event_loop():
+    class Stub:
+        def get_market_data(self):
+            return mock_market_data
+
+        def get_earnings_data(self, priority=None):
+            return mock_earnings_data
+
+        def analyze_risk_exposure(self, market_data, earnings):
+            threads.append(threading.current_thread())
+            return mock_analysis
+
+    threads = []
+    stub = Stub()
+    scheduler = WarmupScheduler(stub, stub, {"default": stub})
+    result = asyncio.run(scheduler.warmup("KRX"))
+    assert result["analysis"]["default"] == mock_analysis
+    assert threads and threads[0] is not threading.main_thread()
+
+def test_warmup_status_endpoint():
+    response = client.get("/warmup_status")
+    assert response.status_code == 200
+    assert response.json()["markets"] == ["KRX", "NYSE"]
+
+class GatedEmbeddings(Embeddings):
+    """Fake embeddings whose document batches wait until the test opens the gate."""
+
+    def __init__(self):
+        self.fake = DeterministicFakeEmbedding(size=16)
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+
+    def embed_documents(self, texts):
+        self.entered.set()
+        self.gate.wait(5)
+        return self.fake.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.fake.embed_query(text)
+
+def test_document_watcher_indexes_new_and_changed_files(tmp_path):
+    agent = RetrieverAgent(embeddings=DeterministicFakeEmbedding(size=16), documents=[Document(page_content="Seed document")])
+    watcher = DocumentWatcher(agent, [str(tmp_path)])
+    (tmp_path / "tsmc.txt").write_text("TSMC beat Q2 estimates by 4%", encoding="utf-8")
+    assert watcher.poll() == 1
+    assert watcher.poll() == 0
+    (tmp_path / "samsung.txt").write_text("Samsung missed Q2 estimates by 2%", encoding="utf-8")
+    (tmp_path / "tsmc.txt").write_text("TSMC raised full-year guidance", encoding="utf-8")
+    assert watcher.poll() == 2
+    assert agent.dedupe_stats["added"] == 4
+    status = watcher.status()
+    assert (status["polls"], status["chunks_added"], status["files_tracked"]) == (3, 3, 2)
+
+def test_document_watcher_replaces_edited_files(tmp_path):
+    agent = RetrieverAgent(embeddings=DeterministicFakeEmbedding(size=16), documents=[])
+    watcher = DocumentWatcher(agent, [str(tmp_path)])
+    report = tmp_path / "tsmc.txt"
+    report.write_text("TSMC beat second quarter estimates by 4 percent on AI demand", encoding="utf-8")
+    (tmp_path / "samsung.txt").write_text("Samsung missed Q2 estimates by 2%", encoding="utf-8")
+    assert watcher.poll() == 2
+    # Close enough to the old version to count as a near-duplicate of it
+    report.write_text("TSMC beat second quarter estimates by 3 percent on AI demand", encoding="utf-8")
+    assert watcher.poll() == 1
+    assert agent.dedupe_stats["near_duplicates"] == 0
+    texts = [doc.page_content for doc, _ in agent.retrieve("TSMC", k=5, confidence_threshold=float("-inf"))]
+    assert sorted(texts) == ["Samsung missed Q2 estimates by 2%", "TSMC beat second quarter estimates by 3 percent on AI demand"]
+
+    os.remove(tmp_path / "samsung.txt")
+    assert watcher.poll() == 0
+    texts = [doc.page_content for doc, _ in agent.retrieve("TSMC", k=5, confidence_threshold=float("-inf"))]
+    assert texts == ["TSMC beat second quarter estimates by 3 percent on AI demand"]
+
+def test_document_watcher_keeps_edited_file_searchable(tmp_path):
+    embeddings = GatedEmbeddings()
+    embeddings.gate.set()
+    agent = RetrieverAgent(embeddings=embeddings, documents=[])
+    watcher = DocumentWatcher(agent, [str(tmp_path)])
+    report = tmp_path / "tsmc.txt"
+    report.write_text("TSMC beat Q2 estimates by 4%", encoding="utf-8")
+    assert watcher.poll() == 1
+
+    report.write_text("TSMC raised full-year guidance", encoding="utf-8")
+    embeddings.entered.clear()
+    embeddings.gate.clear()
+    poll = threading.Thread(target=watcher.poll)
+    poll.start()
+    try:
+        assert embeddings.entered.wait(5)
+        # The new version is still being embedded; the old one keeps answering
+        texts = [doc.page_content for doc, _ in agent.retrieve("TSMC", k=5, confidence_threshold=float("-inf"))]
+        assert texts == ["TSMC beat Q2 estimates by 4%"]
+    finally:
+        embeddings.gate.set()
+        poll.join(5)
+    texts = [doc.page_content for doc, _ in agent.retrieve("TSMC", k=5, confidence_threshold=float("-inf"))]
+    assert texts == ["TSMC raised full-year guidance"]
+
+def test_document_watcher_removes_deleted_file_after_failed_poll(tmp_path):
+    agent = RetrieverAgent(embeddings=DeterministicFakeEmbedding(size=16), documents=[])
+    watcher = DocumentWatcher(agent, [str(tmp_path)])
+    (tmp_path / "samsung.txt").write_text("Samsung missed Q2 estimates by 2%", encoding="utf-8")
+    assert watcher.poll() == 1
+    os.remove(tmp_path / "samsung.txt")
+
+    def failing_index(documents):
+        list(documents)  # the scan runs, then embedding fails
+        raise RuntimeError("embedding service down")
+
+    with patch.object(agent, "index_documents", side_effect=failing_index):
+        with pytest.raises(RuntimeError):
+            watcher.poll()
+    assert watcher.poll() == 0
+    assert agent.retrieve("Samsung", k=5, confidence_threshold=float("-inf")) == []
+    assert watcher.status()["files_tracked"] == 0
+
+def test_document_watcher_does_not_block_queries(tmp_path):
+    embeddings = GatedEmbeddings()
+    embeddings.gate.set()
+    agent = RetrieverAgent(embeddings=embeddings, documents=[Document(page_content="TSMC beat Q2 estimates by 4%")])
+    (tmp_path / "samsung.txt").write_text("Samsung missed Q2 estimates by 2%", encoding="utf-8")
+    embeddings.entered.clear()
+    embeddings.gate.clear()
+    watcher = DocumentWatcher(agent, [str(tmp_path)], interval_seconds=60)
+    watcher.start()
+    try:
+        assert embeddings.entered.wait(5)
+        # The watcher is mid-embedding; the existing index still answers
+        results = agent.retrieve("TSMC beat Q2 estimates by 4%", k=1, confidence_threshold=0.0)
+        assert [doc.page_content for doc, _ in results] == ["TSMC beat Q2 estimates by 4%"]
+    finally:
+        embeddings.gate.set()
+        watcher.stop(timeout=5)
+    assert watcher.chunks_added == 1
+    assert len(agent.retrieve("Samsung", k=5, confidence_threshold=float("-inf"))) == 2
+
+def test_warmup_results_are_served_while_fresh():
+    scheduler = WarmupScheduler(None, None, {"default": None}, max_age_minutes=20)
+    prepared_at = datetime(2025, 6, 2, 13, 15, tzinfo=timezone.utc)
+    scheduler.latest = {
+        "market": "NYSE", "prepared_at": prepared_at.isoformat(), "duration_seconds": 1.0,
+        "market_data": mock_market_data, "earnings": mock_earnings_data, "analysis": {"default": mock_analysis}
+    }
+    assert scheduler.prepared(now=prepared_at + timedelta(minutes=19))["analysis"] == mock_analysis
+    assert scheduler.prepared(now=prepared_at + timedelta(minutes=21)) is None
+    assert scheduler.prepared("other", now=prepared_at) is None
+
+@patch("agents.api_agent.APIAgent.get_market_data")
+@patch("agents.scraping_agent.ScrapingAgent.get_earnings_data")
+@patch("agents.retriever_agent.RetrieverAgent.retrieve")
+@patch("agents.analysis_agent.AnalysisAgent.analyze_risk_exposure")
+@patch("agents.language_agent.LanguageAgent.generate_narrative")
+@patch("agents.voice_agent.VoiceAgent.text_to_speech")
+def test_query_uses_fresh_warmup(mock_tts, mock_language, mock_analysis, mock_retrieve, mock_scrape, mock_api):
+    mock_retrieve.return_value = mock_retrieved_docs
+    mock_language.return_value = mock_response
+    mock_tts.return_value = None
+    warm = {"market_data": mock_market_data, "earnings": mock_earnings_data, "analysis": mock_analysis}
+    with patch.object(warmup_scheduler, "prepared", return_value=warm):
+        response = client.post("/process_query", json={"query": "Asia tech risk?"})
+    assert response.json()["response"] == mock_response
+    mock_api.assert_not_called()
+    mock_scrape.assert_not_called()
+    mock_analysis.assert_not_called()
+    mock_language.assert_called_once_with("Asia tech risk?", mock_market_data, [mock_retrieved_docs[0][0]], mock_analysis)